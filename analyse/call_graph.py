@@ -0,0 +1,68 @@
+from typing import Dict, List, Set
+
+from parser.ast_nodes import ASTNode, FunctionCall, FunctionDecl, Program
+from parser.visitor import walk
+
+
+def called_names(node: ASTNode) -> Set[str]:
+    """子树中按名字调用的函数（含库函数）"""
+    return {current.name for current in walk(node) if isinstance(current, FunctionCall)}
+
+
+class ProgramCallGraph:
+    """AST 层面的调用图：函数名 -> 函数体中调用的用户函数
+
+    程序从全局声明开始执行，随后进入 main，因此入口是 main 以及全局声明（变量初始值等）中调用的函数。
+    """
+    def __init__(self, program: Program):
+        self.functions: Dict[str, FunctionDecl] = {
+            decl.name: decl for decl in program.declarations if isinstance(decl, FunctionDecl)}
+        self.callees: Dict[str, Set[str]] = {
+            name: called_names(decl.body) & self.functions.keys() for name, decl in self.functions.items()}
+        self.roots: Set[str] = {'main'} & self.functions.keys()
+        for decl in program.declarations:
+            if not isinstance(decl, FunctionDecl):
+                self.roots |= called_names(decl) & self.functions.keys()
+
+    def reachable(self) -> Set[str]:
+        """从入口直接或间接调用到的函数"""
+        seen: Set[str] = set()
+        stack = list(self.roots)
+        while stack:
+            name = stack.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            stack.extend(self.callees[name])
+        return seen
+
+
+class DeadFunctionElimination:
+    """在代码生成之前删除入口不可达的函数
+
+    CodeGenerator.visit_Program 会为源程序中的每个函数生成代码；不可达的函数永远不会执行，
+    删除后既减少中间代码，也减少虚拟机装载时建立标签表等工作。
+    没有 main 时虚拟机从第一条指令顺序执行并落入第一个函数，此时保持程序不变。
+    """
+    def __init__(self):
+        self.removed: List[str] = []
+        self.nodes_before = 0
+        self.nodes_after = 0
+
+    def run(self, program: Program) -> Program:
+        graph = ProgramCallGraph(program)
+        self.nodes_before = sum(1 for _ in walk(program))
+        if 'main' not in graph.functions:
+            self.nodes_after = self.nodes_before
+            return program
+        live = graph.reachable()
+        self.removed = [name for name in graph.functions if name not in live]
+        pruned = Program(declarations=[decl for decl in program.declarations
+                                       if not (isinstance(decl, FunctionDecl) and decl.name not in live)])
+        self.nodes_after = sum(1 for _ in walk(pruned))
+        return pruned
+
+    def summary(self) -> str:
+        removed = ', '.join(self.removed) if self.removed else '无'
+        return (f"删除不可达函数 {len(self.removed)} 个: {removed}\n"
+                f"语法树节点: {self.nodes_before} -> {self.nodes_after}")
@@ -1,6 +1,9 @@
-from .typ import Type, ListType, TupleType
+from typing import Iterable
+
+from .typ import BOOL, FLOAT, INT, NUMERIC_TYPES, VOID, ListType, TupleType, Type, resolve_type
 from .symbol import Symbol, SymbolTable
 from parser.ast_nodes import *
+from parser.visitor import NodeVisitor, child_nodes
 
 class SemanticError(Exception):
     """语义错误异常"""
@@ -9,7 +12,11 @@ class SemanticError(Exception):
         self.node = node
         super().__init__(f"Semantic error: {message} at node {type(node).__name__}({node})")
 
-class SemanticAnalyzer:
+    def __reduce__(self):
+        # 并行编译时错误要从工作进程传回主进程
+        return (SemanticError, (self.message, self.node))
+
+class SemanticAnalyzer(NodeVisitor):
     """语义分析器，使用访问者模式遍历AST"""
     def __init__(self):
         self.global_scope = SymbolTable()
@@ -54,25 +61,47 @@ class SemanticAnalyzer:
             self.global_scope.define(func_symbol)
 
     def analyze(self, node: ASTNode):
-        """开始语义分析"""
-        method_name = f'visit_{type(node).__name__}'
-        visitor = getattr(self, method_name, self.generic_visit)
-        return visitor(node)
+        """开始语义分析；表达式节点的类型记录在 node.resolved_type 上，供代码生成使用"""
+        result = self.visit(node)
+        if isinstance(result, Type):
+            node.resolved_type = result
+        return result
 
     def generic_visit(self, node: ASTNode):
-        """默认的访问方法，递归访问子节点"""
-        for field, value in vars(node).items():
-            if isinstance(value, ASTNode):
-                self.analyze(value)
-            elif isinstance(value, list):
-                for item in value:
-                    if isinstance(item, ASTNode):
-                        self.analyze(item)
+        """默认的访问方法，递归访问子节点（经过 analyze 以记录子表达式的类型）"""
+        for child in child_nodes(node):
+            self.analyze(child)
 
     def visit_Program(self, node: Program):
+        # 先登记所有顶层函数的签名，函数体中可以调用定义在其后的函数
+        self.declare_functions(decl for decl in node.declarations if isinstance(decl, FunctionDecl))
         for decl in node.declarations:
             self.analyze(decl)
 
+    def declare_functions(self, functions: Iterable[FunctionDecl]):
+        """在当前作用域登记函数签名（不分析函数体）"""
+        for decl in functions:
+            if self.current_scope.lookup(decl.name):
+                raise SemanticError(f"Function '{decl.name}' already defined in current scope.", decl)
+            self.current_scope.define(self.function_symbol(decl))
+
+    def function_symbol(self, node: Union[FunctionDecl, MemberFunctionDecl]) -> Symbol:
+        """根据函数声明构造函数符号"""
+        # 解析函数返回类型
+        return_type = self.resolve_type(node.return_type)
+        # 解析参数类型
+        params = []
+        for param in node.params:
+            param_type = self.resolve_type(param.type)
+            params.append( (param.name, param_type) )
+        return Symbol(
+            name=node.name,
+            symbol_type='function',
+            data_type=return_type,
+            is_function=True,
+            params=params
+        )
+
     def visit_ClassDecl(self, node: ClassDecl):
         # 定义类符号
         class_symbol = Symbol(
@@ -140,26 +169,12 @@ class SemanticAnalyzer:
         self.current_function = enclosing_function
 
     def visit_FunctionDecl(self, node: FunctionDecl):
-        # 处理全局或顶层函数，逻辑与 MemberFunctionDecl 类似
-        # 解析函数返回类型
-        return_type = self.resolve_type(node.return_type)
-        # 解析参数类型
-        params = []
-        for param in node.params:
-            param_type = self.resolve_type(param.type)
-            params.append( (param.name, param_type) )
-
-        # 定义函数符号
-        func_symbol = Symbol(
-            name=node.name,
-            symbol_type='function',
-            data_type=return_type,
-            is_function=True,
-            params=params
-        )
-        if self.current_scope.lookup(node.name):
-            raise SemanticError(f"Function '{node.name}' already defined in current scope.", node)
-        self.current_scope.define(func_symbol)
+        # 处理全局或顶层函数，签名已在 visit_Program 中登记
+        func_symbol = self.global_scope.lookup(node.name)
+        if func_symbol is None or not func_symbol.is_function:
+            func_symbol = self.function_symbol(node)
+            self.current_scope.define(func_symbol)
+        params = func_symbol.params
 
         # 设置当前函数上下文
         enclosing_function = self.current_function
@@ -218,7 +233,7 @@ class SemanticAnalyzer:
             raise SemanticError(f"Type mismatch in assignment: expected '{target_type.name}', got '{value_type.name}'.", node)
         # 特别处理元组的不可变性
         if isinstance(node.target, IndexAccess):
-            collection_type = self.analyze(node.target.collection)
+            collection_type = node.target.collection.resolved_type
             if isinstance(collection_type, TupleType):
                 raise SemanticError("Tuples are immutable and cannot be assigned to.", node)
 
@@ -233,7 +248,7 @@ class SemanticAnalyzer:
             if not self.type_compatible(return_type, expr_type):
                 raise SemanticError(f"Return type mismatch: expected '{return_type.name}', got '{expr_type.name}'.", node)
         else:
-            if return_type.name != 'void':
+            if return_type is not VOID:
                 raise SemanticError(f"Return type mismatch: expected '{return_type.name}', got 'void'.", node)
 
     def visit_ExpressionStmt(self, node: ExpressionStmt):
@@ -253,18 +268,18 @@ class SemanticAnalyzer:
         logical_ops = {'&&', '||'}
 
         if op in arithmetic_ops:
-            if left_type.name in {'int', 'float'} and right_type.name in {'int', 'float'}:
-                return Type('float') if 'float' in (left_type.name, right_type.name) else Type('int')
+            if left_type in NUMERIC_TYPES and right_type in NUMERIC_TYPES:
+                return FLOAT if FLOAT in (left_type, right_type) else INT
             else:
                 raise SemanticError(f"Arithmetic operator '{op}' requires numeric operands.", node)
         elif op in comparison_ops:
-            if left_type == right_type:
-                return Type('bool')
+            if left_type is right_type:
+                return BOOL
             else:
                 raise SemanticError(f"Comparison operator '{op}' requires operands of the same type.", node)
         elif op in logical_ops:
-            if left_type.name == 'bool' and right_type.name == 'bool':
-                return Type('bool')
+            if left_type is BOOL and right_type is BOOL:
+                return BOOL
             else:
                 raise SemanticError(f"Logical operator '{op}' requires boolean operands.", node)
         else:
@@ -275,18 +290,18 @@ class SemanticAnalyzer:
         op = node.operator
 
         if op == '!':
-            if operand_type.name == 'bool':
-                return Type('bool')
+            if operand_type is BOOL:
+                return BOOL
             else:
                 raise SemanticError(f"Logical NOT operator '!' requires boolean operand", node)
         elif op == '-':
-            if operand_type.name in {'int', 'float'}:
+            if operand_type in NUMERIC_TYPES:
                 return operand_type
             else:
                 raise SemanticError(f"Unary minus requires numeric operand", node)
         elif op in {'++', '--'}:
-            if operand_type.name == 'int':
-                return Type('int')
+            if operand_type is INT:
+                return INT
             else:
                 raise SemanticError(f"Increment/decrement requires integer operand", node)
         else:
@@ -306,8 +321,11 @@ class SemanticAnalyzer:
             lib_func = self.library_functions[node.name]
             func_symbol = self.global_scope.lookup(node.name)
             
-            # 如果是可变参数函数，不检查参数数量
-            if not func_symbol.is_variadic:
+            # 如果是可变参数函数，不检查参数数量，但仍需分析每个实参
+            if func_symbol.is_variadic:
+                for arg in node.arguments:
+                    self.analyze(arg)
+            else:
                 if len(node.arguments) != len(lib_func.params):
                     raise SemanticError(f"Function '{node.name}' expects {len(lib_func.params)} parameters, got {len(node.arguments)}.", node)
                 
@@ -375,7 +393,7 @@ class SemanticAnalyzer:
 
         # 分析索引表达式，确保其为 int 类型
         index_type = self.analyze(node.index)
-        if not self.type_compatible(Type('int'), index_type):
+        if not self.type_compatible(INT, index_type):
             raise SemanticError(f"Index expression must be of type 'int', got '{index_type.name}'.", node)
 
         return collection_element_type
@@ -387,7 +405,7 @@ class SemanticAnalyzer:
     def visit_IfStmt(self, node: IfStmt):
         # 分析条件
         condition_type = self.analyze(node.condition)
-        if condition_type.name != 'bool':
+        if condition_type is not BOOL:
             raise SemanticError(f"If statement condition must be 'bool', got '{condition_type.name}'.", node)
         # 分析 then_branch
         self.analyze(node.then_branch)
@@ -401,25 +419,28 @@ class SemanticAnalyzer:
     def visit_ElifBranch(self, node: ElifBranch):
         # 分析条件
         condition_type = self.analyze(node.condition)
-        if condition_type.name != 'bool':
+        if condition_type is not BOOL:
             raise SemanticError(f"Elif statement condition must be 'bool', got '{condition_type.name}'.", node)
         # 分析 body
         self.analyze(node.body)
 
     def visit_ForStmt(self, node: ForStmt):
+        # 循环变量只在循环内可见，同一函数中的多个循环可以声明同名的循环变量
+        self.current_scope = SymbolTable(parent=self.current_scope)
         # 分析 initializer
         if node.initializer:
             self.analyze(node.initializer)
         # 分析 condition
         if node.condition:
             condition_type = self.analyze(node.condition)
-            if condition_type.name != 'bool':
+            if condition_type is not BOOL:
                 raise SemanticError(f"For loop condition must be 'bool', got '{condition_type.name}'.", node)
         # 分析 update
         if node.update:
             self.analyze(node.update)
         # 分析 body
         self.analyze(node.body)
+        self.current_scope = self.current_scope.parent
 
     def visit_BreakStmt(self, node: BreakStmt):
         # 可以在循环上下文中添加检查，暂时忽略
@@ -430,31 +451,16 @@ class SemanticAnalyzer:
         pass
 
     def resolve_type(self, type_str: str) -> Type:
-        """解析类型字符串，返回对应的 Type 对象"""
-        if type_str.startswith('list<') and type_str.endswith('>'):
-            # 解析 list 的元素类型
-            inner_type_str = type_str[5:-1].strip()
-            element_type = self.resolve_type(inner_type_str)
-            return ListType(element_type=element_type)
-        elif type_str.startswith('tuple<') and type_str.endswith('>'):
-            # 解析 tuple 的元素类型列表
-            inner_types_str = type_str[6:-1].strip()
-            # 简单的分割，假设类型名中不含逗号
-            type_names = [t.strip() for t in inner_types_str.split(',')]
-            element_types = [self.resolve_type(t) for t in type_names]
-            return TupleType(element_types=element_types)
-        else:
-            # 基本类型
-            return Type(type_str)
+        """解析类型字符串，返回对应的 Type 对象（同一字符串只解析一次）"""
+        return resolve_type(type_str)
 
     def type_compatible(self, expected: Type, actual: Type) -> bool:
         """检查类型是否兼容"""
-        if expected == actual:
+        if expected is actual:
             return True
         # 自动将 int 转换为 float
-        if isinstance(expected, Type) and isinstance(actual, Type):
-            if expected.name == 'float' and actual.name == 'int':
-                return True
+        if expected is FLOAT and actual is INT:
+            return True
         # 列表类型兼容性
         if isinstance(expected, ListType) and isinstance(actual, ListType):
             return self.type_compatible(expected.element_type, actual.element_type)
@@ -34,10 +34,11 @@ class SymbolTable:
         self.symbols[symbol.name] = symbol
 
     def lookup(self, name: str) -> Optional[Symbol]:
-        symbol = self.symbols.get(name)
-        if symbol:
-            return symbol
-        elif self.parent:
-            return self.parent.lookup(name)
-        else:
-            return None
+        # 沿父作用域链逐层查找（循环而不是递归，嵌套很深时不增加调用开销）
+        scope = self
+        while scope is not None:
+            symbol = scope.symbols.get(name)
+            if symbol:
+                return symbol
+            scope = scope.parent
+        return None
@@ -1,38 +1,86 @@
-from typing import List
+from typing import Dict, Hashable, List
+
+# 已构造的类型：(类型类, 结构) -> 唯一实例
+_interned: Dict[Hashable, 'Type'] = {}
+
 
 class Type:
-    """基础类型类"""
-    def __init__(self, name: str):
-        self.name = name
+    """基础类型类
+
+    类型按结构哈希合并（hash-consing）：构造时先查表，结构相同的类型总是返回同一个实例，
+    因此类型相等就是同一性比较（沿用 object 的 __eq__ 和 __hash__），构造完成后不再修改。
+    """
+    __slots__ = ('name',)
 
-    def __eq__(self, other):
-        return isinstance(other, Type) and self.name == other.name
+    def __new__(cls, name: str):
+        return cls.intern((cls, name), name=name)
+
+    @classmethod
+    def intern(cls, key: Hashable, **attributes) -> 'Type':
+        """返回 key 对应的唯一实例，第一次出现时用 attributes 构造"""
+        instance = _interned.get(key)
+        if instance is None:
+            instance = object.__new__(cls)
+            for attribute, value in attributes.items():
+                setattr(instance, attribute, value)
+            _interned[key] = instance
+        return instance
+
+    def __reduce__(self):
+        # 复制、pickle 时重新经过构造函数，得到同一个实例
+        return (Type, (self.name,))
 
     def __repr__(self):
         return self.name
 
 class ListType(Type):
     """列表类型，如 list<int>"""
-    def __init__(self, element_type: Type):
-        super().__init__(f'list<{element_type.name}>')
-        self.element_type = element_type
+    __slots__ = ('element_type',)
 
-    def __eq__(self, other):
-        return isinstance(other, ListType) and self.element_type == other.element_type
+    def __new__(cls, element_type: Type):
+        return cls.intern((cls, element_type), name=f'list<{element_type.name}>', element_type=element_type)
 
-    def __repr__(self):
-        return f'list<{self.element_type}>'
+    def __reduce__(self):
+        return (ListType, (self.element_type,))
 
 class TupleType(Type):
     """元组类型，如 tuple<int, str, float>"""
-    def __init__(self, element_types: List[Type]):
+    __slots__ = ('element_types',)
+
+    def __new__(cls, element_types: List[Type]):
+        element_types = tuple(element_types)
         elements = ', '.join([et.name for et in element_types])
-        super().__init__(f'tuple<{elements}>')
-        self.element_types = element_types
+        return cls.intern((cls, element_types), name=f'tuple<{elements}>', element_types=element_types)
 
-    def __eq__(self, other):
-        return isinstance(other, TupleType) and self.element_types == other.element_types
+    def __reduce__(self):
+        return (TupleType, (self.element_types,))
 
-    def __repr__(self):
-        elements = ', '.join([str(et) for et in self.element_types])
-        return f'tuple<{elements}>'
+
+# 常用的基本类型
+INT = Type('int')
+FLOAT = Type('float')
+BOOL = Type('bool')
+STR = Type('str')
+VOID = Type('void')
+NUMERIC_TYPES = (INT, FLOAT)
+
+# 类型字符串 -> 类型
+_resolved: Dict[str, Type] = {}
+
+
+def resolve_type(type_str: str) -> Type:
+    """解析类型字符串（如 int、list<int>、tuple<int, str>），结果按字符串缓存"""
+    resolved = _resolved.get(type_str)
+    if resolved is None:
+        if type_str.startswith('list<') and type_str.endswith('>'):
+            # 解析 list 的元素类型
+            resolved = ListType(resolve_type(type_str[5:-1].strip()))
+        elif type_str.startswith('tuple<') and type_str.endswith('>'):
+            # 简单的分割，假设类型名中不含逗号
+            type_names = [t.strip() for t in type_str[6:-1].strip().split(',')]
+            resolved = TupleType([resolve_type(t) for t in type_names])
+        else:
+            # 基本类型
+            resolved = Type(type_str)
+        _resolved[type_str] = resolved
+    return resolved
@@ -0,0 +1,62 @@
+"""语法树内存占用测量
+
+生成一个由大量函数组成的合成程序，完成词法分析后只对语法分析计量内存（tracemalloc），
+输出语法树节点数和平均每个节点占用的字节数（含节点引用的列表和字符串）。
+用法（在仓库根目录）：python -m benchmarks.ast_memory [--functions=N]
+"""
+import sys
+import tracemalloc
+from collections import Counter
+
+from lexer import Lexer
+from parser.parser import Parser
+from parser.visitor import walk
+
+FUNCTION_TEMPLATE = """fn f{n}(a: int, b: int) -> int {{
+    int s = a * (b + {n}) - a / 2;
+    list<int> xs = [a, b, {n}];
+    for (int i = 0; i < b; i = i + 1) {{
+        if (s > {n} && i != a) {{
+            s = s + xs[i % 3] * i;
+        }} else {{
+            s = s - (a + i) * 2;
+        }}
+    }}
+    print(s, -a, !(s == b));
+    return s + f{m}(b, a);
+}}
+"""
+
+
+def synthetic_program(functions: int) -> str:
+    parts = [FUNCTION_TEMPLATE.format(n=n, m=max(n - 1, 0)) for n in range(functions)]
+    parts.append("fn main() -> int {\n    return f0(1, 2);\n}\n")
+    return ''.join(parts)
+
+
+def measure(source: str):
+    """返回 (节点数, 语法树占用字节数, 各类节点的数量)"""
+    tokens = Lexer(source).tokenize_array()
+    tracemalloc.start()
+    program = Parser(tokens).parse()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    kinds = Counter(type(node).__name__ for node in walk(program))
+    return sum(kinds.values()), size, kinds
+
+
+def main(argv):
+    functions = 20000
+    for arg in argv:
+        if arg.startswith('--functions='):
+            functions = int(arg.split('=', 1)[1])
+
+    source = synthetic_program(functions)
+    count, size, kinds = measure(source)
+    print(f"合成程序: {functions} 个函数, {len(source) / (1024 * 1024):.2f} MB")
+    print(f"语法树节点: {count}（{', '.join(f'{name} {n}' for name, n in kinds.most_common(5))} 等）")
+    print(f"内存: {size / (1024 * 1024):.1f} MB，平均 {size / count:.1f} 字节/节点")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
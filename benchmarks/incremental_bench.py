@@ -0,0 +1,56 @@
+"""增量前端的编辑耗时基准
+
+把示例源文件重复拼接到指定大小，在文件中间某个函数体的开头逐个字符键入一条语句，
+对比 IncrementalParser.edit 与每次整体重新词法、语法分析的耗时。
+用法（在仓库根目录）：python -m benchmarks.incremental_bench [源文件] [--size-mb=N]
+"""
+import sys
+import time
+
+from lexer import Lexer
+from parser.incremental import IncrementalParser
+from parser.parser import Parser, ParserError
+
+from .lexer_bench import build_source
+
+TYPED = 'x = 1;\n'
+
+
+def main(argv):
+    path = 'code.me'
+    size_mb = 1.0
+    for arg in argv:
+        if arg.startswith('--size-mb='):
+            size_mb = float(arg.split('=', 1)[1])
+        else:
+            path = arg
+
+    source = build_source(path, size_mb)
+    # 在文件中间某个函数体的第一行之前键入
+    function = source.index('\nfn ', len(source) // 2)
+    offset = source.index('\n', function + 1) + 1
+
+    start = time.perf_counter()
+    Parser(Lexer(source).tokenize()).parse()
+    full_seconds = time.perf_counter() - start
+
+    front = IncrementalParser(source)
+    relexed = 0
+    start = time.perf_counter()
+    errors = 0
+    for position, char in enumerate(TYPED):
+        try:
+            front.edit(offset + position, 0, char)
+        except ParserError:
+            errors += 1  # 键入途中的语句不完整
+        relexed += front.relexed_tokens
+    edit_seconds = (time.perf_counter() - start) / len(TYPED)
+
+    print(f"源代码: {path} x {len(source) / (1024 * 1024):.2f} MB, token 数: {len(front.tokens)}")
+    print(f"整体词法 + 语法分析: {full_seconds * 1000:.1f} ms")
+    print(f"增量编辑: 平均 {edit_seconds * 1000:.2f} ms/次，重新扫描 {relexed / len(TYPED):.1f} 个 token/次，"
+          f"重新解析 {front.reparsed or '整个程序'}，其中 {errors} 次报告语法错误")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
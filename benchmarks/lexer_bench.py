@@ -0,0 +1,59 @@
+"""词法分析吞吐量基准
+
+把示例源文件重复拼接到指定大小，测量 Lexer.tokenize 每秒产生的 token 数。
+用法（在仓库根目录）：python -m benchmarks.lexer_bench [源文件] [--size-mb=N] [--repeat=N]
+"""
+import sys
+import time
+
+from lexer import Lexer
+
+
+def build_source(path: str, size_mb: float) -> str:
+    """重复拼接 path 的内容直到不少于 size_mb 兆字节"""
+    with open(path, 'r', encoding='utf-8') as f:
+        unit = f.read()
+    if not unit.endswith('\n'):
+        unit += '\n'
+    count = max(1, int(size_mb * 1024 * 1024 / len(unit.encode('utf-8'))) + 1)
+    return unit * count
+
+
+def bench(source: str, repeat: int):
+    """返回 (token 数, 最短耗时秒数, 首次计算行列号的耗时秒数)"""
+    best = float('inf')
+    tokens = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = Lexer(source).tokenize()
+        best = min(best, time.perf_counter() - start)
+    start = time.perf_counter()
+    _ = tokens[-1].line  # 第一次查询时才建立行首表
+    position_seconds = time.perf_counter() - start
+    return len(tokens), best, position_seconds
+
+
+def main(argv):
+    path = 'code.me'
+    size_mb = 4.0
+    repeat = 3
+    for arg in argv:
+        if arg.startswith('--size-mb='):
+            size_mb = float(arg.split('=', 1)[1])
+        elif arg.startswith('--repeat='):
+            repeat = int(arg.split('=', 1)[1])
+        else:
+            path = arg
+
+    source = build_source(path, size_mb)
+    size = len(source.encode('utf-8')) / (1024 * 1024)
+    count, seconds, position_seconds = bench(source, repeat)
+    print(f"源代码: {path} x {size:.2f} MB")
+    print(f"token 数: {count}")
+    print(f"耗时: {seconds:.3f} s（{repeat} 次中最短）")
+    print(f"吞吐量: {count / seconds:,.0f} tokens/s, {size / seconds:.2f} MB/s")
+    print(f"首次计算行列号（建立行首表）: {position_seconds * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
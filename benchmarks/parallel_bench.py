@@ -0,0 +1,60 @@
+"""并行编译基准
+
+生成 ast_memory 中的合成程序并完成语法分析，对比整体的语义分析 + 代码生成与
+codegenerator.parallel.ParallelCompiler 用不同进程数按函数并行编译的耗时，并检查两者的中间代码相同。
+用法（在仓库根目录）：python -m benchmarks.parallel_bench [--functions=N] [--jobs=N]
+"""
+import os
+import sys
+import time
+
+from analyse.semantic import SemanticAnalyzer
+from codegenerator.codegen import CodeGenerator
+from codegenerator.parallel import ParallelCompiler
+from lexer import Lexer
+from parser.parser import Parser
+
+from .ast_memory import synthetic_program
+
+
+def serial(tokens):
+    program = Parser(tokens).parse()
+    start = time.perf_counter()
+    SemanticAnalyzer().analyze(program)
+    code = CodeGenerator().generate(program)
+    return time.perf_counter() - start, code
+
+
+def parallel(tokens, jobs: int):
+    program = Parser(tokens).parse()
+    start = time.perf_counter()
+    compiler = ParallelCompiler(jobs)
+    compiler.analyze(program)
+    code = compiler.link()
+    return time.perf_counter() - start, code
+
+
+def main(argv):
+    functions = 5000
+    max_jobs = os.cpu_count() or 1
+    for arg in argv:
+        if arg.startswith('--functions='):
+            functions = int(arg.split('=', 1)[1])
+        elif arg.startswith('--jobs='):
+            max_jobs = int(arg.split('=', 1)[1])
+
+    source = synthetic_program(functions)
+    tokens = Lexer(source).tokenize_array()
+    print(f"合成程序: {functions} 个函数, {len(source) / (1024 * 1024):.2f} MB")
+    seconds, expected = serial(tokens)
+    print(f"整体编译: {seconds * 1000:.0f} ms")
+    jobs = 2
+    while jobs <= max_jobs:
+        seconds, code = parallel(tokens, jobs)
+        same = '相同' if str(code) == str(expected) else '不同'
+        print(f"{jobs} 个进程: {seconds * 1000:.0f} ms（中间代码与整体编译{same}）")
+        jobs *= 2
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,48 @@
+"""语法分析吞吐量基准
+
+把示例源文件重复拼接到指定大小，先完成词法分析，再测量 Parser.parse 每秒处理的 token 数。
+用法（在仓库根目录）：python -m benchmarks.parser_bench [源文件] [--size-mb=N] [--repeat=N]
+"""
+import sys
+import time
+
+from lexer import Lexer
+from parser.parser import Parser
+
+from .lexer_bench import build_source
+
+
+def bench(source: str, repeat: int):
+    """返回 (token 数, 语法分析的最短耗时秒数)"""
+    tokens = Lexer(source).tokenize()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        Parser(tokens).parse()
+        best = min(best, time.perf_counter() - start)
+    return len(tokens), best
+
+
+def main(argv):
+    path = 'code.me'
+    size_mb = 1.0
+    repeat = 3
+    for arg in argv:
+        if arg.startswith('--size-mb='):
+            size_mb = float(arg.split('=', 1)[1])
+        elif arg.startswith('--repeat='):
+            repeat = int(arg.split('=', 1)[1])
+        else:
+            path = arg
+
+    source = build_source(path, size_mb)
+    size = len(source.encode('utf-8')) / (1024 * 1024)
+    count, seconds = bench(source, repeat)
+    print(f"源代码: {path} x {size:.2f} MB")
+    print(f"token 数: {count}")
+    print(f"耗时: {seconds:.3f} s（{repeat} 次中最短）")
+    print(f"吞吐量: {count / seconds:,.0f} tokens/s")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,60 @@
+"""语法树遍历基准
+
+生成 ast_memory 中的合成程序并完成语法分析，分别测量语义分析、中间代码生成和 -a 打印语法树
+（输出写入内存）的耗时，三者都经由 parser.visitor.NodeVisitor 分派到各节点的处理方法。
+用法（在仓库根目录）：python -m benchmarks.visitor_bench [--functions=N] [--repeat=N]
+"""
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+
+from analyse.semantic import SemanticAnalyzer
+from codegenerator.codegen import CodeGenerator
+from lexer import Lexer
+from parser.parser import Parser
+from parser.print_ast import print_ast
+
+from .ast_memory import synthetic_program
+
+
+def print_to_memory(program):
+    with redirect_stdout(io.StringIO()):
+        print_ast(program)
+
+
+def bench(source: str, repeat: int):
+    """返回 {阶段名: 最短耗时秒数}；每次重新语法分析，避免语义分析写入的类型影响后续测量"""
+    stages = {
+        '语义分析': lambda program: SemanticAnalyzer().analyze(program),
+        '代码生成': lambda program: CodeGenerator().generate(program),
+        '打印语法树': print_to_memory,
+    }
+    tokens = Lexer(source).tokenize_array()
+    best = dict.fromkeys(stages, float('inf'))
+    for _ in range(repeat):
+        program = Parser(tokens).parse()
+        for name, stage in stages.items():
+            start = time.perf_counter()
+            stage(program)
+            best[name] = min(best[name], time.perf_counter() - start)
+    return best
+
+
+def main(argv):
+    functions = 5000
+    repeat = 3
+    for arg in argv:
+        if arg.startswith('--functions='):
+            functions = int(arg.split('=', 1)[1])
+        elif arg.startswith('--repeat='):
+            repeat = int(arg.split('=', 1)[1])
+
+    source = synthetic_program(functions)
+    print(f"合成程序: {functions} 个函数, {len(source) / (1024 * 1024):.2f} MB")
+    for name, seconds in bench(source, repeat).items():
+        print(f"{name}: {seconds * 1000:.0f} ms（{repeat} 次中最短）")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,13 +1,54 @@
+import time
+from typing import Iterator
+
+from analyse.call_graph import DeadFunctionElimination
+from analyse.semantic import SemanticAnalyzer
 from codegenerator.codegen import CodeGenerator
-from lexer import Lexer
+from codegenerator.intermediate_code import IntermediateCode
+from codegenerator.parallel import ParallelCompiler
+from lexer import Lexer, StreamLexer, Token
+from optimizer import PassManager
+from optimizer.pass_manager import instruction_count
+from parser.ast_nodes import FunctionDecl
 from parser.parser import Parser
 from parser.print_ast import print_ast
-from vm.simple_vm import run_tac_program
+from vm.profile import ExecutionProfile
+from vm.simple_vm import SimpleVM, run_tac_program
+
+
+def load_seconds(code: IntermediateCode, repeat: int = 5) -> float:
+    """虚拟机装载程序的耗时（取多次中最短的一次）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        SimpleVM().load_program(code)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report_dead_functions(eliminator: DeadFunctionElimination, full_code: IntermediateCode,
+                          ir_code: IntermediateCode) -> None:
+    """对比删除死函数前后的中间代码规模和装载耗时"""
+    print("\n=== 死函数删除 ===")
+    print(eliminator.summary())
+    print(f"中间代码: {instruction_count(full_code)} -> {instruction_count(ir_code)} 条指令")
+    print(f"装载耗时: {load_seconds(full_code) * 1000:.3f} ms -> {load_seconds(ir_code) * 1000:.3f} ms")
+
+
+def stream_tokens(source_file) -> Iterator[Token]:
+    """分块读取并逐个产生 token，读完后关闭文件"""
+    with source_file:
+        yield from StreamLexer(source_file)
+
+
 def process_file(filepath: str, args) -> None:
     """处理源代码文件"""
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            source_code = f.read()
+        if args.stream:
+            source_file = open(filepath, "r", encoding="utf-8")
+        else:
+            with open(filepath, "r", encoding="utf-8") as f:
+                source_code = f.read()
     except FileNotFoundError:
         print(f"错误: 未找到文件 '{filepath}'")
         return
@@ -15,10 +56,10 @@ def process_file(filepath: str, args) -> None:
         print(f"读取文件时出错: {e}")
         return
 
-    # 词法分析
-    lexer = Lexer(source_code)
+    # 词法分析：整个文件一次扫描成按列存储的 TokenArray（迭代时给出 Token 对象，供 -l 打印）；
+    # --stream 时分块读取文件，token 在语法分析需要时才逐个产生
     try:
-        tokens = lexer.tokenize()
+        tokens = stream_tokens(source_file) if args.stream else Lexer(source_code).tokenize_array()
         if args.l:  # -l 选项：显示词法分析结果
             print("\n=== 词法分析结果 ===")
             for token in tokens:
@@ -40,21 +81,53 @@ def process_file(filepath: str, args) -> None:
         print(f"语法分析错误: {e}")
         return
 
+    # -O1 及以上在生成代码前删除 main 不可达的函数（只依据调用关系，不需要语义分析的结果）
+    eliminator = DeadFunctionElimination()
+    live_ast = eliminator.run(ast) if args.opt_level >= 1 else ast
+    live = None if live_ast is ast else {decl.name for decl in live_ast.declarations if isinstance(decl, FunctionDecl)}
+
+    # 语义分析：检查类型并在表达式节点上记录 resolved_type
+    # --jobs=N：在 N 个进程中按函数并行完成语义分析和代码生成，之后链接各函数的中间代码
+    compiler = ParallelCompiler(args.jobs) if args.jobs > 1 else None
+    try:
+        if compiler is None:
+            SemanticAnalyzer().analyze(ast)
+        else:
+            # 统计死函数删除的效果时也要为不可达的函数生成代码
+            compiler.analyze(ast, None if args.time_passes else live)
+    except Exception as e:
+        print(f"语义分析错误: {e}")
+        return
+
     # 生成中间代码
-    code_gen = CodeGenerator()
     try:
-        ir_code = code_gen.generate(ast)
+        ir_code = CodeGenerator().generate(live_ast) if compiler is None else compiler.link(live)
+        if args.time_passes and args.opt_level >= 1:
+            full_code = CodeGenerator().generate(ast) if compiler is None else compiler.link()
+            report_dead_functions(eliminator, full_code, ir_code)
+    except Exception as e:
+        print(f"代码生成错误: {e}")
+        return
+
+    # 中间代码优化
+    try:
+        profile = ExecutionProfile.load(args.profile_use) if args.profile_use else None
+        pass_manager = PassManager.for_level(args.opt_level, print_after=args.print_after, profile=profile)
+        ir_code = pass_manager.run(ir_code)
+        if args.time_passes:
+            print("\n=== 优化统计 ===")
+            print(pass_manager.summary())
         if args.g:  # -g 选项：显示中间代码
             print("\n=== 中间代码 ===")
             print(ir_code)
             return
     except Exception as e:
-        print(f"代码生成错误: {e}")
+        print(f"优化错误: {e}")
         return
 
     # 默认执行代码
     try:
-       run_tac_program(ir_code, debug=args.debug)
+       run_tac_program(ir_code, debug=args.debug, profile_path=args.profile_generate)
     except Exception as e:
         print(f"执行错误: {e}")
 
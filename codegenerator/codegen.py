@@ -1,6 +1,37 @@
-from .intermediate_code import TACInstruction, Label, IntermediateCode
+from .intermediate_code import TEMP_PREFIX, TACInstruction, Label, IntermediateCode, encode_switch_table
+from analyse.typ import TupleType
 from parser.ast_nodes import *
-from typing import Dict, Optional
+from parser.visitor import NodeVisitor
+from typing import Dict, List, Optional, Tuple
+
+
+# 数值运算符 -> 类型特化操作码的后缀（前缀 i / f 表示操作数类型）
+NUMERIC_OPCODES = {
+    '+': 'add', '-': 'sub', '*': 'mul', '/': 'div', '%': 'mod',
+    '<': 'lt', '<=': 'le', '>': 'gt', '>=': 'ge', '==': 'eq', '!=': 'ne',
+}
+
+# 比较运算符取反，用于生成循环的退出条件
+NEGATED_COMPARISONS = {'<': '>=', '<=': '>', '>': '<=', '>=': '<', '==': '!=', '!=': '=='}
+
+# 通用比较操作码中虚拟机的 == / != 是反转的，其余比较按 arg1 OP arg2 计算
+GENERIC_COMPARISONS = {'<': '<', '<=': '<=', '>': '>', '>=': '>=', '==': '!=', '!=': '=='}
+
+# if/elif 链至少有这么多个分支时才改为 switch 跳转表
+SWITCH_MIN_CASES = 3
+
+
+def emission_order(program: Program) -> List[ASTNode]:
+    """
+    在最终生成的中间代码里：
+    1. 先生成全局(非函数)声明
+    2. 然后生成 main 函数(若存在)
+    3. 最后生成其他函数
+    """
+    global_decls = [decl for decl in program.declarations if not isinstance(decl, FunctionDecl)]
+    main_decls = [decl for decl in program.declarations if isinstance(decl, FunctionDecl) and decl.name == "main"]
+    other_funcs = [decl for decl in program.declarations if isinstance(decl, FunctionDecl) and decl.name != "main"]
+    return global_decls + main_decls[-1:] + other_funcs
 
 
 class LoopContext:
@@ -9,7 +40,11 @@ class LoopContext:
         self.start_label = start_label
         self.end_label = end_label
 
-class CodeGenerator:
+class CodeGenerator(NodeVisitor):
+    # 临时变量和标签名的前缀，后接编号
+    temp_prefix = TEMP_PREFIX
+    label_prefix = 'L'
+
     def __init__(self):
         self.code = IntermediateCode(instructions=[])
         self.temp_count = 0
@@ -22,63 +57,28 @@ class CodeGenerator:
         self.has_return = False                # 是否出现过return语句
 
     def new_temp(self) -> str:
-        temp_name = f"t{self.temp_count}"
+        temp_name = f"{self.temp_prefix}{self.temp_count}"
         self.temp_count += 1
         return temp_name
 
     def new_label(self) -> str:
-        label_name = f"L{self.label_count}"
+        label_name = f"{self.label_prefix}{self.label_count}"
         self.label_count += 1
         return label_name
 
     def generate(self, node: ASTNode) -> IntermediateCode:
         """对整个AST进行代码生成"""
         self.visit(node)
+        self.code.assign_sites()
         return self.code
 
-    def visit(self, node: ASTNode) -> Optional[str]:
-        method_name = f'visit_{type(node).__name__}'
-        visitor = getattr(self, method_name, self.generic_visit)
-        return visitor(node)
-
     def generic_visit(self, node: ASTNode) -> Optional[str]:
         raise Exception(f"No visit_{type(node).__name__} method defined")
 
     # ============== Program ==============
     def visit_Program(self, node: Program) -> Optional[str]:
-        """
-        在最终生成的中间代码里：
-        1. 先生成全局(非函数)声明
-        2. 然后生成 main 函数(若存在)
-        3. 最后生成其他函数
-        """
-        global_decls = []
-        main_decl = None
-        other_funcs = []
-
-        # 1) 分分类
-        for decl in node.declarations:
-            if isinstance(decl, FunctionDecl):
-                if decl.name == "main":
-                    main_decl = decl
-                else:
-                    other_funcs.append(decl)
-            else:
-                # 非函数声明, 如 VarDecl / ImportStatement 等
-                global_decls.append(decl)
-
-        # 2) 先 visit 所有全局声明
-        for g in global_decls:
-            self.visit(g)
-
-        # 3) 再 visit main 函数
-        if main_decl is not None:
-            self.visit(main_decl)
-
-        # 4) 最后 visit 其他函数
-        for f in other_funcs:
-            self.visit(f)
-
+        for decl in emission_order(node):
+            self.visit(decl)
         return None
 
     # ============== ImportStatement ==============
@@ -128,6 +128,8 @@ class CodeGenerator:
         self.symbol_table[var_name] = var_name
         if node.init_value:
             value = self.visit(node.init_value)
+            if node.var_type == 'float':
+                value = self.promote(value, node.init_value)
             instr = TACInstruction(opcode='assign', arg1=value, result=var_name)
             self.code.add_instruction(instr)
         return None
@@ -142,7 +144,7 @@ class CodeGenerator:
             index_val = self.visit(node.target.index)
             
             # 检查是否是元组赋值（不允许）
-            if hasattr(node.target, 'collection_type') and node.target.collection_type == 'tuple':
+            if isinstance(getattr(node.target.collection, 'resolved_type', None), TupleType):
                 raise Exception("Cannot modify tuple elements")
             
             # 数组赋值
@@ -155,6 +157,8 @@ class CodeGenerator:
             return None
         
         # 普通变量赋值
+        if self.numeric_type(node.target) == 'float':
+            value = self.promote(value, node.value)
         target = self.visit(node.target)
         self.code.add_instruction(TACInstruction(
             opcode='assign',
@@ -184,28 +188,72 @@ class CodeGenerator:
 
     # ============== BinaryOp ==============
     def visit_BinaryOp(self, node: BinaryOp) -> Optional[str]:
+        if node.operator in ('&&', '||'):
+            return self.visit_logical(node)
         left = self.visit(node.left)
         right = self.visit(node.right)
+        return self.emit_binary(node.operator, node.left, node.right, left, right)
+
+    def visit_logical(self, node: BinaryOp) -> str:
+        """短路求值的 && / ||
+        t = left
+        ifFalse t goto L_end   # && ：左侧为假时不再计算右侧（|| 使用 if t goto L_end）
+        t = right
+        Label L_end:
+        """
+        result = self.new_temp()
+        end_label = self.new_label()
+        self.code.add_instruction(TACInstruction(opcode='assign', arg1=self.visit(node.left), result=result))
+        self.code.add_instruction(TACInstruction(
+            opcode='if_false_goto' if node.operator == '&&' else 'if_goto',
+            arg1=result,
+            arg2=end_label
+        ))
+        self.code.add_instruction(TACInstruction(opcode='assign', arg1=self.visit(node.right), result=result))
+        self.code.add_instruction(Label(name=end_label))
+        return result
+
+    def emit_binary(self, operator: str, left_node: ASTNode, right_node: ASTNode,
+                    left: str, right: str) -> str:
+        """生成二元运算；两侧类型均为 int / float 时使用类型特化的操作码"""
         temp = self.new_temp()
-        
-        # 对于比较运算符，需要反转操作符
-        op_map = {
-            '<=': '>',
-            '>=': '<',
-            '<': '>=',
-            '>': '<=',
-            '==': '!=',
-            '!=': '=='
-        }
-        
-        if (node.operator in op_map):
-            instr = TACInstruction(opcode=op_map[node.operator], arg1=right, arg2=left, result=temp)
+        typed = self.typed_opcode(operator, left_node, right_node)
+        if typed is not None:
+            if typed.startswith('f'):
+                left = self.promote(left, left_node)
+                right = self.promote(right, right_node)
+            instr = TACInstruction(opcode=typed, arg1=left, arg2=right, result=temp)
+        elif operator in GENERIC_COMPARISONS:
+            instr = TACInstruction(opcode=GENERIC_COMPARISONS[operator], arg1=left, arg2=right, result=temp)
         else:
-            instr = TACInstruction(opcode=node.operator, arg1=left, arg2=right, result=temp)
-        
+            instr = TACInstruction(opcode=operator, arg1=left, arg2=right, result=temp)
         self.code.add_instruction(instr)
         return temp
 
+    def numeric_type(self, node: ASTNode) -> Optional[str]:
+        """语义分析记录的 int / float 类型名，其他类型或未分析时返回 None"""
+        resolved = getattr(node, 'resolved_type', None)
+        if resolved is not None and resolved.name in ('int', 'float'):
+            return resolved.name
+        return None
+
+    def typed_opcode(self, operator: str, left_node: ASTNode, right_node: ASTNode) -> Optional[str]:
+        kinds = (self.numeric_type(left_node), self.numeric_type(right_node))
+        if operator not in NUMERIC_OPCODES or None in kinds:
+            return None
+        if kinds == ('int', 'int'):
+            # 整数除法沿用通用的 /（虚拟机按真除法计算）
+            return None if operator == '/' else 'i' + NUMERIC_OPCODES[operator]
+        return 'f' + NUMERIC_OPCODES[operator]
+
+    def promote(self, value: str, node: ASTNode) -> str:
+        """int 值参与浮点运算或赋给 float 变量时，显式生成 itof 转换"""
+        if self.numeric_type(node) != 'int':
+            return value
+        temp = self.new_temp()
+        self.code.add_instruction(TACInstruction(opcode='itof', arg1=value, result=temp))
+        return temp
+
     # ============== UnaryOp ==============
     def visit_UnaryOp(self, node: UnaryOp) -> Optional[str]:
         if node.operator in ['++', '--']:
@@ -214,16 +262,17 @@ class CodeGenerator:
             temp = self.new_temp()
             
             # 先执行自增/自减运算
+            typed = self.numeric_type(node.operand) == 'int'
             if node.operator == '++':
                 self.code.add_instruction(TACInstruction(
-                    opcode='+',
+                    opcode='iadd' if typed else '+',
                     arg1=var,
                     arg2='1',
                     result=var
                 ))
             else:  # --
                 self.code.add_instruction(TACInstruction(
-                    opcode='-',
+                    opcode='isub' if typed else '-',
                     arg1=var,
                     arg2='1',
                     result=var
@@ -289,61 +338,107 @@ class CodeGenerator:
 
     # ============== IfStmt ==============
     def visit_IfStmt(self, node: IfStmt) -> Optional[str]:
-        """生成 if 语句的三地址码
+        """生成 if / elif / else 语句的三地址码
         t1 = condition
         if t1 goto L1  # 条件为真时跳转到 L1
-        false_body     # 条件为假时的代码
-        goto L2
+        t2 = elif_condition
+        if t2 goto L2  # 各 elif 条件依次判断
+        false_body     # 所有条件为假时的代码（else 分支）
+        goto L_end
         Label L1:
         true_body      # 条件为真时的代码
+        goto L_end
         Label L2:
+        elif_body
+        Label L_end:
+
+        同一 int 变量与多个不同整数常量比较的 if/elif 链改为生成 switch 跳转表。
         """
-        # 计算条件表达式
-        cond = self.visit(node.condition)
-        
-        # 创建标签
-        true_label = self.new_label()   # 获取标签名
-        end_label = self.new_label()    # 获取标签名
-        
-        # 生成条件跳转指令
-        self.code.add_instruction(TACInstruction(
-            opcode='if_goto',
-            arg1=cond,
-            arg2=true_label  # 直接使用标签名字符串
-        ))
-        
-        # 生成 else 分支的代码（条件为假时执行）
+        cases = self.switch_cases(node)
+        if cases is not None:
+            return self.emit_switch(node, *cases)
+
+        branches = [(node.condition, node.then_branch)] + \
+                   [(elif_branch.condition, elif_branch.body) for elif_branch in node.elif_branches]
+        end_label = self.new_label()
+
+        # 依次计算条件，为真时跳转到对应分支
+        branch_labels = []
+        for condition, _ in branches:
+            cond = self.visit(condition)
+            branch_labels.append(self.new_label())
+            self.code.add_instruction(TACInstruction(opcode='if_goto', arg1=cond, arg2=branch_labels[-1]))
+
+        # 生成 else 分支的代码（所有条件为假时执行）
         if node.else_branch:
             self.visit(node.else_branch)
-        
-        # 跳过 true 分支
-        self.code.add_instruction(TACInstruction(
-            opcode='goto',
-            arg1=end_label  # 直接使用标签名字符串
-        ))
-        
-        # 生成 true 分支的代码
-        self.code.add_instruction(Label(name=true_label))  # 创建 Label 对象
-        self.visit(node.then_branch)
-        
+        self.code.add_instruction(TACInstruction(opcode='goto', arg1=end_label))
+
+        # 生成各条件为真时的分支代码
+        for index, ((_, body), label) in enumerate(zip(branches, branch_labels)):
+            self.code.add_instruction(Label(name=label))
+            self.visit(body)
+            if index != len(branches) - 1:
+                self.code.add_instruction(TACInstruction(opcode='goto', arg1=end_label))
+
         # if 语句结束
-        self.code.add_instruction(Label(name=end_label))  # 创建 Label 对象
-        
+        self.code.add_instruction(Label(name=end_label))
         return None
 
-    # ============== ElifBranch ==============
-    def visit_ElifBranch(self, node: ElifBranch) -> Optional[str]:
-        cond_label = self.new_label()
+    def switch_cases(self, node: IfStmt) -> Optional[Tuple[Variable, List[Tuple[int, CompoundStmt]]]]:
+        """识别 if (x == c0) ... elif (x == c1) ... 形式的分支链，返回 (x, [(常量, 分支体), ...])"""
+        branches = [(node.condition, node.then_branch)] + \
+                   [(elif_branch.condition, elif_branch.body) for elif_branch in node.elif_branches]
+        if len(branches) < SWITCH_MIN_CASES:
+            return None
+        subject = None
+        cases = []
+        for condition, body in branches:
+            if not (isinstance(condition, BinaryOp) and condition.operator == '=='):
+                return None
+            for var, const in ((condition.left, condition.right), (condition.right, condition.left)):
+                if (isinstance(var, Variable) and self.numeric_type(var) == 'int'
+                        and isinstance(const, Literal) and const.type == 'int'):
+                    break
+            else:
+                return None
+            if subject is None:
+                subject = var
+            if var.name != subject.name or any(value == const.value for value, _ in cases):
+                return None
+            cases.append((const.value, body))
+        return subject, cases
+
+    def emit_switch(self, node: IfStmt, subject: Variable, cases: List[Tuple[int, CompoundStmt]]) -> None:
+        """switch x, {c0: L0, c1: L1, ...}, L_default
+        Label L_default:
+        false_body
+        goto L_end
+        Label L0:
+        body0
+        goto L_end
+        ...
+        Label L_end:
+        """
         end_label = self.new_label()
-
-        cond = self.visit(node.condition)
-        self.code.add_instruction(TACInstruction(opcode='if_goto', arg1=cond, arg2=cond_label))
-
-        # then body
-        self.visit(node.body)
-
-        self.code.add_instruction(TACInstruction(opcode='goto', arg1=end_label))
-        self.code.add_instruction(Label(name=cond_label))
+        default_label = self.new_label() if node.else_branch else end_label
+        case_labels = [self.new_label() for _ in cases]
+        table = {value: label for (value, _), label in zip(cases, case_labels)}
+        self.code.add_instruction(TACInstruction(
+            opcode='switch',
+            arg1=self.visit(subject),
+            arg2=encode_switch_table(table),
+            arg3=default_label
+        ))
+        if node.else_branch:
+            self.code.add_instruction(Label(name=default_label))
+            self.visit(node.else_branch)
+            self.code.add_instruction(TACInstruction(opcode='goto', arg1=end_label))
+        for index, ((_, body), label) in enumerate(zip(cases, case_labels)):
+            self.code.add_instruction(Label(name=label))
+            self.visit(body)
+            if index != len(cases) - 1:
+                self.code.add_instruction(TACInstruction(opcode='goto', arg1=end_label))
         self.code.add_instruction(Label(name=end_label))
         return None
 
@@ -365,38 +460,17 @@ class CodeGenerator:
 
         # condition - 需要生成退出条件
         if node.condition:
-            # 对于 i <= 10，我们需要生成 i > 10 作为退出条件
-            if isinstance(node.condition, BinaryOp):
-                # 反转比较运算符
-                op_map = {
-                    '<=': '>',
-                    '>=': '<',
-                    '<': '>=',
-                    '>': '<=',
-                    '==': '!=',
-                    '!=': '=='
-                }
-                # 交换左右操作数并反转操作符
-                if node.condition.operator in op_map:
-                    temp = self.new_temp()
-                    self.code.add_instruction(TACInstruction(
-                        opcode=op_map[node.condition.operator],
-                        arg1=self.visit(node.condition.left),  # 保持原始顺序
-                        arg2=self.visit(node.condition.right),
-                        result=temp
-                    ))
-                    cond_val = temp
-                else:
-                    cond_val = self.visit(node.condition)
+            # 对于 i <= 10，我们需要生成 i > 10 作为退出条件，条件为真时跳转到循环结束
+            condition = node.condition
+            if isinstance(condition, BinaryOp) and condition.operator in NEGATED_COMPARISONS:
+                cond_val = self.emit_binary(NEGATED_COMPARISONS[condition.operator], condition.left,
+                                            condition.right, self.visit(condition.left),
+                                            self.visit(condition.right))
+                self.code.add_instruction(TACInstruction(opcode='if_goto', arg1=cond_val, arg2=end_label))
             else:
-                cond_val = self.visit(node.condition)
-            
-            # 当条件为真时跳转到循环结束
-            self.code.add_instruction(TACInstruction(
-                opcode='if_goto',
-                arg1=cond_val,
-                arg2=end_label
-            ))
+                # 其他条件（如 && / || 或布尔变量）为假时跳转到循环结束
+                cond_val = self.visit(condition)
+                self.code.add_instruction(TACInstruction(opcode='if_false_goto', arg1=cond_val, arg2=end_label))
 
         # body
         self.visit(node.body)
@@ -448,8 +522,22 @@ class CodeGenerator:
         self.code.add_instruction(instr)
         return temp
 
+    # ============== 常量池 ==============
+    def constant_literal(self, node, kind: str) -> Optional[str]:
+        """元素全是字面量的列表/元组放入常量池，生成一条 load_const；否则返回 None"""
+        if not all(isinstance(elem, Literal) and elem.type != 'nil' for elem in node.elements):
+            return None
+        const_id = self.code.add_constant(kind, [self.visit(elem) for elem in node.elements])
+        temp = self.new_temp()
+        self.code.add_instruction(TACInstruction(opcode='load_const', arg1=const_id, result=temp))
+        return temp
+
     # ============== ListLiteral ==============
     def visit_ListLiteral(self, node: ListLiteral) -> Optional[str]:
+        constant = self.constant_literal(node, 'array')
+        if constant is not None:
+            return constant
+
         # 1. 创建一个临时变量存储列表
         list_var = self.new_temp()
         
@@ -475,6 +563,10 @@ class CodeGenerator:
 
     # ============== TupleLiteral ==============
     def visit_TupleLiteral(self, node: TupleLiteral) -> Optional[str]:
+        constant = self.constant_literal(node, 'tuple')
+        if constant is not None:
+            return constant
+
         # 1. 创建一个临时变量存储元组
         tuple_var = self.new_temp()
         
@@ -508,8 +600,8 @@ class CodeGenerator:
         temp = self.new_temp()
         
         # 3. 生成访问指令
-        # 检查变量名是否在元组存储中
-        if collection_val in self.symbol_table and collection_val.startswith('t') and collection_val in [instr.result for instr in self.code.instructions if instr.opcode == 'alloc_tuple']:
+        # 按语义分析记录的集合类型选择元组或数组访问
+        if isinstance(getattr(node.collection, 'resolved_type', None), TupleType):
             self.code.add_instruction(TACInstruction(
                 opcode='tuple_load',
                 arg1=collection_val,
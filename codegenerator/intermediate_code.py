@@ -1,10 +1,41 @@
-from dataclasses import dataclass
-from typing import Optional, List, Union
+import operator
+from dataclasses import dataclass, field
+from typing import Dict, Optional, List, Tuple, Union
 
 @dataclass
 class Label:
     name: str
 
+def encode_switch_table(table: Dict[int, str]) -> str:
+    """switch 指令的跳转表写在 arg2 中，形如 0:L1,1:L2"""
+    return ','.join(f"{value}:{label}" for value, label in table.items())
+
+
+def decode_switch_table(text: str) -> Dict[int, str]:
+    table = {}
+    for entry in text.split(','):
+        value, label = entry.split(':')
+        table[int(value)] = label
+    return table
+
+
+# 临时变量名为 TEMP_PREFIX 加编号；% 不会出现在标识符中，临时变量因此不会与用户的变量、参数同名
+TEMP_PREFIX = '%t'
+
+# 虚拟机执行与优化器常量折叠共用的操作数和运算定义
+BOOL_LITERALS = {'True': True, 'False': False}
+
+# 按 int / float 类型特化的运算（i 前缀为整数，f 前缀为浮点数），操作数按源代码顺序：
+# ilt a, b 即 a < b。类型已由语义分析保证，执行时不再做操作数检查
+_NUMERIC_OPERATIONS = {
+    'add': operator.add, 'sub': operator.sub, 'mul': operator.mul, 'mod': operator.mod,
+    'lt': operator.lt, 'le': operator.le, 'gt': operator.gt, 'ge': operator.ge,
+    'eq': operator.eq, 'ne': operator.ne,
+}
+TYPED_OPERATIONS = {prefix + name: op for prefix in ('i', 'f') for name, op in _NUMERIC_OPERATIONS.items()}
+TYPED_OPERATIONS['fdiv'] = operator.truediv
+
+
 @dataclass
 class TACInstruction:
     def __init__(self, opcode: str, arg1: Optional[str] = None, 
@@ -22,10 +53,19 @@ class TACInstruction:
             return f"goto {self.arg1}"
         elif self.opcode == 'if_goto':
             return f"if {self.arg1} goto {self.arg2}"
+        elif self.opcode == 'if_false_goto':
+            return f"ifFalse {self.arg1} goto {self.arg2}"
+        elif self.opcode == 'switch':
+            cases = ', '.join(f"{value}: {label}" for value, label in decode_switch_table(self.arg2).items())
+            return f"switch {self.arg1} [{cases}] default {self.arg3}"
         elif self.opcode == 'label':
             return f"{self.arg1}:"
         elif self.opcode == 'return':
             return f"return {self.arg1}" if self.arg1 else "return"
+        elif self.opcode == 'return_pack':
+            return f"return_pack {', '.join(self.arg1.split(','))}"
+        elif self.opcode == 'unpack':
+            return f"{self.result} = unpack {self.arg1}[{self.arg2}]"
         elif self.opcode == 'print':
             return f"print {self.arg1}"
         elif self.opcode == 'param':
@@ -34,6 +74,10 @@ class TACInstruction:
             return f"{self.result} = call {self.arg1}, {self.arg2}"
         elif self.opcode == 'assign':
             return f"{self.result} = {self.arg1}"
+        elif self.opcode == 'load_const':
+            return f"{self.result} = load_const {self.arg1}"
+        elif self.opcode == 'itof':
+            return f"{self.result} = itof {self.arg1}"
         elif self.opcode == 'alloc_array' or self.opcode == 'alloc_tuple':
             return f"{self.result} = new {self.opcode[6:]}[{self.arg1}]"
         elif self.opcode == 'array_store' or self.opcode == 'tuple_store':
@@ -43,6 +87,11 @@ class TACInstruction:
             return f"{collection_type}_store {self.arg1}[{index}] = {value}"
         elif self.opcode == 'array_load' or self.opcode == 'tuple_load':
             return f"{self.result} = {self.arg1}[{self.arg2}]"
+        elif self.opcode == 'array_store_unchecked':
+            index, value = self.arg2.split(',')
+            return f"array_store_unchecked {self.arg1}[{index}] = {value}"
+        elif self.opcode == 'array_load_unchecked' or self.opcode == 'tuple_load_unchecked':
+            return f"{self.result} = {self.arg1}[{self.arg2}] (unchecked)"
         else:
             # Binary or unary operations
             return f"{self.result} = {self.arg1} {self.opcode} {self.arg2}"
@@ -50,9 +99,47 @@ class TACInstruction:
 @dataclass
 class IntermediateCode:
     instructions: List[Union[TACInstruction, Label]]
+    # 常量池：常量标识 -> (种类 'array' / 'tuple', 各元素的字面量)
+    constants: Dict[str, Tuple[str, List[str]]] = field(default_factory=dict)
+    # 常量池的反向索引：(种类, 各元素的字面量) -> 常量标识，由 constants 构造
+    constant_ids: Dict[Tuple[str, Tuple[str, ...]], str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.constant_ids = {(kind, tuple(values)): const_id for const_id, (kind, values) in self.constants.items()}
 
     def add_instruction(self, instruction: Union[TACInstruction, Label]):
         self.instructions.append(instruction)
 
+    def add_constant(self, kind: str, values: List[str]) -> str:
+        """把只含字面量的列表/元组放入常量池，相同的常量只保存一份，返回常量标识"""
+        key = (kind, tuple(values))
+        const_id = self.constant_ids.get(key)
+        if const_id is None:
+            const_id = f"K{len(self.constants)}"
+            self.constants[const_id] = (kind, values)
+            self.constant_ids[key] = const_id
+        return const_id
+
+    def assign_sites(self):
+        """给分支、调用和跳转指令分配稳定的站点标识 site（函数名:操作码:序号）
+
+        标识只取决于源程序，同一程序每次编译得到相同的标识；优化时复制指令会保留该属性，
+        因此执行剖析记录的计数可以在再次编译时对应回原来的指令。
+        """
+        function = '<global>'
+        counters = {}
+        for instr in self.instructions:
+            if isinstance(instr, Label):
+                if hasattr(instr, 'params'):
+                    function = instr.name
+                    counters = {}
+                continue
+            if instr.opcode in ('if_goto', 'if_false_goto', 'switch', 'goto', 'call'):
+                index = counters.get(instr.opcode, 0)
+                counters[instr.opcode] = index + 1
+                instr.site = f"{function}:{instr.opcode}:{index}"
+
     def __str__(self):
-        return "\n".join(str(instr) for instr in self.instructions)
+        pool = [f"{const_id} = const {kind}[{', '.join(values)}]"
+                for const_id, (kind, values) in self.constants.items()]
+        return "\n".join(pool + [str(instr) for instr in self.instructions])
@@ -0,0 +1,200 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Collection, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from analyse.semantic import SemanticAnalyzer
+from analyse.symbol import SymbolTable
+from parser.ast_nodes import *
+from .codegen import CodeGenerator, emission_order
+from .intermediate_code import (TEMP_PREFIX, IntermediateCode, Label, TACInstruction, decode_switch_table,
+                                encode_switch_table)
+
+# 每个工作进程分到的任务块数，块越小负载越均衡，但进程间通信次数越多
+CHUNKS_PER_WORKER = 4
+
+
+class FragmentGenerator(CodeGenerator):
+    """生成代码段的 CodeGenerator：标签名也带上标识符中不会出现的 %，链接时按名字改写不会误改用户变量"""
+    label_prefix = '%L'
+
+
+class Fragment(NamedTuple):
+    """一段独立生成的中间代码，临时变量和标签分别命名为 %t0、%t1… 和 %L0、%L1…
+
+    指令以元组保存：标签为 (None, 名字, 形参列表或 None)，其余为 (opcode, arg1, arg2, arg3, result)。
+    元组在进程间传递比指令对象快得多，链接时重新编号后再构造指令对象。
+    """
+    instructions: List[tuple]
+    constants: Dict[str, Tuple[str, List[str]]]
+    temp_count: int
+    label_count: int
+
+
+def pack(generator: FragmentGenerator) -> Fragment:
+    instructions = [(None, instr.name, getattr(instr, 'params', None)) if isinstance(instr, Label)
+                    else (instr.opcode, instr.arg1, instr.arg2, instr.arg3, instr.result)
+                    for instr in generator.code.instructions]
+    return Fragment(instructions, generator.code.constants, generator.temp_count, generator.label_count)
+
+
+# ============== 工作进程 ==============
+# 由 init_worker 设置：所有函数声明、需要生成代码的函数名以及登记了全局符号的语义分析器
+_functions: List[FunctionDecl] = []
+_generate: Optional[Collection[str]] = None
+_analyzer: Optional[SemanticAnalyzer] = None
+
+
+def init_worker(functions: List[FunctionDecl], generate: Optional[Collection[str]], global_scope: SymbolTable):
+    global _functions, _generate, _analyzer
+    _functions = functions
+    _generate = generate
+    _analyzer = SemanticAnalyzer()
+    _analyzer.global_scope = _analyzer.current_scope = global_scope
+
+
+def compile_functions(start: int, stop: int) -> List[Tuple[Optional[Exception], Union[Fragment, Exception, None]]]:
+    """语义分析 _functions[start:stop]，并为需要的函数各自生成一段中间代码
+
+    每个函数的结果为 (语义错误, 代码段或代码生成错误)；错误不在这里抛出，
+    由主进程按函数顺序先报告语义错误，再报告代码生成错误，与整体编译一致。
+    """
+    results = []
+    for decl in _functions[start:stop]:
+        try:
+            _analyzer.analyze(decl)
+        except Exception as e:
+            results.append((e, None))
+            continue
+        if _generate is not None and decl.name not in _generate:
+            results.append((None, None))
+            continue
+        generator = FragmentGenerator()
+        try:
+            generator.visit(decl)
+        except Exception as e:
+            results.append((None, e))
+            continue
+        results.append((None, pack(generator)))
+    return results
+
+
+# ============== 链接 ==============
+# 操作数由逗号分隔的多个部分组成的指令：存储指令的 arg2 为 "index,value"，return_pack 的 arg1 为 "v0,v1,..."
+SPLIT_ARG1 = ('return_pack',)
+SPLIT_ARG2 = ('array_store', 'tuple_store')
+
+
+def unpack(instr: tuple, names: Dict[str, str], constants: Dict[str, str]) -> Union[TACInstruction, Label]:
+    """由元组构造指令，临时变量和标签按 names、load_const 的常量标识按 constants 改为链接后的名字
+
+    names 中只有代码段的 %tN / %LN，用户变量、字符串常量等其余操作数查不到，保持不变。
+    """
+    opcode = instr[0]
+    if opcode is None:
+        _, name, params = instr
+        if params is None:
+            return Label(names.get(name, name))
+        label = Label(name)  # 函数入口标签就是函数名
+        label.params = params
+        return label
+    _, arg1, arg2, arg3, result = instr
+    if not names:
+        if opcode == 'load_const':
+            arg1 = constants[arg1]
+        return TACInstruction(opcode, arg1, arg2, arg3, result)
+    get = names.get
+    if opcode == 'load_const':
+        arg1 = constants[arg1]
+    elif opcode in SPLIT_ARG1:
+        arg1 = ','.join([get(part, part) for part in arg1.split(',')])
+    elif opcode != 'call':  # call 的 arg1 是函数名
+        arg1 = get(arg1, arg1)
+    if opcode == 'switch':
+        table = decode_switch_table(arg2)
+        arg2 = encode_switch_table({value: get(label, label) for value, label in table.items()})
+    elif opcode in SPLIT_ARG2:
+        arg2 = ','.join([get(part, part) for part in arg2.split(',')])
+    else:
+        arg2 = get(arg2, arg2)
+    return TACInstruction(opcode, arg1, arg2, get(arg3, arg3), get(result, result))
+
+
+def link(fragments: List[Fragment]) -> IntermediateCode:
+    """按顺序拼接各代码段：临时变量和标签依次接着前面的编号，常量池合并去重
+
+    得到的中间代码与 CodeGenerator 按同样顺序一次生成的完全相同。
+    """
+    code = IntermediateCode(instructions=[])
+    temp_base = label_base = 0
+    for fragment in fragments:
+        constants = {const_id: code.add_constant(kind, values)
+                     for const_id, (kind, values) in fragment.constants.items()}
+        names = {f"{TEMP_PREFIX}{n}": f"{TEMP_PREFIX}{temp_base + n}" for n in range(fragment.temp_count)}
+        names.update((f"{FragmentGenerator.label_prefix}{n}", f"{CodeGenerator.label_prefix}{label_base + n}")
+                     for n in range(fragment.label_count))
+        code.instructions.extend(unpack(instr, names, constants) for instr in fragment.instructions)
+        temp_base += fragment.temp_count
+        label_base += fragment.label_count
+    code.assign_sites()
+    return code
+
+
+# ============== 主进程 ==============
+class ParallelCompiler:
+    """按函数并行地完成语义分析和代码生成
+
+    主进程先登记所有顶层函数的签名并分析其余的全局声明，再把函数分块交给 jobs 个工作进程；
+    每个函数在工作进程中用各自的 FragmentGenerator 生成一段中间代码（临时变量和标签各自从 0 编号），
+    最后由 link 按 CodeGenerator.visit_Program 的顺序重新编号并拼接成一个 IntermediateCode。
+    函数声明和全局符号表在创建工作进程时传入（fork 时直接继承），任务只传递函数的下标范围。
+    """
+    def __init__(self, jobs: int):
+        self.jobs = jobs
+        self.global_decls: List[ASTNode] = []           # 在主进程中生成代码的全局声明
+        self.fragments: Dict[str, Fragment] = {}        # 函数名 -> 代码段
+        self.order: List[str] = []                      # 函数代码段的链接顺序
+        self.errors: Dict[str, Exception] = {}          # 函数名 -> 代码生成错误
+
+    def analyze(self, program: Program, generate: Optional[Collection[str]] = None):
+        """语义分析整个程序并为 generate 中的函数（None 表示全部）生成代码
+
+        语义错误按函数在源程序中的顺序抛出第一个；代码生成错误留到 link 时按链接顺序抛出。
+        """
+        analyzer = SemanticAnalyzer()
+        functions = [decl for decl in program.declarations if isinstance(decl, FunctionDecl)]
+        analyzer.declare_functions(functions)
+        global_decls = [decl for decl in program.declarations if not isinstance(decl, FunctionDecl)]
+        for decl in global_decls:
+            analyzer.analyze(decl)
+
+        chunk = max(len(functions) // (self.jobs * CHUNKS_PER_WORKER), 1)
+        bounds = range(0, len(functions), chunk)
+        with ProcessPoolExecutor(self.jobs, initializer=init_worker,
+                                 initargs=(functions, generate, analyzer.global_scope)) as executor:
+            parts = list(executor.map(compile_functions, bounds, [start + chunk for start in bounds]))
+
+        self.fragments = {}
+        self.errors = {}
+        for decl, (semantic_error, result) in zip(functions, (result for part in parts for result in part)):
+            if semantic_error is not None:
+                raise semantic_error
+            if isinstance(result, Fragment):
+                self.fragments[decl.name] = result
+            elif result is not None:
+                self.errors[decl.name] = result
+        self.order = [decl.name for decl in emission_order(program) if isinstance(decl, FunctionDecl)]
+        self.global_decls = global_decls
+
+    def link(self, functions: Optional[Collection[str]] = None) -> IntermediateCode:
+        """链接全局声明和 functions 中的函数（None 表示所有生成了代码的函数）"""
+        generator = FragmentGenerator()
+        for decl in self.global_decls:
+            generator.visit(decl)
+        fragments = [pack(generator)]
+        for name in self.order:
+            if functions is not None and name not in functions:
+                continue
+            if name in self.errors:
+                raise self.errors[name]
+            if name in self.fragments:
+                fragments.append(self.fragments[name])
+        return link(fragments)
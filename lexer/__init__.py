@@ -1,8 +1,14 @@
 from .lexer import Lexer
+from .position import LineIndex
+from .stream import StreamLexer
 from .token import Token, TokenType
+from .token_array import TokenArray
 
 __all__ = [
     'Lexer',
+    'LineIndex',
+    'StreamLexer',
     'Token',
+    'TokenArray',
     'TokenType',
 ]
@@ -1,49 +1,70 @@
-from .token import CUSTOM_KEYWORDS, Token,TokenType,get_token
+from typing import Iterator, Optional
+
+from .position import LineIndex
+from .token import KEYWORD_TYPES, KIND_TYPES, TOKEN_REGEX, Token, TokenType
+from .token_array import CODE_BY_TYPE, TokenArray
+
+
 class Lexer:
-    def __init__(self, code):
+    def __init__(self, code, lines: Optional[LineIndex] = None):
         self.code = code
-        self.pos = 0
-        self.line = 1
-        self.column = 1
-        self.length = len(code)
-    
+        # 增量分析时传入已有的 LineIndex，新旧 token 共用同一个行首表
+        self.lines = LineIndex(code) if lines is None else lines
+
+    def iter_tokens(self, start: int = 0) -> Iterator[Token]:
+        """用 finditer 一次扫描全文：按分组名查表得到 token 类型，标识符再查关键字表
+
+        token 只记录起始偏移，行号和列号在需要时才由 self.lines 计算。
+        start 为开始扫描的偏移（增量词法分析从某个 token 的开头重新扫描），
+        之前的字符仍作为 \\b 的上下文。
+        """
+        lines = self.lines
+        kind_types = KIND_TYPES
+        keyword_types = KEYWORD_TYPES
+        identifier = TokenType.IDENTIFIER
+        for mo in TOKEN_REGEX.finditer(self.code, start):
+            token_type = kind_types[mo.lastgroup]
+            if token_type is None:
+                continue
+            value = mo.group()
+            if token_type is identifier:
+                token_type = keyword_types.get(value, identifier)
+            yield Token(token_type, value, mo.start(), lines)
+        yield Token(TokenType.EOF, '', len(self.code), lines)
+
     def tokenize(self):
-        tokens = []
-        mo = get_token(self.code)
-        while mo is not None:
-            kind = mo.lastgroup
-            value = mo.group(kind)
-            if kind == 'NEWLINE':
-                self.line += 1
-                self.column = 1
-            elif kind == 'SKIP':
-                pass
-            elif kind == 'COMMENT':
-                tokens.append(Token(TokenType.COMMENT, value, self.line, self.column))
-            elif kind == 'IDENTIFIER':
-                if value in CUSTOM_KEYWORDS:
-                    if value in {'true', 'false'}:
-                        tokens.append(Token(TokenType.BOOLEAN_LITERAL, value, self.line, self.column))
-                    else:
-                        tokens.append(Token(TokenType.KEYWORD, value, self.line, self.column))
-                else:
-                    tokens.append(Token(TokenType.IDENTIFIER, value, self.line, self.column))
-            elif kind == 'BOOLEAN_LITERAL':
-                tokens.append(Token(TokenType.BOOLEAN_LITERAL, value, self.line, self.column))
-            elif kind == 'INTEGER_LITERAL':
-                tokens.append(Token(TokenType.INTEGER_LITERAL, value, self.line, self.column))
-            elif kind == 'FLOAT_LITERAL':
-                tokens.append(Token(TokenType.FLOAT_LITERAL, value, self.line, self.column))
-            elif kind == 'STRING_LITERAL':
-                tokens.append(Token(TokenType.STRING_LITERAL, value, self.line, self.column))
-            elif kind == 'OPERATOR':
-                tokens.append(Token(TokenType.OPERATOR, value, self.line, self.column))
-            elif kind == 'MISMATCH':
-                tokens.append(Token(TokenType.ERROR, value, self.line, self.column))
-            self.pos = mo.end()
-            self.column += mo.end() - mo.start()
-            mo = get_token(self.code, self.pos)
-        tokens.append(Token(TokenType.EOF, '', self.line, self.column))
+        return list(self.iter_tokens())
+
+    def tokenize_array(self) -> TokenArray:
+        """与 iter_tokens 相同的扫描，结果按列写入 TokenArray，不创建 Token 对象"""
+        tokens = TokenArray(self.lines)
+        add_type = tokens.types.append
+        add_start = tokens.starts.append
+        add_end = tokens.ends.append
+        add_value = tokens.value_ids.append
+        value_index = tokens.value_index
+        code_by_kind = {kind: None if token_type is None else CODE_BY_TYPE[token_type]
+                        for kind, token_type in KIND_TYPES.items()}
+        code_by_keyword = {word: CODE_BY_TYPE[token_type] for word, token_type in KEYWORD_TYPES.items()}
+        identifier = CODE_BY_TYPE[TokenType.IDENTIFIER]
+        for mo in TOKEN_REGEX.finditer(self.code):
+            type_code = code_by_kind[mo.lastgroup]
+            if type_code is None:
+                continue
+            value = mo.group()
+            if type_code == identifier:
+                type_code = code_by_keyword.get(value, identifier)
+            value_id = value_index.get(value)
+            if value_id is None:
+                value_id = tokens.intern(value)
+            add_type(type_code)
+            add_start(mo.start())
+            add_end(mo.end())
+            add_value(value_id)
+        add_type(CODE_BY_TYPE[TokenType.EOF])
+        add_start(len(self.code))
+        add_end(len(self.code))
+        add_value(tokens.intern(''))
         return tokens
 
 # 示例代码
@@ -53,4 +74,4 @@ if __name__ == "__main__":
     lexer = Lexer(sample_code)
     tokens = lexer.tokenize()
     for token in tokens:
-        print(token)
\ No newline at end of file
+        print(token)
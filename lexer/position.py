@@ -0,0 +1,42 @@
+import re
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+NEWLINE = re.compile(r'\n')
+
+
+class LineIndex:
+    """源代码的行首偏移表，用于按需把字符偏移换算为行号和列号
+
+    词法分析时 token 只记录偏移；只有报错或打印 token 时才需要行列号，
+    因此行首表在第一次查询时才建立，之后每次查询是一次二分查找。
+    流式词法分析时 code 只是源文件的一段：base 为其首字符在整个文件中的偏移，
+    first_line / first_column 为该字符的行列号。
+    """
+    __slots__ = ('code', 'base', 'first_line', 'first_column', '_starts')
+
+    def __init__(self, code: str, base: int = 0, first_line: int = 1, first_column: int = 1):
+        self.code = code
+        self.base = base
+        self.first_line = first_line
+        self.first_column = first_column
+        self._starts: Optional[List[int]] = None
+
+    def update(self, code: str) -> None:
+        """源代码被编辑后换成新的代码，行首表在下次查询时重新建立"""
+        self.code = code
+        self._starts = None
+
+    @property
+    def starts(self) -> List[int]:
+        if self._starts is None:
+            self._starts = [0] + [mo.end() for mo in NEWLINE.finditer(self.code)]
+        return self._starts
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """偏移 -> (行号, 列号)，均从 1 开始"""
+        local = offset - self.base
+        line = bisect_right(self.starts, local)
+        if line == 1:
+            return self.first_line, self.first_column + local
+        return self.first_line + line - 1, local - self.starts[line - 1] + 1
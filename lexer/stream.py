@@ -0,0 +1,72 @@
+from typing import Iterator, TextIO
+
+from .position import LineIndex
+from .token import KEYWORD_TYPES, KIND_TYPES, TOKEN_REGEX, Token, TokenType
+
+# 单独出现时可能只是更长 token 的开头：/ 后接 * 是未读完的块注释，引号是未读完的字符串
+UNFINISHED_STARTS = {'"', "'"}
+
+
+class StreamLexer:
+    """分块读取源文件、逐个产生 token 的词法分析器
+
+    每次从 stream 读 chunk_size 个字符，与上一块尚未确定的尾部拼接后扫描。
+    除块注释和字符串外，token 不会跨过空白，因此遇到空白时，之前的 token 都已确定，
+    可以产生出去；最后一段空白之后的 token 可能因读到块末而切分不同，留到下一块重新扫描。
+    未读完的块注释（/ 后接 *）和字符串（单独的引号）同样留到下一块。
+    重新扫描时保留前一个字符作为上下文，使 \\b 的判断与整体扫描一致。
+
+    token 的偏移是在整个文件中的字符偏移，行列号由每块各自的 LineIndex 计算，
+    因此内存占用取决于块大小和解析器的前瞻，而不是文件大小。
+    """
+    def __init__(self, stream: TextIO, chunk_size: int = 1 << 16):
+        self.stream = stream
+        self.chunk_size = chunk_size
+
+    def __iter__(self) -> Iterator[Token]:
+        kind_types = KIND_TYPES
+        keyword_types = KEYWORD_TYPES
+        identifier = TokenType.IDENTIFIER
+        text = ''        # 待扫描的文本：上一块的尾部 + 新读入的块
+        base = 0         # text[0] 在文件中的偏移
+        start = 0        # text 中开始扫描的位置（之前的字符只作为 \\b 的上下文）
+        line, column = 1, 1
+        while True:
+            chunk = self.stream.read(self.chunk_size)
+            at_eof = not chunk
+            text += chunk
+            lines = LineIndex(text, base, line, column)
+            pending = []  # 最后一段空白之后的 token
+            resume = len(text)
+            for mo in TOKEN_REGEX.finditer(text, start):
+                token_type = kind_types[mo.lastgroup]
+                if token_type is None:
+                    yield from pending
+                    pending.clear()
+                    continue
+                if not at_eof and self.unfinished(mo, text):
+                    resume = mo.start()
+                    break
+                value = mo.group()
+                if token_type is identifier:
+                    token_type = keyword_types.get(value, identifier)
+                pending.append(Token(token_type, value, base + mo.start(), lines))
+            if at_eof:
+                yield from pending
+                yield Token(TokenType.EOF, '', base + len(text), lines)
+                return
+            if pending:
+                resume = pending[0].offset - base
+            keep = max(resume - 1, 0)
+            line, column = lines.position(base + keep)
+            base += keep
+            start = resume - keep
+            text = text[keep:]
+
+    @staticmethod
+    def unfinished(mo, text: str) -> bool:
+        end = mo.end()
+        if end == len(text):
+            return True
+        value = mo.group()
+        return (value == '/' and text[end] == '*') or value in UNFINISHED_STARTS
@@ -48,36 +48,61 @@ escaped_operators = [re.escape(op) for op in CUSTOM_OPERATORS]
 OPERATORS_REGEX = '|'.join(escaped_operators)
 
 # 正则表达式模式
+# 最常见的空白和标识符放在最前面；注释须在运算符 / 之前，浮点数须在整数和运算符 . 之前。
+# true / false 按标识符匹配，再由 KEYWORD_TYPES 归为布尔常量
 TOKEN_SPECIFICATION = [
+    ('SKIP',            r'[ \t\r\n]+'),  # 跳过空白字符（行列号由 LineIndex 按偏移计算）
+    ('IDENTIFIER',      r'\b[A-Za-z_][A-Za-z0-9_]*\b'),
     ('COMMENT',         r'//.*|/\*[\s\S]*?\*/'),  # 单行和多行注释
     ('STRING_LITERAL',  r'"(\\.|[^"\\])*"|\'(\\.|[^\'\\])*\''),
     ('FLOAT_LITERAL',   r'\b\d+\.\d*([eE][+-]?\d+)?\b|\b\d*\.\d+([eE][+-]?\d+)?\b'),
     ('INTEGER_LITERAL', r'\b\d+\b'),
-    ('BOOLEAN_LITERAL', r'\b(true|false)\b'),
-    ('IDENTIFIER',      r'\b[A-Za-z_][A-Za-z0-9_]*\b'),
     ('OPERATOR',        OPERATORS_REGEX),
-    ('NEWLINE',         r'\n'),  # 行结束
-    ('SKIP',            r'[ \t\r]+'),  # 跳过空白字符
     ('MISMATCH',        r'.'),  # 任何不匹配的字符
 ]
 
 # 编译正则表达式
 tok_regex = '|'.join('(?P<%s>%s)' % pair for pair in TOKEN_SPECIFICATION)
 try:
-    get_token = re.compile(tok_regex).match
+    TOKEN_REGEX = re.compile(tok_regex)
 except re.error as e:
     print(f"正则表达式编译错误: {e}")
     exit(1)
 
+# 正则分组名 -> token 类型；None 表示丢弃
+KIND_TYPES = {
+    'COMMENT': TokenType.COMMENT,
+    'STRING_LITERAL': TokenType.STRING_LITERAL,
+    'FLOAT_LITERAL': TokenType.FLOAT_LITERAL,
+    'INTEGER_LITERAL': TokenType.INTEGER_LITERAL,
+    'IDENTIFIER': TokenType.IDENTIFIER,
+    'OPERATOR': TokenType.OPERATOR,
+    'SKIP': None,
+    'MISMATCH': TokenType.ERROR,
+}
+
+# 标识符中的关键字 -> token 类型（true / false 是布尔常量）
+KEYWORD_TYPES = {word: TokenType.BOOLEAN_LITERAL if word in ('true', 'false') else TokenType.KEYWORD
+                 for word in CUSTOM_KEYWORDS}
+
+
 class Token:
-    def __init__(self, type, value, line, column):
+    """词法单元：只保存在源代码中的字符偏移，行号和列号按需由 LineIndex 计算"""
+    __slots__ = ('type', 'value', 'offset', 'lines')
+
+    def __init__(self, type, value, offset, lines):
         self.type = type
         self.value = value
-        self.line = line
-        self.column = column
-    
-    def __repr__(self):
-        return f'Token<{self.type.name}, {repr(self.value)}, Line:{self.line}, Column:{self.column}>'
+        self.offset = offset
+        self.lines = lines
 
+    @property
+    def line(self):
+        return self.lines.position(self.offset)[0]
 
+    @property
+    def column(self):
+        return self.lines.position(self.offset)[1]
 
+    def __repr__(self):
+        return f'Token<{self.type.name}, {repr(self.value)}, Line:{self.line}, Column:{self.column}>'
@@ -0,0 +1,59 @@
+from array import array
+from typing import Dict, Iterator, List
+
+from .position import LineIndex
+from .token import Token, TokenType
+
+# token 类型 <-> 类型码（TokenType 的定义顺序）
+TYPE_BY_CODE: List[TokenType] = list(TokenType)
+CODE_BY_TYPE: Dict[TokenType, int] = {token_type: code for code, token_type in enumerate(TYPE_BY_CODE)}
+
+
+class TokenArray:
+    """按列存储的 token 序列：类型码、起止偏移和值在字符串表中的下标各占一个数组
+
+    每个 token 只占 13 字节（1 字节类型码 + 3 个 4 字节整数），相同的值（标识符、运算符、
+    关键字等）在字符串表中只存一份。Token 对象只在按下标读取或迭代时才创建，
+    供 -l 打印和语法分析器的当前 token 使用。
+    """
+    __slots__ = ('lines', 'types', 'starts', 'ends', 'value_ids', 'values', 'value_index')
+
+    def __init__(self, lines: LineIndex):
+        self.lines = lines
+        self.types = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.value_ids = array('I')
+        self.values: List[str] = []                 # 字符串表
+        self.value_index: Dict[str, int] = {}       # 值 -> 在字符串表中的下标
+
+    def intern(self, value: str) -> int:
+        """值在字符串表中的下标，第一次出现时加入字符串表"""
+        value_id = self.value_index.get(value)
+        if value_id is None:
+            value_id = self.value_index[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def type_at(self, index: int) -> TokenType:
+        return TYPE_BY_CODE[self.types[index]]
+
+    def value_at(self, index: int) -> str:
+        return self.values[self.value_ids[index]]
+
+    def token(self, index: int) -> Token:
+        """第 index 个 token 的 Token 对象"""
+        return Token(TYPE_BY_CODE[self.types[index]], self.values[self.value_ids[index]],
+                     self.starts[index], self.lines)
+
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self.types)):
+            yield self.token(index)
+
+    def nbytes(self) -> int:
+        """各数组占用的字节数（不含字符串表）"""
+        return sum(column.itemsize * len(column)
+                   for column in (self.types, self.starts, self.ends, self.value_ids))
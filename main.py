@@ -8,15 +8,31 @@ if __name__ == "__main__":
         print("  -g    显示生成的中间代码")
         print("  -l    显示词法分析结果")
         print("  --debug 启用调试模式")
+        print("  --stream 分块读取源文件，边词法分析边语法分析")
+        print("  --jobs=N 用 N 个进程按函数并行完成语义分析和代码生成")
+        print("  -O0|-O1|-O2|-O3      选择中间代码优化级别（默认 -O0）")
+        print("  --print-after=<pass> 输出指定优化 pass 之后的中间代码")
+        print("  --time-passes        输出各优化 pass 删除的指令数和耗时")
+        print("  --profile-generate=<文件> 执行时记录分支、调用和循环计数并写入文件")
+        print("  --profile-use=<文件>      按记录的执行剖析指导优化")
         sys.exit(1)
 
     # 创建命令行参数对象
     class Args:
-        def __init__(self, a=False, g=False, l=False, debug=False):
+        def __init__(self, a=False, g=False, l=False, debug=False,
+                     opt_level=0, print_after=None, time_passes=False,
+                     profile_generate=None, profile_use=None, stream=False, jobs=1):
             self.a = a
             self.g = g
             self.l = l
             self.debug = debug
+            self.opt_level = opt_level
+            self.print_after = print_after
+            self.time_passes = time_passes
+            self.profile_generate = profile_generate
+            self.profile_use = profile_use
+            self.stream = stream
+            self.jobs = jobs
 
     # 解析命令行参数
     args = Args()
@@ -28,6 +44,13 @@ if __name__ == "__main__":
             elif arg == '-g': args.g = True
             elif arg == '-l': args.l = True
             elif arg == '--debug': args.debug = True
+            elif arg == '--stream': args.stream = True
+            elif arg.startswith('--jobs='): args.jobs = int(arg.split('=', 1)[1])
+            elif arg in ('-O0', '-O1', '-O2', '-O3'): args.opt_level = int(arg[2])
+            elif arg.startswith('--print-after='): args.print_after = arg.split('=', 1)[1]
+            elif arg == '--time-passes': args.time_passes = True
+            elif arg.startswith('--profile-generate='): args.profile_generate = arg.split('=', 1)[1]
+            elif arg.startswith('--profile-use='): args.profile_use = arg.split('=', 1)[1]
         else:
             filename = arg
 
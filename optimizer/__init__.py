@@ -0,0 +1,27 @@
+from .bounds_check import BoundsCheckElimination
+from .call_graph import CallGraph
+from .constant_propagation import ConstantPropagation
+from .inline import Inliner
+from .layout import BlockLayout
+from .pass_manager import PASSES, PIPELINES, PassManager
+from .regalloc import LinearScanAllocator
+from .scalar_replace import ScalarReplacement
+from .specialize import Specializer
+from .strength_reduction import StrengthReduction
+from .unroll import LoopUnroller
+
+__all__ = [
+    'BlockLayout',
+    'BoundsCheckElimination',
+    'CallGraph',
+    'ConstantPropagation',
+    'Inliner',
+    'LinearScanAllocator',
+    'LoopUnroller',
+    'PASSES',
+    'PIPELINES',
+    'PassManager',
+    'ScalarReplacement',
+    'Specializer',
+    'StrengthReduction',
+]
@@ -0,0 +1,140 @@
+import copy
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from codegenerator.intermediate_code import TACInstruction, Label, IntermediateCode
+from .tac_utils import (UNCHECKED_ACCESS, Instruction, constant_value, find_loops, instr_def, is_function_label,
+                        is_int_constant, is_variable, rebuild, split_functions)
+from .unroll import RELATIONS, SWAPPED, CountedLoop, LoopUnroller
+
+# 集合的种类（alloc_array / alloc_tuple）与长度
+Collection = Tuple[str, int]
+
+# 退出条件 var OP bound 为假时（即仍在循环内）var 满足的关系
+CONTINUE_RELATION = {'>=': '<', '>': '<=', '<=': '>', '<': '>='}
+
+
+class BoundsCheckElimination:
+    """基于区间分析的越界检查消除
+
+    集合长度：名字在整个程序中的每个定义都是常量长度的 alloc_array / alloc_tuple、
+    常量池中的列表/元组，或者是从这样的名字复制而来（形参、读取结果等一律视为未知）。
+    下标范围：整数常量；或计数循环体内的循环变量，其范围由常量初值、步长方向和
+    常量退出条件确定。能证明 0 <= 下标 < 长度 的 array_load / array_store / tuple_load
+    改为不做检查的 *_unchecked 版本。
+
+    tuple_load 只在语义分析确定集合为元组时生成，而 SemanticAnalyzer.visit_IndexAccess
+    已要求元组下标是常量并按元组类型检查过范围，因此常量下标的 tuple_load 总是安全的。
+    """
+    name = 'bounds-check'
+
+    def __init__(self):
+        self.loops = LoopUnroller()
+
+    def run(self, code: IntermediateCode) -> IntermediateCode:
+        collections = self.collection_sizes(code.instructions, code.constants)
+        instructions: List[Instruction] = []
+        for start, end in split_functions(code.instructions):
+            func = code.instructions[start:end]
+            ranges = self.index_ranges(func)
+            for position, instr in enumerate(func):
+                if self.in_bounds(instr, collections, ranges.get(position, {})):
+                    instr = copy.copy(instr)
+                    instr.opcode = UNCHECKED_ACCESS[instr.opcode]
+                instructions.append(instr)
+        return rebuild(code, instructions)
+
+    # ============== 集合长度 ==============
+    def collection_sizes(self, instructions: List[Instruction],
+                         constants: Dict[str, Tuple[str, List[str]]]) -> Dict[str, Collection]:
+        params = {param for instr in instructions if is_function_label(instr) for param in instr.params}
+        sources: Dict[str, list] = defaultdict(list)  # 名字 -> 各定义的 (种类, 长度) 或被复制的名字
+        for instr in instructions:
+            name = instr_def(instr)
+            if name is None:
+                continue
+            if instr.opcode in ('alloc_array', 'alloc_tuple') and is_int_constant(instr.arg1):
+                sources[name].append((instr.opcode[6:], constant_value(instr.arg1)))
+            elif instr.opcode == 'load_const':
+                kind, values = constants[instr.arg1]
+                sources[name].append((kind, len(values)))
+            elif instr.opcode == 'assign' and is_variable(instr.arg1):
+                sources[name].append(instr.arg1)
+            else:
+                sources[name].append(None)
+
+        resolved: Dict[str, Optional[Collection]] = {}
+
+        def resolve(name: str) -> Optional[Collection]:
+            if name in resolved:
+                return resolved[name]
+            resolved[name] = None  # 复制链成环时视为未知
+            if name in params or name not in sources:
+                return None
+            kinds = set()
+            size = None
+            for source in sources[name]:
+                collection = resolve(source) if isinstance(source, str) else source
+                if collection is None:
+                    return None
+                kinds.add(collection[0])
+                size = collection[1] if size is None else min(size, collection[1])
+            if len(kinds) != 1:
+                return None
+            resolved[name] = (kinds.pop(), size)
+            return resolved[name]
+
+        return {name: collection for name in sources
+                for collection in [resolve(name)] if collection is not None}
+
+    # ============== 下标范围 ==============
+    def index_ranges(self, func: List[Instruction]) -> Dict[int, Dict[str, Tuple[int, int]]]:
+        """指令位置 -> {循环变量: (最小值, 最大值)}"""
+        ranges: Dict[int, Dict[str, Tuple[int, int]]] = defaultdict(dict)
+        for loop in find_loops(func, 0, len(func)):
+            counted = self.loops.match(func, loop)
+            if counted is None:
+                continue
+            bounds = self.variable_range(func[loop.header + 1], counted)
+            if bounds is None:
+                continue
+            body_start = loop.header + 3
+            for position in range(body_start, body_start + len(counted.body)):
+                ranges[position][counted.var] = bounds
+        return ranges
+
+    def variable_range(self, test: TACInstruction, counted: CountedLoop) -> Optional[Tuple[int, int]]:
+        """循环体内 var 的取值范围：一端是初值，另一端由退出条件给出"""
+        opcode = RELATIONS.get(test.opcode)
+        if opcode not in CONTINUE_RELATION:
+            return None
+        if test.arg1 == counted.var:
+            bound = constant_value(test.arg2)
+        else:
+            bound = constant_value(test.arg1)
+            opcode = SWAPPED[opcode]
+        relation = CONTINUE_RELATION[opcode]
+        if counted.step > 0 and relation in ('<', '<='):
+            return counted.start, bound - 1 if relation == '<' else bound
+        if counted.step < 0 and relation in ('>', '>='):
+            return bound + 1 if relation == '>' else bound, counted.start
+        return None
+
+    def index_range(self, index: str, ranges: Dict[str, Tuple[int, int]]) -> Optional[Tuple[int, int]]:
+        if is_int_constant(index):
+            value = constant_value(index)
+            return value, value
+        return ranges.get(index)
+
+    def in_bounds(self, instr: Instruction, collections: Dict[str, Collection],
+                  ranges: Dict[str, Tuple[int, int]]) -> bool:
+        if isinstance(instr, Label) or instr.opcode not in UNCHECKED_ACCESS:
+            return False
+        if instr.opcode == 'tuple_load':
+            return is_int_constant(instr.arg2) and constant_value(instr.arg2) >= 0
+        index = instr.arg2.split(',')[0] if instr.opcode == 'array_store' else instr.arg2
+        collection = collections.get(instr.arg1)
+        bounds = self.index_range(index, ranges)
+        if collection is None or collection[0] != 'array' or bounds is None:
+            return False
+        return 0 <= bounds[0] and bounds[1] < collection[1]
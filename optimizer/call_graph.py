@@ -0,0 +1,34 @@
+from typing import Dict, List, Set, Tuple
+
+from codegenerator.intermediate_code import TACInstruction
+from .tac_utils import Instruction, is_function_label, split_functions
+
+
+class CallGraph:
+    """三地址码层面的调用图：函数名 -> 被调用的函数名集合（不含库函数）"""
+    def __init__(self, instructions: List[Instruction]):
+        self.functions: Dict[str, Tuple[int, int]] = {}
+        for start, end in split_functions(instructions):
+            if is_function_label(instructions[start]):
+                self.functions[instructions[start].name] = (start, end)
+
+        self.callees: Dict[str, Set[str]] = {name: set() for name in self.functions}
+        for name, (start, end) in self.functions.items():
+            for instr in instructions[start:end]:
+                if isinstance(instr, TACInstruction) and instr.opcode == 'call' and instr.arg1 in self.functions:
+                    self.callees[name].add(instr.arg1)
+
+    def reachable_from(self, name: str) -> Set[str]:
+        """name 直接或间接调用到的所有函数"""
+        seen: Set[str] = set()
+        stack = list(self.callees.get(name, ()))
+        while stack:
+            callee = stack.pop()
+            if callee in seen:
+                continue
+            seen.add(callee)
+            stack.extend(self.callees.get(callee, ()))
+        return seen
+
+    def is_recursive(self, name: str) -> bool:
+        return name in self.reachable_from(name)
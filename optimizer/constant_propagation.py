@@ -0,0 +1,208 @@
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+from codegenerator.intermediate_code import TACInstruction, Label, IntermediateCode, decode_switch_table
+from .tac_utils import (BINARY_OPS, CONDITIONAL_JUMPS, CONVERSION_OPS, PURE_OPS, Instruction, build_blocks,
+                        constant_value, evaluate_binary, format_constant, instr_def, instr_uses,
+                        is_constant, is_function_label, jump_targets, reachable_blocks, rebuild,
+                        replace_uses, reverse_postorder, split_functions)
+
+# 格中的"非常量"
+NAC = object()
+
+
+def _same(a, b) -> bool:
+    """常量相等要求类型也一致，避免 1 / 1.0 / True 被合并"""
+    return a is b or (a is not NAC and b is not NAC and type(a) is type(b) and a == b)
+
+
+class ConstantPropagation:
+    """常量传播、常量折叠与死分支删除
+
+    在每个函数的控制流图上做前向数据流分析，求出每个程序点上取值为常量的变量，
+    随后把它们替换为字面量、折叠常量运算、把条件恒定的 if_goto / switch 改为 goto 或删除，
+    最后删除不可达的基本块、无用的跳转和标签，以及结果不再被读取的赋值。
+    """
+    name = 'constant-propagation'
+
+    def run(self, code: IntermediateCode) -> IntermediateCode:
+        instructions: List[Instruction] = []
+        for start, end in split_functions(code.instructions):
+            instructions.extend(self.optimize_function(code.instructions[start:end]))
+        return rebuild(code, instructions)
+
+    def optimize_function(self, func: List[Instruction]) -> List[Instruction]:
+        func = self.fold(func)
+        while True:
+            cleaned = self.remove_dead_stores(self.remove_unreachable(func))
+            if len(cleaned) == len(func):
+                return cleaned
+            func = cleaned
+
+    # ============== 数据流分析 ==============
+    def transfer(self, instr: Instruction, state: Dict[str, object]) -> None:
+        target = instr_def(instr)
+        if target is None:
+            return
+        state[target] = self.evaluate(instr, state)
+
+    def operand_value(self, operand: Optional[str], state: Dict[str, object]):
+        if is_constant(operand):
+            return constant_value(operand)
+        return state.get(operand, NAC)
+
+    def evaluate(self, instr: TACInstruction, state: Dict[str, object]):
+        if instr.opcode == 'assign':
+            return self.operand_value(instr.arg1, state)
+        if instr.opcode in CONVERSION_OPS:
+            value = self.operand_value(instr.arg1, state)
+            return NAC if value is NAC else float(value)
+        if instr.opcode in BINARY_OPS and instr.arg2 is not None:
+            left = self.operand_value(instr.arg1, state)
+            right = self.operand_value(instr.arg2, state)
+            if left is NAC or right is NAC:
+                return NAC
+            try:
+                return evaluate_binary(instr.opcode, left, right)
+            except Exception:
+                # 运行时才应报出的错误（如除零）留给虚拟机
+                return NAC
+        return NAC
+
+    def meet(self, states: List[Dict[str, object]]) -> Dict[str, object]:
+        if not states:
+            return {}
+        # 以第一个状态的副本为起点；多数变量在各前驱中是同一个值对象（NAC 或同一常量），先用 is 判断
+        merged = dict(states[0])
+        for state in states[1:]:
+            for var, value in state.items():
+                current = merged.get(var, value)
+                if current is not value and not _same(current, value):
+                    merged[var] = NAC
+                elif var not in merged:
+                    merged[var] = value
+        return merged
+
+    def analyze(self, func: List[Instruction], blocks) -> List[Optional[Dict[str, object]]]:
+        """返回每个基本块入口处的常量状态，不可达的块为 None
+
+        先按逆后序把各块排入工作队列（前驱通常先于后继求出出口状态），之后只有出口状态变化的块
+        才把尚未在队列中的后继重新排入，每个块在队列中至多出现一次。
+        只在一个块内先定义后使用的变量（多为表达式的临时变量）不放入出口状态，合并的状态因此不随函数规模增长。
+        """
+        entry: Dict[str, object] = {}
+        if func and is_function_label(func[0]):
+            entry = {param: NAC for param in func[0].params}
+        in_states: List[Optional[Dict[str, object]]] = [None] * len(blocks)
+        out_states: List[Optional[Dict[str, object]]] = [None] * len(blocks)
+        local = self.block_locals(func, blocks)
+        worklist = deque(reverse_postorder(blocks))
+        queued = set(worklist)
+        while worklist:
+            i = worklist.popleft()
+            queued.discard(i)
+            preds = [out_states[p] for p in blocks[i].preds if out_states[p] is not None]
+            state = self.meet(([entry] if i == 0 else []) + preds)
+            if out_states[i] is not None and state == in_states[i]:
+                continue
+            in_states[i] = dict(state)
+            for instr in func[blocks[i].start:blocks[i].end]:
+                self.transfer(instr, state)
+            for var in local[i]:
+                del state[var]
+            out_states[i] = state
+            for succ in blocks[i].succs:
+                if succ not in queued:
+                    queued.add(succ)
+                    worklist.append(succ)
+        return in_states
+
+    def block_locals(self, func: List[Instruction], blocks) -> List[List[str]]:
+        """每个块中只在本块内读写、且在本块中先定义后读取的变量"""
+        home: Dict[str, Optional[int]] = {}    # 变量 -> 所在的块；None 表示不是块内变量
+        for i, block in enumerate(blocks):
+            for instr in func[block.start:block.end]:
+                for var in instr_uses(instr):
+                    if home.get(var, i) != i or var not in home:
+                        home[var] = None
+                target = instr_def(instr)
+                if target is not None:
+                    home[target] = i if home.get(target, i) == i else None
+        local: List[List[str]] = [[] for _ in blocks]
+        for var, i in home.items():
+            if i is not None:
+                local[i].append(var)
+        return local
+
+    # ============== 改写 ==============
+    def fold(self, func: List[Instruction]) -> List[Instruction]:
+        blocks = build_blocks(func)
+        in_states = self.analyze(func, blocks)
+        result: List[Instruction] = []
+        for block, state in zip(blocks, in_states):
+            if state is None:
+                continue
+            state = dict(state)
+            for instr in func[block.start:block.end]:
+                new_instr = self.rewrite(instr, state)
+                self.transfer(instr, state)
+                if new_instr is not None:
+                    result.append(new_instr)
+        return result
+
+    def rewrite(self, instr: Instruction, state: Dict[str, object]) -> Optional[Instruction]:
+        if isinstance(instr, Label):
+            return instr
+        mapping = {}
+        for use in instr_uses(instr):
+            literal = self.literal(state.get(use, NAC))
+            if literal is not None:
+                mapping[use] = literal
+        new_instr = replace_uses(instr, mapping)
+
+        if new_instr.opcode == 'switch' and is_constant(new_instr.arg1):
+            target = decode_switch_table(new_instr.arg2).get(constant_value(new_instr.arg1), new_instr.arg3)
+            return TACInstruction(opcode='goto', arg1=target)
+        if new_instr.opcode in CONDITIONAL_JUMPS and is_constant(new_instr.arg1):
+            if bool(constant_value(new_instr.arg1)) != (new_instr.opcode == 'if_goto'):
+                return None
+            return TACInstruction(opcode='goto', arg1=new_instr.arg2)
+        if (new_instr.opcode in BINARY_OPS or new_instr.opcode in CONVERSION_OPS) and new_instr.result is not None:
+            literal = self.literal(self.evaluate(instr, state))
+            if literal is not None:
+                return TACInstruction(opcode='assign', arg1=literal, result=new_instr.result)
+        return new_instr
+
+    def literal(self, value) -> Optional[str]:
+        return None if value is NAC else format_constant(value)
+
+    # ============== 清理 ==============
+    def remove_unreachable(self, func: List[Instruction]) -> List[Instruction]:
+        blocks = build_blocks(func)
+        reachable = reachable_blocks(blocks)
+        kept = [instr for block, live in zip(blocks, reachable) if live
+                for instr in func[block.start:block.end]]
+
+        # 删除跳到紧随其后标签的 goto
+        result: List[Instruction] = []
+        for index, instr in enumerate(kept):
+            if isinstance(instr, TACInstruction) and instr.opcode == 'goto':
+                following = index + 1
+                while following < len(kept) and isinstance(kept[following], Label):
+                    if kept[following].name == instr.arg1:
+                        break
+                    following += 1
+                if following < len(kept) and isinstance(kept[following], Label):
+                    continue
+            result.append(instr)
+
+        referenced = {target for instr in result for target in jump_targets(instr)}
+        return [instr for instr in result
+                if not isinstance(instr, Label) or is_function_label(instr) or instr.name in referenced]
+
+    def remove_dead_stores(self, func: List[Instruction]) -> List[Instruction]:
+        """每次调用都有独立的栈帧，函数内从未被读取的变量的纯赋值可以删除"""
+        uses = Counter(use for instr in func for use in instr_uses(instr))
+        return [instr for instr in func
+                if not (isinstance(instr, TACInstruction) and instr.opcode in PURE_OPS
+                        and instr.result is not None and uses[instr.result] == 0)]
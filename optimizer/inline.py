@@ -0,0 +1,125 @@
+from typing import Dict, List, Optional
+
+from codegenerator.intermediate_code import TACInstruction, Label, IntermediateCode
+from vm.profile import ExecutionProfile
+from .call_graph import CallGraph
+from .tac_utils import (Instruction, NameAllocator, instr_uses, is_variable, rebuild, replace_uses, retarget,
+                        returns_at_end)
+
+
+class Inliner:
+    """小函数内联
+
+    对调用图中非递归、指令数不超过 size_limit 的函数，把调用点的
+    param / call 序列替换为被调函数体：形参改为普通赋值，被调函数中的
+    变量和标签全部重命名，return 改为给调用结果赋值并跳到内联体末尾。
+    给出执行剖析时，热点调用点放宽到 hot_size_limit。
+    """
+    name = 'inline'
+    uses_profile = True
+
+    def __init__(self, size_limit: int = 12, max_function_size: int = 400, max_rounds: int = 20,
+                 hot_size_limit: int = 60, profile: Optional[ExecutionProfile] = None):
+        self.size_limit = size_limit
+        self.max_function_size = max_function_size
+        self.max_rounds = max_rounds
+        self.hot_size_limit = hot_size_limit
+        self.hot_sites = profile.hot_calls() if profile is not None else set()
+
+    def run(self, code: IntermediateCode) -> IntermediateCode:
+        instructions = list(code.instructions)
+        names = NameAllocator(instructions)
+        for _ in range(self.max_rounds):
+            new_instructions = self.inline_round(instructions, names)
+            if new_instructions is None:
+                break
+            instructions = new_instructions
+        return rebuild(code, instructions)
+
+    def function_size(self, body: List[Instruction]) -> int:
+        return sum(1 for instr in body if isinstance(instr, TACInstruction))
+
+    def inlinable(self, graph: CallGraph, instructions: List[Instruction], name: str) -> bool:
+        if name not in graph.functions or name == 'main' or graph.is_recursive(name):
+            return False
+        start, end = graph.functions[name]
+        body = instructions[start + 1:end]
+        limit = max(self.size_limit, self.hot_size_limit) if self.hot_sites else self.size_limit
+        return returns_at_end(body) and self.function_size(body) <= limit
+
+    def size_limit_at(self, call: TACInstruction) -> int:
+        return self.hot_size_limit if getattr(call, 'site', None) in self.hot_sites else self.size_limit
+
+    def inline_round(self, instructions: List[Instruction], names: NameAllocator) -> Optional[List[Instruction]]:
+        """每个调用者中内联一轮，没有任何变化时返回 None"""
+        graph = CallGraph(instructions)
+        candidates = {name for name in graph.functions if self.inlinable(graph, instructions, name)}
+        if not candidates:
+            return None
+
+        result: List[Instruction] = []
+        changed = False
+        caller = None
+        caller_size = 0
+        for instr in instructions:
+            if isinstance(instr, Label) and instr.name in graph.functions:
+                caller = instr.name
+                start, end = graph.functions[caller]
+                caller_size = self.function_size(instructions[start + 1:end])
+            if not (isinstance(instr, TACInstruction) and instr.opcode == 'call'
+                    and instr.arg1 in candidates and instr.arg1 != caller):
+                result.append(instr)
+                continue
+
+            start, end = graph.functions[instr.arg1]
+            callee_label, body = instructions[start], instructions[start + 1:end]
+            arg_count = int(instr.arg2)
+            args = result[len(result) - arg_count:] if arg_count else []
+            if (len(args) != arg_count or len(callee_label.params) != arg_count
+                    or any(not (isinstance(a, TACInstruction) and a.opcode == 'param') for a in args)
+                    or self.function_size(body) > self.size_limit_at(instr)
+                    or caller_size + self.function_size(body) > self.max_function_size):
+                result.append(instr)
+                continue
+
+            if arg_count:
+                del result[-arg_count:]
+            result.extend(self.expand(callee_label.params, [a.arg1 for a in args], body, instr.result, names))
+            caller_size += self.function_size(body)
+            changed = True
+        return result if changed else None
+
+    def expand(self, params: List[str], args: List[str], body: List[Instruction],
+               result: Optional[str], names: NameAllocator) -> List[Instruction]:
+        """生成替换一次调用的指令序列"""
+        renames: Dict[str, str] = {}
+
+        def rename(operand: Optional[str]) -> Optional[str]:
+            if not is_variable(operand):
+                return operand
+            if operand not in renames:
+                renames[operand] = names.new_temp()
+            return renames[operand]
+
+        labels = {instr.name: names.new_label() for instr in body if isinstance(instr, Label)}
+        end_label = names.new_label()
+
+        expanded: List[Instruction] = []
+        for param, arg in zip(params, args):
+            expanded.append(TACInstruction(opcode='assign', arg1=arg, result=rename(param)))
+
+        for position, instr in enumerate(body):
+            if isinstance(instr, Label):
+                expanded.append(Label(name=labels[instr.name]))
+                continue
+            new_instr = retarget(replace_uses(instr, {use: rename(use) for use in instr_uses(instr)}), labels)
+            new_instr.result = rename(new_instr.result)
+            if new_instr.opcode == 'return':
+                if new_instr.arg1 is not None and result:
+                    expanded.append(TACInstruction(opcode='assign', arg1=new_instr.arg1, result=result))
+                if position != len(body) - 1:
+                    expanded.append(TACInstruction(opcode='goto', arg1=end_label))
+                continue
+            expanded.append(new_instr)
+        expanded.append(Label(name=end_label))
+        return expanded
@@ -0,0 +1,92 @@
+from collections import Counter
+from typing import Dict, List, Optional
+
+from codegenerator.intermediate_code import TACInstruction, Label, IntermediateCode
+from vm.profile import ExecutionProfile
+from .tac_utils import Instruction, is_function_label, jump_targets, label_positions, rebuild, split_functions
+
+
+class BlockLayout:
+    """按执行剖析调整 if 语句的块布局
+
+    CodeGenerator.visit_IfStmt 把 else 分支放在条件跳转之后顺序执行，then 分支需要跳转：
+
+        if c goto Lt; else 分支; goto Lend; Lt: then 分支; Lend:
+
+    剖析表明条件多数为真时，改为让 then 分支顺序执行：
+
+        ifFalse c goto Lt; then 分支; goto Lend; Lt: else 分支; Lend:
+
+    没有剖析数据时不做任何改动。
+    """
+    name = 'layout'
+    uses_profile = True
+
+    def __init__(self, profile: Optional[ExecutionProfile] = None):
+        self.profile = profile
+
+    def run(self, code: IntermediateCode) -> IntermediateCode:
+        if self.profile is None or not self.profile.branches:
+            return code
+        instructions: List[Instruction] = []
+        for start, end in split_functions(code.instructions):
+            instructions.extend(self.layout_function(code.instructions[start:end]))
+        return rebuild(code, instructions)
+
+    def layout_function(self, func: List[Instruction]) -> List[Instruction]:
+        """标签位置和各标签被跳转引用的次数在整个函数上只计算一次，每次交换后就地更新"""
+        positions = label_positions(func)
+        targets = Counter(target for instr in func for target in jump_targets(instr))
+        index = 0
+        while index < len(func):
+            self.swap(func, index, positions, targets)
+            index += 1
+        return func
+
+    def swap(self, func: List[Instruction], i: int, positions: Dict[str, int], targets: Counter) -> bool:
+        branch = func[i]
+        if not (isinstance(branch, TACInstruction) and branch.opcode == 'if_goto'):
+            return False
+        bias = self.profile.branch_bias(getattr(branch, 'site', None))
+        if bias is None or bias <= 0.5:
+            return False
+
+        j = positions.get(branch.arg2)
+        if j is None or j <= i + 1:
+            return False
+        skip = func[j - 1]
+        if not (isinstance(skip, TACInstruction) and skip.opcode == 'goto'):
+            return False
+        k = positions.get(skip.arg1)
+        if k is None or k <= j:
+            return False
+
+        # 两个分支内定义的标签只能从 if 语句内部跳入，then 标签只能由该条件跳转引用
+        region = func[i:k]
+        if any(is_function_label(instr) for instr in region):
+            return False
+        inner = {instr.name for instr in region if isinstance(instr, Label)}
+        local = Counter(target for instr in region for target in jump_targets(instr))
+        if any(targets[name] != local[name] for name in inner) or \
+                sum(1 for instr in region if branch.arg2 in jump_targets(instr)) != 1:
+            return False
+
+        else_block, then_block = func[i + 1:j - 1], func[j + 1:k]
+        inverted = TACInstruction(opcode='if_false_goto', arg1=branch.arg1, arg2=branch.arg2)
+        if hasattr(branch, 'site'):
+            inverted.site = branch.site
+        if not else_block:
+            # 删除了 goto Lend 和 then 标签，条件跳转改跳 Lend，其后的标签前移
+            inverted.arg2 = skip.arg1
+            swapped = [inverted] + then_block
+            targets[branch.arg2] -= 1
+            del positions[branch.arg2]
+            shift = len(swapped) - len(region)
+            for name, position in positions.items():
+                if position >= k:
+                    positions[name] = position + shift
+        else:
+            swapped = [inverted] + then_block + [skip, func[j]] + else_block
+        func[i:k] = swapped
+        positions.update(label_positions(func, i, i + len(swapped)))
+        return True
@@ -0,0 +1,101 @@
+import time
+from typing import Dict, List, Optional
+
+from codegenerator.intermediate_code import TACInstruction, IntermediateCode
+from vm.profile import ExecutionProfile
+from .bounds_check import BoundsCheckElimination
+from .constant_propagation import ConstantPropagation
+from .inline import Inliner
+from .layout import BlockLayout
+from .regalloc import LinearScanAllocator
+from .scalar_replace import ScalarReplacement
+from .specialize import Specializer
+from .strength_reduction import StrengthReduction
+from .unroll import LoopUnroller
+
+# pass 名称 -> pass 类
+PASSES = {cls.name: cls for cls in (
+    BlockLayout,
+    BoundsCheckElimination,
+    ConstantPropagation,
+    Inliner,
+    LinearScanAllocator,
+    LoopUnroller,
+    ScalarReplacement,
+    Specializer,
+    StrengthReduction,
+)}
+
+# 各优化级别依次运行的 pass
+PIPELINES: Dict[int, List[str]] = {
+    0: [],
+    1: ['constant-propagation'],
+    2: ['inline', 'specialize', 'scalar-replace', 'constant-propagation', 'strength-reduction', 'bounds-check',
+        'layout', 'regalloc'],
+    3: ['inline', 'specialize', 'scalar-replace', 'constant-propagation', 'unroll', 'strength-reduction',
+        'constant-propagation', 'bounds-check', 'layout', 'regalloc'],
+}
+
+
+def instruction_count(code: IntermediateCode) -> int:
+    """统计非标签指令条数"""
+    return sum(1 for instr in code.instructions if isinstance(instr, TACInstruction))
+
+
+class PassStats:
+    """单个 pass 一次运行的统计"""
+    def __init__(self, name: str, before: int, after: int, seconds: float):
+        self.name = name
+        self.before = before
+        self.after = after
+        self.seconds = seconds
+
+
+class PassManager:
+    """按顺序运行一组中间代码优化 pass，并记录每个 pass 的效果和耗时
+
+    给出执行剖析时，把它交给声明了 uses_profile 的 pass。
+    """
+    def __init__(self, passes: List[str], print_after: Optional[str] = None,
+                 profile: Optional[ExecutionProfile] = None):
+        unknown = [name for name in passes + ([print_after] if print_after else []) if name not in PASSES]
+        if unknown:
+            raise ValueError(f"未知的优化 pass: {', '.join(unknown)}")
+        self.passes = passes
+        self.print_after = print_after
+        self.profile = profile
+        self.stats: List[PassStats] = []
+
+    @classmethod
+    def for_level(cls, level: int, print_after: Optional[str] = None,
+                  profile: Optional[ExecutionProfile] = None) -> 'PassManager':
+        if level not in PIPELINES:
+            raise ValueError(f"不支持的优化级别: -O{level}")
+        return cls(PIPELINES[level], print_after=print_after, profile=profile)
+
+    def create(self, name: str):
+        cls = PASSES[name]
+        return cls(profile=self.profile) if getattr(cls, 'uses_profile', False) else cls()
+
+    def run(self, code: IntermediateCode) -> IntermediateCode:
+        for name in self.passes:
+            before = instruction_count(code)
+            started = time.perf_counter()
+            code = self.create(name).run(code)
+            self.stats.append(PassStats(name, before, instruction_count(code), time.perf_counter() - started))
+            if name == self.print_after:
+                print(f"\n=== {name} 之后的中间代码 ===")
+                print(code)
+        return code
+
+    def summary(self) -> str:
+        lines = [f"{'pass':<22}{'before':>8}{'after':>8}{'removed':>8}{'time(ms)':>12}"]
+        for stat in self.stats:
+            lines.append(f"{stat.name:<22}{stat.before:>8}{stat.after:>8}"
+                         f"{stat.before - stat.after:>8}{stat.seconds * 1000:>12.3f}")
+        if self.stats:
+            total = sum(stat.seconds for stat in self.stats)
+            removed = self.stats[0].before - self.stats[-1].after
+            lines.append(f"{'total':<22}{self.stats[0].before:>8}{self.stats[-1].after:>8}"
+                         f"{removed:>8}{total * 1000:>12.3f}")
+        return "\n".join(lines)
@@ -0,0 +1,134 @@
+import copy
+import heapq
+from typing import Dict, List, Set, Tuple
+
+from codegenerator.intermediate_code import TEMP_PREFIX, TACInstruction, IntermediateCode
+from .tac_utils import (Instruction, build_blocks, instr_def, instr_uses, is_temp, rebuild, replace_uses,
+                        split_functions)
+
+# 分配指令（含从常量池取出列表）的结果名同时是虚拟机中数组/元组的标识，不能与其他临时变量共用
+IDENTITY_OPS = {'alloc_array', 'alloc_tuple', 'load_const'}
+
+
+class LinearScanAllocator:
+    """基于活跃区间的临时变量槽位复用（线性扫描）
+
+    CodeGenerator.new_temp 为每个子表达式分配全局唯一的 %tN，函数栈帧中因此会留下
+    大量只用一次的键。本 pass 对每个函数做活跃变量分析，求出每个临时变量的活跃区间，
+    再用线性扫描把区间互不相交的临时变量映射到同一个槽位（槽位仍以 %tN 命名，且每个函数从 %t0 开始）。
+    """
+    name = 'regalloc'
+
+    def run(self, code: IntermediateCode) -> IntermediateCode:
+        instructions: List[Instruction] = []
+        for start, end in split_functions(code.instructions):
+            instructions.extend(self.allocate(code.instructions[start:end]))
+        return rebuild(code, instructions)
+
+    # ============== 活跃变量分析 ==============
+    def live_sets(self, func: List[Instruction]) -> List[Set[str]]:
+        """返回每条指令执行之后活跃的临时变量集合"""
+        blocks = build_blocks(func)
+        gen: List[Set[str]] = []
+        kill: List[Set[str]] = []
+        for block in blocks:
+            used, defined = set(), set()
+            for instr in func[block.start:block.end]:
+                used.update(u for u in instr_uses(instr) if is_temp(u) and u not in defined)
+                if is_temp(instr_def(instr)):
+                    defined.add(instr_def(instr))
+            gen.append(used)
+            kill.append(defined)
+
+        live_in: List[Set[str]] = [set() for _ in blocks]
+        live_out: List[Set[str]] = [set() for _ in blocks]
+        changed = True
+        while changed:
+            changed = False
+            for i in range(len(blocks) - 1, -1, -1):
+                out = set().union(*(live_in[s] for s in blocks[i].succs)) if blocks[i].succs else set()
+                new_in = gen[i] | (out - kill[i])
+                if out != live_out[i] or new_in != live_in[i]:
+                    live_out[i], live_in[i] = out, new_in
+                    changed = True
+
+        live_after: List[Set[str]] = [set() for _ in func]
+        for i, block in enumerate(blocks):
+            live = set(live_out[i])
+            for index in range(block.end - 1, block.start - 1, -1):
+                live_after[index] = set(live)
+                instr = func[index]
+                live.discard(instr_def(instr))
+                live.update(u for u in instr_uses(instr) if is_temp(u))
+        return live_after
+
+    def intervals(self, func: List[Instruction]) -> Dict[str, Tuple[int, int]]:
+        """每个临时变量的活跃区间 [起点, 终点]（按指令序号）"""
+        ranges: Dict[str, List[int]] = {}
+
+        def touch(temp: str, index: int):
+            if temp in ranges:
+                ranges[temp][0] = min(ranges[temp][0], index)
+                ranges[temp][1] = max(ranges[temp][1], index)
+            else:
+                ranges[temp] = [index, index]
+
+        for index, (instr, live) in enumerate(zip(func, self.live_sets(func))):
+            for temp in live:
+                touch(temp, index)
+            for temp in instr_uses(instr):
+                if is_temp(temp):
+                    touch(temp, index)
+            if is_temp(instr_def(instr)):
+                touch(instr_def(instr), index)
+        return {temp: (r[0], r[1]) for temp, r in ranges.items()}
+
+    # ============== 线性扫描 ==============
+    def allocate(self, func: List[Instruction]) -> List[Instruction]:
+        pinned = {instr.result for instr in func
+                  if isinstance(instr, TACInstruction) and instr.opcode in IDENTITY_OPS and is_temp(instr.result)}
+        intervals = {temp: span for temp, span in self.intervals(func).items() if temp not in pinned}
+        if not intervals:
+            return func
+
+        slot_names: List[str] = []
+
+        def slot_name(slot: int) -> str:
+            while len(slot_names) <= slot:
+                k = len(slot_names)
+                candidate = f"{TEMP_PREFIX}{k}"
+                while candidate in pinned or candidate in slot_names:
+                    k += 1
+                    candidate = f"{TEMP_PREFIX}{k}"
+                slot_names.append(candidate)
+            return slot_names[slot]
+
+        mapping: Dict[str, str] = {}
+        free: List[int] = []
+        active: List[Tuple[int, int]] = []  # (终点, 槽位)
+        next_slot = 0
+        for temp, (start, end) in sorted(intervals.items(), key=lambda item: item[1]):
+            # 同一条指令中先读操作数后写结果，终点等于新区间起点的槽位即可复用
+            while active and active[0][0] <= start:
+                heapq.heappush(free, heapq.heappop(active)[1])
+            if free:
+                slot = heapq.heappop(free)
+            else:
+                slot = next_slot
+                next_slot += 1
+            heapq.heappush(active, (end, slot))
+            mapping[temp] = slot_name(slot)
+
+        result: List[Instruction] = []
+        for instr in func:
+            new_instr = replace_uses(instr, mapping)
+            if isinstance(new_instr, TACInstruction) and new_instr.result in mapping:
+                if new_instr is instr:
+                    new_instr = copy.copy(instr)
+                new_instr.result = mapping[new_instr.result]
+            # 合并到同一槽位后产生的自我复制 %tN = %tN 可以直接删除
+            if isinstance(new_instr, TACInstruction) and new_instr.opcode == 'assign' \
+                    and new_instr.arg1 == new_instr.result:
+                continue
+            result.append(new_instr)
+        return result
@@ -0,0 +1,253 @@
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from codegenerator.intermediate_code import TACInstruction, Label, IntermediateCode
+from .call_graph import CallGraph
+from .tac_utils import (Instruction, NameAllocator, constant_value, falls_through, instr_def, instr_uses,
+                        is_function_label, is_int_constant, jump_targets, label_positions, rebuild,
+                        split_functions)
+
+TUPLE_LOADS = ('tuple_load', 'tuple_load_unchecked')
+
+
+class TupleValue:
+    """函数内的一个元组值：由 alloc_tuple、load_const 或用户函数调用（root）定义，names 为它及其各个复制的名字"""
+    def __init__(self, function: str, root: int, kind: str, size: Optional[int] = None,
+                 callee: Optional[str] = None, elements: Optional[List[str]] = None):
+        self.function = function  # 所在函数
+        self.root = root          # 定义指令在函数内的位置
+        self.kind = kind          # 'alloc'、'const' 或 'call'
+        self.size = size          # alloc / const 的长度
+        self.callee = callee      # 调用结果的被调函数
+        self.elements = elements  # 常量元组各元素的字面量
+        self.names: Set[str] = set()
+        self.stored: List[int] = []
+        self.max_index = -1       # 读取的最大下标
+        self.returned = False
+        self.escapes = False
+
+
+class ScalarReplacement:
+    """元组的逃逸分析与标量替换
+
+    函数内由 alloc_tuple 创建、只被常量下标的 tuple_store / tuple_load 和复制使用的元组
+    不会逃逸：把每个元素换成一个临时变量，删除分配，存储和读取改为普通赋值。
+    从常量池取出的元组同样处理，读取直接改为对应的字面量。
+
+    若函数的每个 return 都返回这样的元组，并且每个调用点只用常量下标读取调用结果，
+    则元组也不必分配：被调函数用 return_pack 把各元素打包返回，调用点的读取改为 unpack。
+    作为实参、数组元素、元组元素或返回给其他调用者的元组视为逃逸，保持不变。
+    """
+    name = 'scalar-replace'
+
+    def run(self, code: IntermediateCode) -> IntermediateCode:
+        instructions = code.instructions
+        graph = CallGraph(instructions)
+        segments = split_functions(instructions)
+        # 全局声明所在的区间不是函数，其中的名字对所有函数可见，不做替换
+        global_names = set()
+        if segments and not is_function_label(instructions[segments[0][0]]):
+            global_names = {instr_def(instr) for instr in instructions[slice(*segments[0])]} - {None}
+
+        values: Dict[int, List[TupleValue]] = {}
+        for start, end in segments:
+            if is_function_label(instructions[start]):
+                values[start] = self.tuple_values(instructions[start:end], graph, global_names, code.constants)
+
+        packed = self.packed_functions(instructions, graph, values)
+        if not any(self.replaceable(value, packed) for found in values.values() for value in found):
+            return code
+
+        names = NameAllocator(instructions)
+        result: List[Instruction] = []
+        for start, end in segments:
+            func = instructions[start:end]
+            if start in values:
+                func = self.replace(func, values[start], packed, names)
+            result.extend(func)
+        return rebuild(code, result)
+
+    # ============== 逃逸分析 ==============
+    def tuple_values(self, func: List[Instruction], graph: CallGraph, global_names: Set[str],
+                     constants: Dict[str, Tuple[str, List[str]]]) -> List[TupleValue]:
+        def_counts = Counter(instr_def(instr) for instr in func if instr_def(instr) is not None)
+        excluded = set(func[0].params) | global_names
+
+        def single_def(name: Optional[str]) -> bool:
+            return name is not None and def_counts[name] == 1 and name not in excluded
+
+        # 单一定义的复制：源名字 -> 复制得到的名字
+        copies: Dict[str, List[str]] = {}
+        for instr in func:
+            if isinstance(instr, TACInstruction) and instr.opcode == 'assign' and single_def(instr.result):
+                copies.setdefault(instr.arg1, []).append(instr.result)
+
+        values: List[TupleValue] = []
+        owner: Dict[str, TupleValue] = {}
+        for position, instr in enumerate(func):
+            if isinstance(instr, Label) or not single_def(instr.result):
+                continue
+            if instr.opcode == 'alloc_tuple' and is_int_constant(instr.arg1):
+                value = TupleValue(func[0].name, position, 'alloc', size=constant_value(instr.arg1))
+            elif instr.opcode == 'load_const' and constants[instr.arg1][0] == 'tuple':
+                elements = constants[instr.arg1][1]
+                if any(',' in element for element in elements):
+                    continue  # 含逗号的字符串无法写进 return_pack 的操作数列表
+                value = TupleValue(func[0].name, position, 'const', size=len(elements), elements=elements)
+            elif instr.opcode == 'call' and instr.arg1 in graph.functions:
+                value = TupleValue(func[0].name, position, 'call', callee=instr.arg1)
+            else:
+                continue
+            stack = [instr.result]
+            while stack:
+                name = stack.pop()
+                value.names.add(name)
+                owner[name] = value
+                stack.extend(copies.get(name, []))
+            values.append(value)
+
+        for instr in func:
+            for name in instr_uses(instr):
+                if name in owner and not self.allowed_use(instr, name, owner):
+                    owner[name].escapes = True
+
+        for value in values:
+            if value.kind == 'call':
+                continue
+            if value.max_index >= value.size or (value.kind == 'alloc' and (
+                    sorted(value.stored) != list(range(value.size)) or self.stale_copy(func, value))):
+                value.escapes = True
+        return values
+
+    def allowed_use(self, instr: TACInstruction, name: str, owner: Dict[str, TupleValue]) -> bool:
+        value = owner[name]
+        if instr.opcode == 'tuple_store':
+            index, stored = instr.arg2.split(',')
+            if value.kind != 'alloc' or instr.arg1 != name or stored in owner or not is_int_constant(index):
+                return False
+            value.stored.append(constant_value(index))
+            return True
+        if instr.opcode in TUPLE_LOADS:
+            if instr.arg1 != name or not is_int_constant(instr.arg2) or constant_value(instr.arg2) < 0:
+                return False
+            value.max_index = max(value.max_index, constant_value(instr.arg2))
+            return True
+        if instr.opcode == 'assign':
+            return owner.get(instr.result) is value
+        if instr.opcode == 'return':
+            value.returned = True
+            return True
+        return False
+
+    def stale_copy(self, func: List[Instruction], value: TupleValue) -> bool:
+        """元素换成临时变量后，复制 m 必须总是指向最近一次分配的元组：
+        从 m 的定义出发、不经过 m 的重新定义，若能先经过分配再到达 m 的使用，则不能替换"""
+        labels = label_positions(func)
+        for position, instr in enumerate(func):
+            if position == value.root or isinstance(instr, Label) or instr.result not in value.names:
+                continue
+            copy_name = instr.result
+            seen = set()
+            stack = [(succ, False) for succ in self.successors(func, labels, position)]
+            while stack:
+                state = stack.pop()
+                current, allocated = state
+                if state in seen:
+                    continue
+                seen.add(state)
+                if allocated and copy_name in instr_uses(func[current]):
+                    return True
+                if current == position:
+                    continue
+                allocated = allocated or current == value.root
+                stack.extend((succ, allocated) for succ in self.successors(func, labels, current))
+        return False
+
+    def successors(self, func: List[Instruction], labels: Dict[str, int], position: int) -> List[int]:
+        instr = func[position]
+        succs = [labels[target] for target in jump_targets(instr) if target in labels]
+        if falls_through(instr) and position + 1 < len(func):
+            succs.append(position + 1)
+        return succs
+
+    def packed_functions(self, instructions: List[Instruction], graph: CallGraph,
+                         values: Dict[int, List[TupleValue]]) -> Dict[str, int]:
+        """可以改为打包返回的函数：函数名 -> 元组长度"""
+        candidates: Dict[str, int] = {}
+        for func_name, (start, end) in graph.functions.items():
+            if func_name == 'main' or (start > 0 and falls_through(instructions[start - 1])):
+                continue
+            returns = [instr for instr in instructions[start:end]
+                       if isinstance(instr, TACInstruction) and instr.opcode == 'return']
+            owner = {name: value for value in values[start] for name in value.names}
+            returned = [owner.get(instr.arg1) for instr in returns]
+            if (not returned or any(value is None or value.kind == 'call' or value.escapes for value in returned)
+                    or len({value.size for value in returned}) != 1):
+                continue
+            candidates[func_name] = returned[0].size
+
+        # 每个调用点的结果都必须只被常量下标读取；不在函数内的调用点无法分析
+        for start, end in split_functions(instructions):
+            found = {value.root: value for value in values.get(start, [])}
+            for position in range(start, end):
+                instr = instructions[position]
+                if not (isinstance(instr, TACInstruction) and instr.opcode == 'call' and instr.arg1 in candidates):
+                    continue
+                if instr.result is None:
+                    continue
+                value = found.get(position - start)
+                if (value is None or value.escapes or value.returned
+                        or value.max_index >= candidates[instr.arg1]):
+                    del candidates[instr.arg1]
+        return candidates
+
+    def replaceable(self, value: TupleValue, packed: Dict[str, int]) -> bool:
+        """alloc / 常量元组：不逃逸，且要么不被返回、要么所在函数打包返回；调用结果：被调函数打包返回"""
+        if value.escapes:
+            return False
+        if value.kind == 'call':
+            return value.callee in packed
+        return not value.returned or value.function in packed
+
+    # ============== 改写 ==============
+    def replace(self, func: List[Instruction], values: List[TupleValue], packed: Dict[str, int],
+                names: NameAllocator) -> List[Instruction]:
+        fields: Dict[str, List[str]] = {}   # 元组的名字 -> 各元素的临时变量（常量元组为字面量）
+        unpacked: Set[str] = set()          # 打包返回的调用结果的名字
+        removed: Set[int] = set()
+        for value in values:
+            if not self.replaceable(value, packed):
+                continue
+            if value.kind == 'call':
+                unpacked |= value.names
+                continue
+            if value.kind == 'const':
+                temps = value.elements
+            else:
+                temps = [names.new_temp() for _ in range(value.size)]
+            for name in value.names:
+                fields[name] = temps
+            removed.add(value.root)
+
+        if not fields and not unpacked:
+            return func
+        result: List[Instruction] = []
+        for position, instr in enumerate(func):
+            if isinstance(instr, Label):
+                result.append(instr)
+            elif position in removed or (instr.opcode == 'assign' and instr.result in fields):
+                continue
+            elif instr.opcode == 'tuple_store' and instr.arg1 in fields:
+                index, stored = instr.arg2.split(',')
+                result.append(TACInstruction(opcode='assign', arg1=stored,
+                                             result=fields[instr.arg1][constant_value(index)]))
+            elif instr.opcode in TUPLE_LOADS and instr.arg1 in fields:
+                result.append(TACInstruction(opcode='assign', arg1=fields[instr.arg1][constant_value(instr.arg2)],
+                                             result=instr.result))
+            elif instr.opcode in TUPLE_LOADS and instr.arg1 in unpacked:
+                result.append(TACInstruction(opcode='unpack', arg1=instr.arg1, arg2=instr.arg2, result=instr.result))
+            elif instr.opcode == 'return' and instr.arg1 in fields:
+                result.append(TACInstruction(opcode='return_pack', arg1=','.join(fields[instr.arg1])))
+            else:
+                result.append(instr)
+        return result
@@ -0,0 +1,117 @@
+import copy
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+from codegenerator.intermediate_code import TACInstruction, Label, IntermediateCode
+from .call_graph import CallGraph
+from .constant_propagation import ConstantPropagation
+from .tac_utils import (Instruction, NameAllocator, is_constant, is_function_label, rebuild, retarget, returns_at_end,
+                        split_functions)
+
+# 常量实参签名：((形参位置, 常量字面量), ...)
+Signature = Tuple[Tuple[int, str], ...]
+
+
+class Specializer:
+    """按常量实参对函数做特化
+
+    对以常量实参调用的用户函数，按每种常量实参组合克隆出一个特化版本：
+    常量形参从形参表中去掉，改为函数入口处的赋值，然后对克隆体做常量传播
+    与死分支删除，并把对应调用点改为调用特化版本。每个函数最多克隆 max_clones 个。
+    调用点全部改为调用特化版本后不再被任何 call 引用的原函数随之删除。
+    """
+    name = 'specialize'
+
+    def __init__(self, max_clones: int = 4):
+        self.max_clones = max_clones
+        self.folder = ConstantPropagation()
+
+    def run(self, code: IntermediateCode) -> IntermediateCode:
+        instructions = list(code.instructions)
+        graph = CallGraph(instructions)
+        names = NameAllocator(instructions)
+
+        sites = self.call_sites(instructions, graph)
+        counts: Dict[str, Counter] = defaultdict(Counter)
+        for func_name, signature in sites.values():
+            counts[func_name][signature] += 1
+
+        clone_names: Dict[Tuple[str, Signature], str] = {}
+        clones: List[Instruction] = []
+        taken = set(graph.functions)
+        for func_name, signatures in counts.items():
+            start, end = graph.functions[func_name]
+            if not returns_at_end(instructions[start + 1:end]):
+                continue
+            for signature, _ in signatures.most_common(self.max_clones):
+                clone_name = self.clone_name(func_name, taken)
+                taken.add(clone_name)
+                clone_names[(func_name, signature)] = clone_name
+                clones.extend(self.folder.optimize_function(
+                    self.clone(instructions[start:end], clone_name, signature, names)))
+
+        if not clone_names:
+            return code
+
+        result: List[Instruction] = []
+        for index, instr in enumerate(instructions):
+            if index in sites and sites[index] in clone_names:
+                _, signature = sites[index]
+                constant_positions = {position for position, _ in signature}
+                arg_count = int(instr.arg2)
+                params = result[len(result) - arg_count:]
+                del result[len(result) - arg_count:]
+                result.extend(p for position, p in enumerate(params) if position not in constant_positions)
+                instr = copy.copy(instr)
+                instr.arg1 = clone_names[sites[index]]
+                instr.arg2 = str(arg_count - len(signature))
+            result.append(instr)
+        specialized = {func_name for func_name, _ in clone_names}
+        return rebuild(code, self.remove_uncalled(result + clones, specialized))
+
+    def remove_uncalled(self, instructions: List[Instruction], candidates) -> List[Instruction]:
+        """删除 candidates 中不再被任何 call 指令引用的函数（main 是程序入口，总是保留）"""
+        called = {instr.arg1 for instr in instructions if isinstance(instr, TACInstruction) and instr.opcode == 'call'}
+        dropped = {name for name in candidates if name not in called and name != 'main'}
+        if not dropped:
+            return instructions
+        return [instr for start, end in split_functions(instructions)
+                if not (is_function_label(instructions[start]) and instructions[start].name in dropped)
+                for instr in instructions[start:end]]
+
+    def call_sites(self, instructions: List[Instruction], graph: CallGraph) -> Dict[int, Tuple[str, Signature]]:
+        """找出带常量实参的用户函数调用点：调用指令位置 -> (函数名, 常量签名)"""
+        sites = {}
+        for index, instr in enumerate(instructions):
+            if not (isinstance(instr, TACInstruction) and instr.opcode == 'call' and instr.arg1 in graph.functions):
+                continue
+            arg_count = int(instr.arg2)
+            params = instructions[index - arg_count:index]
+            if (len(params) != arg_count or len(instructions[graph.functions[instr.arg1][0]].params) != arg_count
+                    or any(not (isinstance(p, TACInstruction) and p.opcode == 'param') for p in params)):
+                continue
+            signature = tuple((position, p.arg1) for position, p in enumerate(params) if is_constant(p.arg1))
+            if signature:
+                sites[index] = (instr.arg1, signature)
+        return sites
+
+    def clone_name(self, func_name: str, taken) -> str:
+        k = 0
+        while f"{func_name}__spec{k}" in taken:
+            k += 1
+        return f"{func_name}__spec{k}"
+
+    def clone(self, func: List[Instruction], clone_name: str, signature: Signature,
+              names: NameAllocator) -> List[Instruction]:
+        """复制函数体：常量形参改为入口赋值，标签全部重命名"""
+        constants = dict(signature)
+        params = func[0].params
+        entry = Label(name=clone_name)
+        entry.params = [p for position, p in enumerate(params) if position not in constants]
+
+        labels = {instr.name: names.new_label() for instr in func[1:] if isinstance(instr, Label)}
+        body: List[Instruction] = [entry]
+        for position, literal in constants.items():
+            body.append(TACInstruction(opcode='assign', arg1=literal, result=params[position]))
+        body.extend(retarget(instr, labels) for instr in func[1:])
+        return body
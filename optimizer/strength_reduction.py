@@ -0,0 +1,171 @@
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from codegenerator.intermediate_code import TACInstruction, Label, IntermediateCode
+from .tac_utils import (MUL_OPS, RETURN_OPS, Instruction, Loop, NameAllocator, constant_value, find_loops,
+                        increment_step, instr_def, instr_uses, is_int_constant, is_temp, is_variable,
+                        jump_targets, rebuild, replace_uses, split_functions)
+
+
+class StrengthReduction:
+    """强度削弱与归纳变量优化
+
+    在 for 循环中识别基本归纳变量（循环内只以 i = i ± c 的形式被修改），
+    把 i * k（k 为循环不变量）改写为一个累加器：循环前初始化 s = i * k，
+    每次 i 自增后执行 s = s + k * c。相同 (i, k) 的派生归纳变量共享同一个累加器，
+    削弱后只剩自增的冗余归纳变量会被删除。
+    """
+    name = 'strength-reduction'
+
+    def __init__(self, max_rounds: int = 100):
+        self.max_rounds = max_rounds
+
+    def run(self, code: IntermediateCode) -> IntermediateCode:
+        instructions = list(code.instructions)
+        names = NameAllocator(instructions)
+        for _ in range(self.max_rounds):
+            changed = False
+            for start, end in split_functions(instructions):
+                func = instructions[start:end]
+                for loop in find_loops(func, 0, len(func)):
+                    new_func = self.reduce_loop(func, loop, names)
+                    if new_func is not None:
+                        instructions[start:end] = new_func
+                        changed = True
+                        break
+                if changed:
+                    break
+            if not changed:
+                break
+        return rebuild(code, instructions)
+
+    # ============== 归纳变量 ==============
+    def increments(self, func: List[Instruction], loop: Loop, var: str,
+                   def_counts: Counter) -> Optional[List[Tuple[int, int, List[int]]]]:
+        """若 var 在循环内的所有定义都是 var = var ± c，返回 (定义位置, 增量, 自增指令位置) 列表"""
+        result = []
+        for j in range(loop.header + 1, loop.latch):
+            if instr_def(func[j]) != var:
+                continue
+            step = increment_step(func[j], var)
+            if step is not None:
+                result.append((j, step, [j]))
+                continue
+            # t = var + c; var = t
+            instr = func[j]
+            prev = func[j - 1]
+            if (instr.opcode == 'assign' and is_temp(instr.arg1) and def_counts[instr.arg1] == 1
+                    and instr_def(prev) == instr.arg1):
+                step = increment_step(prev, var)
+                if step is not None:
+                    result.append((j, step, [j - 1, j]))
+                    continue
+            return None
+        return result or None
+
+    # ============== 单个循环的变换 ==============
+    def reduce_loop(self, func: List[Instruction], loop: Loop, names: NameAllocator) -> Optional[List[Instruction]]:
+        body = range(loop.header + 1, loop.latch)
+        def_counts = Counter(instr_def(func[j]) for j in body if instr_def(func[j]) is not None)
+
+        iv_cache: Dict[str, Optional[list]] = {}
+
+        def induction(var: str):
+            if var not in iv_cache:
+                iv_cache[var] = self.increments(func, loop, var, def_counts) if is_variable(var) else None
+            return iv_cache[var]
+
+        def invariant(operand: str) -> bool:
+            return is_int_constant(operand) or (is_variable(operand) and def_counts[operand] == 0)
+
+        # (归纳变量, 不变因子) -> 乘法指令位置
+        groups: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        for m in body:
+            instr = func[m]
+            if not (isinstance(instr, TACInstruction) and instr.opcode in MUL_OPS and instr.result):
+                continue
+            for var, factor in ((instr.arg1, instr.arg2), (instr.arg2, instr.arg1)):
+                if var != factor and invariant(factor) and induction(var):
+                    groups[(var, factor)].append(m)
+                    break
+        if not groups:
+            return None
+
+        preheader: List[Instruction] = []
+        after: Dict[int, List[Instruction]] = defaultdict(list)
+        replaced: Dict[int, Instruction] = {}
+        for (var, factor), positions in groups.items():
+            # 沿用被削弱乘法的操作码族（通用 * / + 或整数特化的 imul / iadd）
+            mul = func[positions[0]].opcode
+            add = 'iadd' if mul == 'imul' else '+'
+            acc = names.new_temp()
+            preheader.append(TACInstruction(opcode=mul, arg1=var, arg2=factor, result=acc))
+            steps: Dict[int, str] = {}
+            for j, delta, _ in induction(var):
+                if delta not in steps:
+                    if is_int_constant(factor):
+                        steps[delta] = str(constant_value(factor) * delta)
+                    elif delta == 1:
+                        steps[delta] = factor
+                    else:
+                        steps[delta] = names.new_temp()
+                        preheader.append(TACInstruction(opcode=mul, arg1=factor, arg2=str(delta), result=steps[delta]))
+                after[j].append(TACInstruction(opcode=add, arg1=acc, arg2=steps[delta], result=acc))
+            for m in positions:
+                replaced[m] = TACInstruction(opcode='assign', arg1=acc, result=func[m].result)
+
+        new_func: List[Instruction] = []
+        copies: List[int] = []
+        for index, instr in enumerate(func):
+            if index == loop.header:
+                new_func.extend(preheader)
+            if index in replaced:
+                copies.append(len(new_func))
+                instr = replaced[index]
+            new_func.append(instr)
+            new_func.extend(after.get(index, []))
+
+        new_func = self.forward_copies(new_func, copies)
+        for var, _ in groups:
+            new_func = self.drop_dead_induction(new_func, var, len(preheader))
+        return new_func
+
+    # ============== 清理 ==============
+    def forward_copies(self, func: List[Instruction], copies: List[int]) -> List[Instruction]:
+        """把 x = s 之后同一基本块内对临时变量 x 的使用直接改为 s，x 不再被使用时删除该复制"""
+        def_counts = Counter(instr_def(instr) for instr in func if instr_def(instr) is not None)
+        dead = set()
+        for position in copies:
+            copy_instr = func[position]
+            temp, acc = copy_instr.result, copy_instr.arg1
+            if not is_temp(temp) or def_counts[temp] != 1:
+                continue
+            for k in range(position + 1, len(func)):
+                instr = func[k]
+                if isinstance(instr, Label):
+                    break
+                func[k] = replace_uses(instr, {temp: acc})
+                if instr_def(instr) in (temp, acc) or jump_targets(instr) or instr.opcode in RETURN_OPS:
+                    break
+            if not any(temp in instr_uses(instr) for instr in func):
+                dead.add(position)
+        return [instr for index, instr in enumerate(func) if index not in dead]
+
+    def drop_dead_induction(self, func: List[Instruction], var: str, preheader_size: int) -> List[Instruction]:
+        """削弱之后若归纳变量只被自身的自增和累加器初始化读取，删除循环内的自增"""
+        loops = [loop for loop in find_loops(func, 0, len(func))
+                 if any(instr_def(func[j]) == var for j in range(loop.header + 1, loop.latch))]
+        if len(loops) != 1:
+            return func
+        loop = loops[0]
+        def_counts = Counter(instr_def(func[j]) for j in range(loop.header + 1, loop.latch)
+                             if instr_def(func[j]) is not None)
+        incs = self.increments(func, loop, var, def_counts)
+        if not incs:
+            return func
+        removable = {k for _, _, positions in incs for k in positions}
+        preheader = set(range(loop.header - preheader_size, loop.header))
+        for index, instr in enumerate(func):
+            if var in instr_uses(instr) and index not in removable and index not in preheader:
+                return func
+        return [instr for index, instr in enumerate(func) if index not in removable]
@@ -0,0 +1,395 @@
+import copy
+import dataclasses
+import re
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from codegenerator.intermediate_code import (BOOL_LITERALS, TEMP_PREFIX, TYPED_OPERATIONS, TACInstruction, Label,
+                                             IntermediateCode, decode_switch_table, encode_switch_table)
+
+Instruction = Union[TACInstruction, Label]
+
+TEMP_PATTERN = re.compile('^' + re.escape(TEMP_PREFIX) + r'(\d+)$')
+LABEL_PATTERN = re.compile(r'^L(\d+)$')
+
+TYPED_ARITHMETIC_OPS = {op for op in TYPED_OPERATIONS if op[1:] in ('add', 'sub', 'mul', 'div', 'mod')}
+ARITHMETIC_OPS = {'+', '-', '*', '/', '%'} | TYPED_ARITHMETIC_OPS
+COMPARISON_OPS = {'>', '<', '>=', '<=', '==', '!='} | (set(TYPED_OPERATIONS) - TYPED_ARITHMETIC_OPS)
+BINARY_OPS = ARITHMETIC_OPS | COMPARISON_OPS
+
+# 整数加减乘：归纳变量与强度削弱只处理这些运算
+ADD_OPS = {'+', 'iadd'}
+SUB_OPS = {'-', 'isub'}
+MUL_OPS = {'*', 'imul'}
+
+# 类型转换
+CONVERSION_OPS = {'itof'}
+
+# 不产生副作用、结果只依赖操作数的指令，可以安全删除或移动
+PURE_OPS = BINARY_OPS | CONVERSION_OPS | {'assign', 'unpack'}
+
+# 存储指令的 arg2 形如 "index,value"
+STORE_OPS = {'array_store', 'tuple_store', 'array_store_unchecked'}
+
+# 带越界检查的访问 -> 已证明下标不越界时使用的无检查版本
+UNCHECKED_ACCESS = {
+    'array_load': 'array_load_unchecked',
+    'array_store': 'array_store_unchecked',
+    'tuple_load': 'tuple_load_unchecked',
+}
+
+# 条件跳转：arg1 为条件，arg2 为目标标签；if_false_goto 在条件为假时跳转
+CONDITIONAL_JUMPS = ('if_goto', 'if_false_goto')
+
+# 函数返回；return_pack 的 arg1 形如 "v0,v1,..."，把多个值打包返回
+RETURN_OPS = ('return', 'return_pack')
+
+
+# ============== 操作数 ==============
+def is_constant(operand: Optional[str]) -> bool:
+    """与 SimpleVM.get_value 保持一致：引号字符串、整数、浮点数都是常量"""
+    if operand is None:
+        return False
+    if operand.startswith('"') or operand.startswith("'") or operand in BOOL_LITERALS:
+        return True
+    try:
+        float(operand)
+        return True
+    except ValueError:
+        return False
+
+
+def constant_value(operand: str):
+    """取出常量操作数的值，规则同 SimpleVM.get_value"""
+    if operand.startswith('"') or operand.startswith("'"):
+        return operand[1:-1]
+    if operand in BOOL_LITERALS:
+        return BOOL_LITERALS[operand]
+    try:
+        return int(operand)
+    except ValueError:
+        return float(operand)
+
+
+def format_constant(value) -> Optional[str]:
+    """把值写回操作数字符串；无法用字面量表示时返回 None"""
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, str) and '"' not in value and ',' not in value:
+        return f'"{value}"'
+    return None
+
+
+def is_variable(operand: Optional[str]) -> bool:
+    return operand is not None and operand != '' and not is_constant(operand)
+
+
+def is_temp(operand: Optional[str]) -> bool:
+    """CodeGenerator.new_temp 生成的临时变量"""
+    return operand is not None and TEMP_PATTERN.match(operand) is not None
+
+
+def is_int_constant(operand: Optional[str]) -> bool:
+    if not is_constant(operand):
+        return False
+    value = constant_value(operand)
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def evaluate_binary(opcode: str, left, right):
+    """按 SimpleVM 的语义计算二元运算（注意通用的 == / != 在虚拟机中是反转的）"""
+    if opcode in TYPED_OPERATIONS:
+        return TYPED_OPERATIONS[opcode](left, right)
+    if opcode == '+':
+        return left + right
+    if opcode == '-':
+        return left - right
+    if opcode == '*':
+        return left * right
+    if opcode == '/':
+        return left / right
+    if opcode == '%':
+        return left % right
+    if opcode == '>':
+        return right < left
+    if opcode == '<':
+        return right > left
+    if opcode == '>=':
+        return right <= left
+    if opcode == '<=':
+        return right >= left
+    if opcode == '==':
+        return right != left
+    if opcode == '!=':
+        return right == left
+    raise ValueError(f"未知的二元运算: {opcode}")
+
+
+def increment_step(instr, var: str) -> Optional[int]:
+    """若 instr 为 x = var + c 或 x = var - c（c 为整数常量），返回增量"""
+    if not isinstance(instr, TACInstruction):
+        return None
+    if instr.opcode in ADD_OPS:
+        if instr.arg1 == var and is_int_constant(instr.arg2):
+            return constant_value(instr.arg2)
+        if instr.arg2 == var and is_int_constant(instr.arg1):
+            return constant_value(instr.arg1)
+    elif instr.opcode in SUB_OPS and instr.arg1 == var and is_int_constant(instr.arg2):
+        return -constant_value(instr.arg2)
+    return None
+
+
+# ============== 定义 / 使用 ==============
+def instr_def(instr: Instruction) -> Optional[str]:
+    """指令定义（写入）的变量"""
+    if isinstance(instr, Label):
+        return None
+    return instr.result
+
+
+def instr_uses(instr: Instruction) -> List[str]:
+    """指令读取的变量（不含常量、标签和函数名）"""
+    if isinstance(instr, Label):
+        return []
+    opcode = instr.opcode
+    if opcode in ('goto', 'call', 'load_const'):
+        return []
+    if opcode in CONDITIONAL_JUMPS or opcode == 'switch':
+        operands = [instr.arg1]
+    elif opcode in STORE_OPS:
+        operands = [instr.arg1] + instr.arg2.split(',')
+    elif opcode == 'return_pack':
+        operands = instr.arg1.split(',')
+    else:
+        operands = [instr.arg1, instr.arg2]
+    return [op for op in operands if is_variable(op)]
+
+
+def replace_uses(instr: Instruction, mapping: Dict[str, str]) -> Instruction:
+    """返回把读取的变量按 mapping 替换后的新指令"""
+    if isinstance(instr, Label) or not any(u in mapping for u in instr_uses(instr)):
+        return instr
+    new_instr = copy.copy(instr)
+    opcode = instr.opcode
+    if opcode in STORE_OPS:
+        new_instr.arg1 = mapping.get(instr.arg1, instr.arg1)
+        new_instr.arg2 = ','.join(mapping.get(part, part) for part in instr.arg2.split(','))
+    elif opcode == 'return_pack':
+        new_instr.arg1 = ','.join(mapping.get(part, part) for part in instr.arg1.split(','))
+    elif opcode in CONDITIONAL_JUMPS or opcode == 'switch':
+        new_instr.arg1 = mapping.get(instr.arg1, instr.arg1)
+    else:
+        if is_variable(instr.arg1):
+            new_instr.arg1 = mapping.get(instr.arg1, instr.arg1)
+        if is_variable(instr.arg2):
+            new_instr.arg2 = mapping.get(instr.arg2, instr.arg2)
+    return new_instr
+
+
+def jump_targets(instr: Instruction) -> List[str]:
+    """指令可能跳转到的标签"""
+    if isinstance(instr, Label):
+        return []
+    if instr.opcode == 'goto':
+        return [instr.arg1]
+    if instr.opcode in CONDITIONAL_JUMPS:
+        return [instr.arg2]
+    if instr.opcode == 'switch':
+        return list(decode_switch_table(instr.arg2).values()) + [instr.arg3]
+    return []
+
+
+def retarget(instr: Instruction, labels: Dict[str, str]) -> Instruction:
+    """返回把跳转目标按 labels 重命名后的指令（总是新的副本）"""
+    new_instr = copy.copy(instr)
+    if isinstance(instr, Label):
+        new_instr.name = labels.get(instr.name, instr.name)
+    elif instr.opcode == 'goto':
+        new_instr.arg1 = labels.get(instr.arg1, instr.arg1)
+    elif instr.opcode in CONDITIONAL_JUMPS:
+        new_instr.arg2 = labels.get(instr.arg2, instr.arg2)
+    elif instr.opcode == 'switch':
+        table = decode_switch_table(instr.arg2)
+        new_instr.arg2 = encode_switch_table({value: labels.get(label, label) for value, label in table.items()})
+        new_instr.arg3 = labels.get(instr.arg3, instr.arg3)
+    return new_instr
+
+
+def is_function_label(instr: Instruction) -> bool:
+    """函数入口标签由 CodeGenerator 附带形参列表"""
+    return isinstance(instr, Label) and hasattr(instr, 'params')
+
+
+def ends_block(instr: Instruction) -> bool:
+    return isinstance(instr, TACInstruction) and instr.opcode in ('goto', 'switch') + RETURN_OPS + CONDITIONAL_JUMPS
+
+
+def falls_through(instr: Instruction) -> bool:
+    """执行完该指令后是否可能顺序执行下一条"""
+    return not (isinstance(instr, TACInstruction) and instr.opcode in ('goto', 'switch') + RETURN_OPS)
+
+
+def returns_at_end(body: List[Instruction]) -> bool:
+    """函数体以 return 结尾；否则执行会顺序落入下一个函数"""
+    return bool(body) and isinstance(body[-1], TACInstruction) and body[-1].opcode == 'return'
+
+
+# ============== 程序结构 ==============
+def split_functions(instructions: List[Instruction]) -> List[Tuple[int, int]]:
+    """按函数入口标签把指令序列划分为若干 [start, end) 区间"""
+    starts = [i for i, instr in enumerate(instructions) if is_function_label(instr)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    bounds = starts + [len(instructions)]
+    return [(bounds[i], bounds[i + 1]) for i in range(len(starts)) if bounds[i] < bounds[i + 1]]
+
+
+def label_positions(instructions: List[Instruction], start: int = 0, end: Optional[int] = None) -> Dict[str, int]:
+    end = len(instructions) if end is None else end
+    return {instructions[i].name: i for i in range(start, end) if isinstance(instructions[i], Label)}
+
+
+def rebuild(code: IntermediateCode, instructions: List[Instruction]) -> IntermediateCode:
+    """以新的指令序列构造 IntermediateCode，保留其余字段"""
+    return dataclasses.replace(code, instructions=instructions)
+
+
+class NameAllocator:
+    """在已有代码之后分配不冲突的临时变量和标签名"""
+    def __init__(self, instructions: Iterable[Instruction]):
+        self.temp_count = 0
+        self.label_count = 0
+        for instr in instructions:
+            names = [instr.name] if isinstance(instr, Label) else \
+                [op for field in (instr.arg1, instr.arg2, instr.arg3, instr.result)
+                 if isinstance(field, str) for op in field.split(',')]
+            for name in names:
+                match = TEMP_PATTERN.match(name)
+                if match:
+                    self.temp_count = max(self.temp_count, int(match.group(1)) + 1)
+                match = LABEL_PATTERN.match(name)
+                if match:
+                    self.label_count = max(self.label_count, int(match.group(1)) + 1)
+
+    def new_temp(self) -> str:
+        temp_name = f"{TEMP_PREFIX}{self.temp_count}"
+        self.temp_count += 1
+        return temp_name
+
+    def new_label(self) -> str:
+        label_name = f"L{self.label_count}"
+        self.label_count += 1
+        return label_name
+
+
+# ============== 基本块 ==============
+class BasicBlock:
+    """函数内的基本块 [start, end)，succs 为后继块的下标"""
+    def __init__(self, start: int, end: int):
+        self.start = start
+        self.end = end
+        self.succs: List[int] = []
+        self.preds: List[int] = []
+
+    def __repr__(self):
+        return f"BasicBlock({self.start}, {self.end}, succs={self.succs})"
+
+
+def build_blocks(func: List[Instruction]) -> List[BasicBlock]:
+    """把单个函数的指令划分为基本块并连接控制流边"""
+    leaders = {0}
+    for index, instr in enumerate(func):
+        if isinstance(instr, Label):
+            leaders.add(index)
+        elif ends_block(instr) and index + 1 < len(func):
+            leaders.add(index + 1)
+    starts = sorted(leaders)
+    blocks = [BasicBlock(s, e) for s, e in zip(starts, starts[1:] + [len(func)])]
+    block_of = {func[block.start].name: i for i, block in enumerate(blocks) if isinstance(func[block.start], Label)}
+    for i, block in enumerate(blocks):
+        last = func[block.end - 1]
+        for target in jump_targets(last):
+            if target in block_of:
+                block.succs.append(block_of[target])
+        if falls_through(last) and i + 1 < len(blocks):
+            block.succs.append(i + 1)
+    for i, block in enumerate(blocks):
+        for succ in block.succs:
+            blocks[succ].preds.append(i)
+    return blocks
+
+
+def reachable_blocks(blocks: List[BasicBlock]) -> List[bool]:
+    reachable = [False] * len(blocks)
+    stack = [0] if blocks else []
+    while stack:
+        i = stack.pop()
+        if reachable[i]:
+            continue
+        reachable[i] = True
+        stack.extend(blocks[i].succs)
+    return reachable
+
+
+def reverse_postorder(blocks: List[BasicBlock]) -> List[int]:
+    """从入口块可达的基本块按逆后序排列：除回边外，每个块都排在它的前驱之后"""
+    order: List[int] = []
+    visited = [False] * len(blocks)
+    stack = [(0, iter(blocks[0].succs))] if blocks else []
+    if blocks:
+        visited[0] = True
+    while stack:
+        i, succs = stack[-1]
+        for succ in succs:
+            if not visited[succ]:
+                visited[succ] = True
+                stack.append((succ, iter(blocks[succ].succs)))
+                break
+        else:
+            stack.pop()
+            order.append(i)
+    order.reverse()
+    return order
+
+
+# ============== 循环 ==============
+class Loop:
+    """由回边 goto 确定的循环区间：instructions[header] 为循环头标签，instructions[latch] 为回边"""
+    def __init__(self, header: int, latch: int):
+        self.header = header
+        self.latch = latch
+
+    def contains(self, index: int) -> bool:
+        return self.header <= index <= self.latch
+
+    def __repr__(self):
+        return f"Loop({self.header}, {self.latch})"
+
+
+def find_loops(instructions: List[Instruction], start: int, end: int) -> List[Loop]:
+    """找出 [start, end) 内的单入口循环，内层循环排在前面"""
+    labels = label_positions(instructions, start, end)
+    loops = []
+    for index in range(start, end):
+        instr = instructions[index]
+        if not (isinstance(instr, TACInstruction) and instr.opcode == 'goto'):
+            continue
+        header = labels.get(instr.arg1)
+        if header is not None and header < index and is_single_entry(instructions, header, index, start, end):
+            loops.append(Loop(header, index))
+    loops.sort(key=lambda loop: loop.latch - loop.header)
+    return loops
+
+
+def is_single_entry(instructions: List[Instruction], header: int, latch: int, start: int, end: int) -> bool:
+    """循环区间外没有跳入循环内部（包括循环头）的指令"""
+    inner_labels = {instructions[i].name for i in range(header, latch + 1) if isinstance(instructions[i], Label)}
+    for i in range(start, end):
+        if header <= i <= latch:
+            continue
+        if any(target in inner_labels for target in jump_targets(instructions[i])):
+            return False
+    return True
@@ -0,0 +1,216 @@
+from collections import Counter
+from typing import List, Optional
+
+from codegenerator.intermediate_code import TACInstruction, Label, IntermediateCode
+from vm.profile import ExecutionProfile
+from .constant_propagation import ConstantPropagation
+from .tac_utils import (COMPARISON_OPS, Instruction, Loop, NameAllocator, constant_value, evaluate_binary,
+                        find_loops, increment_step, instr_def, instr_uses, is_int_constant, is_temp,
+                        is_variable, jump_targets, rebuild, retarget, split_functions)
+
+# 比较指令 -> 它在虚拟机中实际判断的关系（通用的 == / != 在虚拟机中是反转的）
+RELATIONS = {'<': '<', '<=': '<=', '>': '>', '>=': '>=', '==': '!=', '!=': '=='}
+RELATIONS.update((prefix + name, op) for prefix in ('i', 'f')
+                 for name, op in (('lt', '<'), ('le', '<='), ('gt', '>'), ('ge', '>='), ('eq', '=='), ('ne', '!=')))
+# 交换比较两边的操作数后的关系
+SWAPPED = {'<': '>', '>': '<', '<=': '>=', '>=': '<='}
+
+
+class CountedLoop:
+    """形如 for (i = start; 条件; i = i + step) 的计数循环在三地址码中的各个部分"""
+    def __init__(self, loop: Loop, var: str, start: int, step: int, trip_count: Optional[int],
+                 body: List[Instruction], update: List[Instruction], exit_label: str):
+        self.loop = loop
+        self.var = var
+        self.start = start
+        self.step = step
+        self.trip_count = trip_count      # None 表示循环不会退出
+        self.body = body                  # 退出判断之后、自增之前的指令
+        self.update = update              # 自增指令
+        self.exit_label = exit_label
+
+
+class LoopUnroller:
+    """计数循环展开
+
+    要求循环变量的初值、步长和退出条件的比较对象都是整数常量（因此应在常量传播之后运行）。
+    迭代次数不超过 max_full_trip 的循环完全展开；更大的计数循环按 factor 部分展开，
+    余下的迭代仍由原循环执行。展开后的循环体总规模受 size_limit 限制，
+    每次展开后对函数重新做常量传播，使展开出的常量能继续展开内层循环。
+    给出执行剖析时只部分展开热点循环，展开因子提高到 hot_factor。
+    """
+    name = 'unroll'
+    uses_profile = True
+
+    def __init__(self, max_full_trip: int = 16, factor: int = 4, size_limit: int = 256,
+                 max_function_size: int = 2000, max_rounds: int = 50, hot_factor: int = 8,
+                 profile: Optional[ExecutionProfile] = None):
+        self.max_full_trip = max_full_trip
+        self.factor = factor
+        self.size_limit = size_limit
+        self.max_function_size = max_function_size
+        self.max_rounds = max_rounds
+        self.hot_factor = hot_factor
+        self.hot_loops = profile.hot_loops() if profile is not None else None
+        self.folder = ConstantPropagation()
+
+    def run(self, code: IntermediateCode) -> IntermediateCode:
+        instructions = list(code.instructions)
+        names = NameAllocator(instructions)
+        done = set()  # 已部分展开过的循环头，避免重复展开余数循环
+        for _ in range(self.max_rounds):
+            changed = False
+            for start, end in split_functions(instructions):
+                func = instructions[start:end]
+                for loop in find_loops(func, 0, len(func)):
+                    new_func = self.unroll(func, loop, names, done)
+                    if new_func is not None:
+                        instructions[start:end] = self.folder.optimize_function(new_func)
+                        changed = True
+                        break
+                if changed:
+                    break
+            if not changed:
+                break
+        return rebuild(code, instructions)
+
+    # ============== 识别计数循环 ==============
+    def match(self, func: List[Instruction], loop: Loop) -> Optional[CountedLoop]:
+        header, latch = loop.header, loop.latch
+        if latch - header < 4:
+            return None
+        test, branch = func[header + 1], func[header + 2]
+        if not (isinstance(test, TACInstruction) and test.opcode in COMPARISON_OPS
+                and isinstance(branch, TACInstruction) and branch.opcode == 'if_goto'
+                and branch.arg1 == test.result and is_temp(test.result)):
+            return None
+
+        # 退出标签须紧跟在回边之后
+        exit_label = branch.arg2
+        following = latch + 1
+        while following < len(func) and isinstance(func[following], Label) and func[following].name != exit_label:
+            following += 1
+        if following >= len(func) or not isinstance(func[following], Label):
+            return None
+
+        if is_variable(test.arg1) and is_int_constant(test.arg2):
+            var = test.arg1
+        elif is_variable(test.arg2) and is_int_constant(test.arg1):
+            var = test.arg2
+        else:
+            return None
+
+        # 自增：var = var + c 或 t = var + c; var = t，位于回边之前
+        update_start = latch - 1
+        step = increment_step(func[latch - 1], var)
+        if step is None or instr_def(func[latch - 1]) != var:
+            last, prev = func[latch - 1], func[latch - 2]
+            if not (isinstance(last, TACInstruction) and last.opcode == 'assign' and last.result == var
+                    and is_temp(last.arg1) and instr_def(prev) == last.arg1):
+                return None
+            step = increment_step(prev, var)
+            update_start = latch - 2
+        if not step:
+            return None
+
+        body = func[header + 3:update_start]
+        update = func[update_start:latch]
+        body_labels = {instr.name for instr in body if isinstance(instr, Label)}
+        for instr in body:
+            if instr_def(instr) == var:
+                return None
+            if any(target not in body_labels and target != exit_label for target in jump_targets(instr)):
+                return None
+        # 退出判断的结果（表达式临时变量）在循环内只被该 if_goto 使用
+        uses = Counter(use for instr in func[header:latch + 1] for use in instr_uses(instr))
+        if uses[test.result] != 1 or any(instr_def(instr) == test.result for instr in body + update):
+            return None
+
+        start = self.initial_value(func, header, var)
+        if start is None:
+            return None
+        return CountedLoop(loop, var, start, step, self.trip_count(test, var, start, step),
+                           body, update, exit_label)
+
+    def initial_value(self, func: List[Instruction], header: int, var: str) -> Optional[int]:
+        """循环头之前同一基本块中对 var 的最后一次赋值必须是整数常量"""
+        for index in range(header - 1, -1, -1):
+            instr = func[index]
+            if isinstance(instr, Label) or jump_targets(instr):
+                return None
+            if instr_def(instr) == var:
+                if instr.opcode == 'assign' and is_int_constant(instr.arg1):
+                    return constant_value(instr.arg1)
+                return None
+        return None
+
+    def trip_count(self, test: TACInstruction, var: str, start: int, step: int) -> Optional[int]:
+        """退出条件第一次成立前执行的迭代次数，由初值、步长和比较常量直接算出；循环不会退出时为 None"""
+        relation = RELATIONS.get(test.opcode)
+        if test.arg1 == var:
+            bound = constant_value(test.arg2)
+        else:
+            bound = constant_value(test.arg1)
+            relation = SWAPPED.get(relation, relation)
+        stride = abs(step)
+        distance = bound - start if step > 0 else start - bound  # 沿步进方向到 bound 的距离
+        if relation == '==':
+            return distance // stride if distance >= 0 and distance % stride == 0 else None
+        if relation == '!=':
+            return 0 if distance != 0 else 1
+        if relation not in SWAPPED:
+            return None
+        if relation not in (('>', '>=') if step > 0 else ('<', '<=')):
+            # 远离 bound 步进：要么一开始就退出，要么永不退出
+            return 0 if evaluate_binary(relation, start, bound) else None
+        if relation in ('>', '<'):
+            distance += 1
+        return max(-(-distance // stride), 0)
+
+    # ============== 展开 ==============
+    def unroll(self, func: List[Instruction], loop: Loop, names: NameAllocator, done: set) -> Optional[List[Instruction]]:
+        counted = self.match(func, loop)
+        if counted is None or func[loop.header].name in done:
+            return None
+        body_size = sum(1 for instr in counted.body + counted.update if isinstance(instr, TACInstruction))
+        trip = counted.trip_count
+        before, after = func[:loop.header], func[loop.latch + 1:]
+
+        if trip is not None and trip <= self.max_full_trip and trip * body_size <= self.size_limit:
+            if len(func) + trip * body_size > self.max_function_size:
+                return None
+            unrolled: List[Instruction] = []
+            for _ in range(trip):
+                unrolled.extend(self.copy_iteration(counted, names))
+            return before + unrolled + after
+
+        copies = self.unroll_factor(func[loop.latch])
+        if trip is None or copies < 2 or trip // copies == 0 or copies * body_size > self.size_limit \
+                or len(func) + copies * body_size > self.max_function_size:
+            return None
+        # 展开后的循环执行 trip // factor 次，每次 factor 个迭代；剩余迭代交给原循环
+        limit = counted.start + (trip // copies) * copies * counted.step
+        unrolled_header, remainder = names.new_label(), names.new_label()
+        reached = names.new_temp()
+        unrolled = [
+            Label(name=unrolled_header),
+            TACInstruction(opcode='>=' if counted.step > 0 else '<=', arg1=counted.var, arg2=str(limit), result=reached),
+            TACInstruction(opcode='if_goto', arg1=reached, arg2=remainder),
+        ]
+        for _ in range(copies):
+            unrolled.extend(self.copy_iteration(counted, names))
+        unrolled.append(TACInstruction(opcode='goto', arg1=unrolled_header))
+        unrolled.append(Label(name=remainder))
+        done.add(func[loop.header].name)
+        return before + unrolled + func[loop.header:loop.latch + 1] + after
+
+    def unroll_factor(self, back_edge: TACInstruction) -> int:
+        """部分展开的因子：没有剖析时统一为 factor，有剖析时冷循环不展开"""
+        if self.hot_loops is None:
+            return self.factor
+        return self.hot_factor if getattr(back_edge, 'site', None) in self.hot_loops else 0
+
+    def copy_iteration(self, counted: CountedLoop, names: NameAllocator) -> List[Instruction]:
+        """复制一次迭代（循环体 + 自增），循环体内的标签重新命名"""
+        labels = {instr.name: names.new_label() for instr in counted.body if isinstance(instr, Label)}
+        return [retarget(instr, labels) for instr in counted.body + counted.update]
@@ -1,27 +1,31 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from typing import List, Optional, Union
 
 # 基础节点类
+# 节点都用 __slots__ 保存字段，没有逐个实例的 __dict__；
+# resolved_type 由语义分析写入表达式节点，未写入时读取会抛出 AttributeError（用 getattr 的默认值读取）
 class ASTNode:
+    __slots__ = ('resolved_type',)
+
     def to_dict(self):
         """将 AST 节点转换为字典表示"""
         return {
             'type': self.__class__.__name__,
-            'data': self.__dict__
+            'data': {field.name: getattr(self, field.name) for field in fields(self)}
         }
 
 # 程序节点，包含多个声明
-@dataclass
+@dataclass(slots=True)
 class Program(ASTNode):
     declarations: List[ASTNode]
 
 # 导入语句
-@dataclass
+@dataclass(slots=True)
 class ImportStatement(ASTNode):
     modules: List[str]
 
 # 函数定义
-@dataclass
+@dataclass(slots=True)
 class FunctionDecl(ASTNode):
     return_type: str
     name: str
@@ -29,20 +33,20 @@ class FunctionDecl(ASTNode):
     body: 'CompoundStmt'
 
 # 参数
-@dataclass
+@dataclass(slots=True)
 class Parameter(ASTNode):
     type: str
     name: str
 
 # 变量声明
-@dataclass
+@dataclass(slots=True)
 class VarDecl(ASTNode):
     var_type: str
     name: str
     init_value: Optional['Expression'] = None
 
 # 数组声明
-@dataclass
+@dataclass(slots=True)
 class ArrayDecl(ASTNode):
     var_type: str
     name: str
@@ -50,78 +54,78 @@ class ArrayDecl(ASTNode):
     init_values: Optional[List['Expression']] = None
 
 # 复合语句（块）
-@dataclass
+@dataclass(slots=True)
 class CompoundStmt(ASTNode):
     statements: List[ASTNode]
 
 # 返回语句
-@dataclass
+@dataclass(slots=True)
 class ReturnStmt(ASTNode):
     expr: 'Expression'
 
 # 表达式语句
-@dataclass
+@dataclass(slots=True)
 class ExpressionStmt(ASTNode):
     expression: 'Expression'
 
 # 注释
-@dataclass
+@dataclass(slots=True)
 class Comment(ASTNode):
     value: str
 
 # 二元表达式
-@dataclass
+@dataclass(slots=True)
 class BinaryOp(ASTNode):
     left: 'Expression'
     operator: str
     right: 'Expression'
 
 # 一元表达式
+@dataclass(slots=True)
 class UnaryOp(ASTNode):
-    def __init__(self, operator: str, operand: "Expression", is_prefix: bool = False):
-        self.operator = operator
-        self.operand = operand
-        self.is_prefix = is_prefix
+    operator: str
+    operand: 'Expression'
+    is_prefix: bool = False
 
 # 字面量
-@dataclass
+@dataclass(slots=True)
 class Literal(ASTNode):
     type: str
     value: Union[int, float, bool, str, None]
 
 # 变量引用
-@dataclass
+@dataclass(slots=True)
 class Variable(ASTNode):
     name: str
 
 # 函数调用
-@dataclass
+@dataclass(slots=True)
 class FunctionCall(ASTNode):
     name: str
     arguments: List['Expression']
 
 # 赋值语句
-@dataclass
+@dataclass(slots=True)
 class Assignment(ASTNode):
     target: 'Expression'
     operator: str  # '=', '+=', '-=', etc.
     value: 'Expression'
 
 # 条件语句（if-elif-else）
-@dataclass
+@dataclass(slots=True)
 class IfStmt(ASTNode):
     condition: 'Expression'
     then_branch: 'CompoundStmt'
     elif_branches: List['ElifBranch']
     else_branch: Optional['CompoundStmt'] = None
 
-@dataclass
+@dataclass(slots=True)
 class ElifBranch(ASTNode):
     condition: 'Expression'
     body: 'CompoundStmt'
 
 # 循环语句（for）
-@dataclass
+@dataclass(slots=True)
 class ForStmt(ASTNode):
     initializer: Optional[ASTNode]
     condition: Optional['Expression']
@@ -129,43 +133,43 @@ class ForStmt(ASTNode):
     body: 'CompoundStmt'
 
 # 循环控制语句
-@dataclass
+@dataclass(slots=True)
 class BreakStmt(ASTNode):
     pass
 
-@dataclass
+@dataclass(slots=True)
 class ContinueStmt(ASTNode):
     pass
 
 # 数组访问
-@dataclass
+@dataclass(slots=True)
 class ArrayAccess(ASTNode):
     array: 'Expression'
     index: 'Expression'
 
 # 表达式基类
 class Expression(ASTNode):
-    pass
+    __slots__ = ()
 
 # 元组字面量
-@dataclass
+@dataclass(slots=True)
 class TupleLiteral(Expression):
     elements: List['Expression']
 
 # 列表字面量
-@dataclass
+@dataclass(slots=True)
 class ListLiteral(Expression):
     elements: List['Expression']
 
 
-@dataclass
+@dataclass(slots=True)
 class ClassDecl(ASTNode):
     name: str
     base_class: Optional[str]  # 基类名称，支持单继承
     members: List[ASTNode]      # 类的成员变量和方法
 
 
-@dataclass
+@dataclass(slots=True)
 class MemberVarDecl(ASTNode):
     var_type: str
     name: str
@@ -173,7 +177,7 @@ class MemberVarDecl(ASTNode):
     is_public: bool = False  # 根据命名约定决定
 
 
-@dataclass
+@dataclass(slots=True)
 class MemberFunctionDecl(ASTNode):
     return_type: str
     name: str
@@ -181,18 +185,19 @@ class MemberFunctionDecl(ASTNode):
     body: 'CompoundStmt'
     is_public: bool = False  # 根据命名约定决定
 # 元素访问表达式
-@dataclass
+@dataclass(slots=True)
 class IndexAccess(Expression):
     collection: Expression  # 被访问的集合（tuple 或 list）
     index: Expression       # 索引表达式
     
     
 
+@dataclass(slots=True)
 class LibraryCall(ASTNode):
     """表示库函数调用"""
-    def __init__(self, name: str, arguments: List[ASTNode]):
-        self.name = name
-        self.arguments = arguments
+    name: str
+    arguments: List[ASTNode]
+
     def to_dict(self):
         return {
             'type': self.__class__.__name__,
@@ -0,0 +1,168 @@
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import List, Optional
+
+from lexer.lexer import Lexer
+from lexer.position import LineIndex
+from lexer.stream import UNFINISHED_STARTS
+from lexer.token import Token, TokenType
+from .ast_nodes import ClassDecl, FunctionDecl, Program
+from .parser import Parser
+
+# 可以单独重新解析的顶层声明
+REPARSEABLE = (FunctionDecl, ClassDecl)
+
+
+def token_offset(token: Token) -> int:
+    return token.offset
+
+
+def token_end(token: Token) -> int:
+    return token.offset + len(token.value)
+
+
+def run_start(code: str, offset: int) -> int:
+    """offset 之前连续的单词字符以及 . + - 的起点
+
+    标识符和数字的匹配（包括失败后回退为较短 token 的尝试）会一直查看到这样一段字符之后，
+    因此编辑处之前的整段字符都可能切分不同。
+    """
+    start = offset
+    while start > 0 and (code[start - 1].isalnum() or code[start - 1] in '_.+-'):
+        start -= 1
+    return start
+
+
+def unfinished_offsets(tokens: List[Token], lo: int, hi: int) -> List[int]:
+    """tokens[lo:hi] 中未闭合的字符串（单独的引号）和块注释（相邻的 / 和 *）开头的偏移"""
+    offsets = []
+    for k in range(lo, hi):
+        token = tokens[k]
+        if token.type == TokenType.ERROR and token.value in UNFINISHED_STARTS:
+            offsets.append(token.offset)
+        elif token.value == '/' and k + 1 < len(tokens):
+            following = tokens[k + 1]
+            if following.value.startswith('*') and following.offset == token.offset + 1:
+                offsets.append(token.offset)
+    return offsets
+
+
+class IncrementalParser:
+    """编辑器用的增量前端：对源代码的每次编辑只重新分析受影响的部分
+
+    词法：从编辑位置（及其前面紧挨着的一段标识符、数字字符）之前的一个 token 开始重新扫描，
+    直到扫描到编辑区之后、与旧 token 起始位置（按编辑的长度变化平移后）重合的 token 为止。此后的源代码与编辑前相同，
+    扫描又只依赖当前位置和前一个字符，所以剩下的旧 token 平移偏移后即可复用。
+    之前若有未闭合的字符串或块注释开头，编辑可能使它闭合，从那里开始重新扫描。
+
+    语法：记录每个顶层声明的第一个 token。若变化的 token 都在同一个 FunctionDecl / ClassDecl 内，
+    只从该声明的第一个 token 重新解析一个声明，并要求它恰好在下一个声明（复用的 token）之前结束，
+    然后替换 Program.declarations 中的对应项；否则重新解析整个程序。
+    编辑过程中的语法错误同样只需重新解析出错的声明就能报告。
+    """
+    def __init__(self, code: str):
+        self.code = code
+        self.lines = LineIndex(code)  # 所有 token 共用，编辑后原地更新
+        self.tokens: List[Token] = Lexer(code, self.lines).tokenize()
+        self.unfinished = unfinished_offsets(self.tokens, 0, len(self.tokens))
+        self.program: Optional[Program] = None
+        self.bounds: List[Token] = []            # 各顶层声明的第一个 token，最后是 EOF
+        self.broken: Optional[int] = None       # 最近一次解析出错的声明
+        # 最近一次编辑的统计
+        self.relexed_tokens = len(self.tokens)
+        self.reused_tokens = 0
+        self.reparsed: Optional[str] = None     # 重新解析的声明名；None 表示整个程序
+        self.parse_all()
+
+    def edit(self, offset: int, removed: int, inserted: str) -> Program:
+        """把 code[offset:offset+removed] 替换为 inserted，返回更新后的 Program"""
+        old_tokens = self.tokens
+        delta = len(inserted) - removed
+        first = max(bisect_left(old_tokens, run_start(self.code, offset), key=token_end) - 1, 0)
+        self.code = self.code[:offset] + inserted + self.code[offset + removed:]
+        self.lines.update(self.code)
+
+        restart = min(old_tokens[first].offset, offset)
+        if self.unfinished and self.unfinished[0] < restart:
+            restart = self.unfinished[0]
+            first = bisect_left(old_tokens, restart, key=token_offset)
+        first_offset = old_tokens[first].offset
+
+        inserted_end = offset + len(inserted)
+        relexed: List[Token] = []
+        resume = len(old_tokens)
+        for token in Lexer(self.code, self.lines).iter_tokens(restart):
+            if token.offset > inserted_end:
+                k = bisect_left(old_tokens, token.offset - delta, key=token_offset)
+                if k < len(old_tokens) and old_tokens[k].offset == token.offset - delta:
+                    resume = k
+                    break
+            relexed.append(token)
+
+        reused = old_tokens[resume:]
+        # 未闭合的开头：重新扫描的区间（及其前一个 token）重新查找，之前的不变，之后的平移
+        before = old_tokens[first - 1].offset if first else restart
+        after = reused[0].offset if reused else None
+        kept_before = [o for o in self.unfinished if o < before]
+        kept_after = [o + delta for o in self.unfinished if after is not None and o >= after]
+        for token in reused:
+            token.offset += delta
+        self.tokens = old_tokens[:first] + relexed + reused
+        self.unfinished = (kept_before + unfinished_offsets(self.tokens, max(first - 1, 0), first + len(relexed))
+                           + kept_after)
+        self.relexed_tokens = len(relexed)
+        self.reused_tokens = first + len(reused)
+
+        self.reparse(first, first_offset)
+        return self.program
+
+    # ============== 语法分析 ==============
+    def reparse(self, first: int, first_offset: int) -> None:
+        """从 tokens[first] 开始的 token 被替换（替换前 tokens[first] 的偏移为 first_offset）"""
+        if self.program is not None:
+            k = bisect_right(self.bounds, first_offset, key=token_offset) - 1  # 包含 tokens[first] 的声明
+            if 0 <= k < len(self.program.declarations) and self.broken in (None, k) \
+                    and isinstance(self.program.declarations[k], REPARSEABLE):
+                start = self.bounds[k]
+                start = first if start.offset == first_offset else self.index_of(start)
+                if self.parse_one(k, start):
+                    return
+        self.parse_all()
+
+    def parse_one(self, k: int, start: int) -> bool:
+        """从 tokens[start] 重新解析第 k 个声明，恰好在下一个声明之前结束时替换它
+
+        之前的声明没有变化且都解析成功，整体解析会在这里遇到同样的第一个错误，因此直接抛出；
+        此时 program 中第 k 个声明保留上一次的结果，之后的编辑仍落在它之内时继续只解析它。
+        """
+        self.bounds[k] = self.tokens[start]
+        parser = Parser(islice(self.tokens, start, None))
+        try:
+            decl = parser.declaration()
+        except Exception:
+            self.broken = k
+            raise
+        # 下一个声明的第一个 token 被替换时不会再出现在 tokens 中，只能整体重新解析
+        if parser.current_token is not self.bounds[k + 1] or not isinstance(decl, REPARSEABLE):
+            return False
+        self.program.declarations[k] = decl
+        self.broken = None
+        self.reparsed = decl.name
+        return True
+
+    def parse_all(self) -> None:
+        """解析整个程序并记录各顶层声明的第一个 token；出错时 program 置为 None，下次编辑整体重新解析"""
+        self.program = None
+        self.bounds = []
+        self.broken = None
+        self.reparsed = None
+        parser = Parser(self.tokens)
+        declarations = []
+        while parser.current_token.type != TokenType.EOF:
+            self.bounds.append(parser.current_token)
+            declarations.append(parser.declaration())
+        self.bounds.append(parser.current_token)
+        self.program = Program(declarations)
+
+    def index_of(self, token: Token) -> int:
+        return bisect_left(self.tokens, token.offset, key=token_offset)
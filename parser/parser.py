@@ -1,6 +1,30 @@
-from typing import List, Optional, Union
+from collections import deque
+from sys import intern
+from typing import Iterable, Iterator, List, Optional, Union
 from .ast_nodes import *
 from lexer.token import Token, TokenType
+from lexer.token_array import TokenArray
+
+# 二元运算符的优先级（数值越大结合越紧），全部左结合
+BINARY_PRECEDENCE = {
+    '||': 1,
+    '&&': 2,
+    '==': 3, '!=': 3,
+    '<': 4, '>': 4, '<=': 4, '>=': 4,
+    '+': 5, '-': 5,
+    '*': 6, '/': 6, '%': 6,
+}
+
+ASSIGNMENT_OPERATORS = ('=', '+=', '-=', '*=', '/=')
+
+# 字面量 token -> (Literal 的类型, 值的转换)
+LITERAL_TYPES = {
+    TokenType.INTEGER_LITERAL: ('int', int),
+    TokenType.FLOAT_LITERAL: ('float', float),
+    TokenType.BOOLEAN_LITERAL: ('bool', lambda value: value == 'true'),
+    TokenType.STRING_LITERAL: ('str', lambda value: value.strip('"').strip("'")),
+}
+
 
 class ParserError(Exception):
     def __init__(self, message, token):
@@ -9,11 +33,57 @@ class ParserError(Exception):
         )
 
 
-class Parser:
-    def __init__(self, tokens: List["Token"]):
+class TokenBuffer:
+    """按需从 token 迭代器读取的前瞻缓冲区
+
+    只保存当前 token 和通过 peek 预读的 token，已消费的 token 随即丢弃，
+    因此配合 StreamLexer 时内存占用与前瞻长度而不是源文件大小成正比。
+    """
+    def __init__(self, tokens: Iterable[Token]):
+        self.source: Iterator[Token] = iter(tokens)
+        self.buffer = deque()
+
+    def peek(self, k: int = 0) -> Optional[Token]:
+        """当前 token 之后第 k 个 token（k=0 为当前 token），超出输入时返回 None"""
+        while len(self.buffer) <= k:
+            token = next(self.source, None)
+            if token is None:
+                return None
+            self.buffer.append(token)
+        return self.buffer[k]
+
+    def advance(self) -> Optional[Token]:
+        """消费当前 token，返回新的当前 token"""
+        if self.buffer:
+            self.buffer.popleft()
+        return self.peek()
+
+
+class TokenArrayCursor:
+    """TokenArray 上的游标，与 TokenBuffer 接口相同
+
+    只按下标前进，peek 时才为该位置创建 Token 对象；越过末尾的 EOF 后返回 None。
+    """
+    def __init__(self, tokens: TokenArray):
         self.tokens = tokens
-        self.current_token_index = 0
-        self.current_token = self.tokens[self.current_token_index]
+        self.index = 0
+
+    def peek(self, k: int = 0) -> Optional[Token]:
+        index = self.index + k
+        if index >= len(self.tokens):
+            return None
+        return self.tokens.token(index)
+
+    def advance(self) -> Optional[Token]:
+        self.index += 1
+        return self.peek()
+
+
+class Parser:
+    def __init__(self, tokens: Union[TokenArray, Iterable["Token"]]):
+        # tokens 可以是按列存储的 TokenArray、Token 列表，或 StreamLexer 这样逐个产生 token 的迭代器
+        self.tokens = TokenArrayCursor(tokens) if isinstance(tokens, TokenArray) else TokenBuffer(tokens)
+        self.current_token = self.tokens.peek()
 
     def error(self, message):
         raise ParserError(message, self.current_token)
@@ -29,16 +99,16 @@ class Parser:
         if self.current_token.type == token_type and (
             value is None or self.current_token.value == value
         ):
-            self.current_token_index += 1
-            if self.current_token_index < len(self.tokens):
-                self.current_token = self.tokens[self.current_token_index]
+            next_token = self.tokens.advance()
+            if next_token is not None:
+                self.current_token = next_token
             else:
                 # 如果已到达 tokens 列表末尾，设置为 EOF
                 self.current_token = Token(
                     TokenType.EOF,
                     "",
-                    self.current_token.line,
-                    self.current_token.column + 1,
+                    self.current_token.offset + 1,
+                    self.current_token.lines,
                 )
         else:
             expected = f"{token_type.name}" + (
@@ -53,22 +123,26 @@ class Parser:
     def program(self) -> Program:
         declarations = []
         while self.current_token.type != TokenType.EOF:
-            if self.current_token.type == TokenType.COMMENT:
-                declarations.append(self.comment())
-            elif self.current_token.type == TokenType.KEYWORD:
-                if self.current_token.value == "import":
-                    declarations.append(self.import_statement())
-                elif self.current_token.value == "fn":
-                    declarations.append(self.function_decl())
-                elif self.current_token.value == "class":
-                    declarations.append(self.class_decl())
-                else:
-                    self.error(
-                        f"Unexpected keyword '{self.current_token.value}' at top level"
-                    )
-            else:
-                self.error("Invalid statement at top level")
+            declarations.append(self.declaration())
         return Program(declarations)
+
+    def declaration(self) -> ASTNode:
+        """一个顶层声明：注释、导入、函数或类"""
+        if self.current_token.type == TokenType.COMMENT:
+            return self.comment()
+        elif self.current_token.type == TokenType.KEYWORD:
+            if self.current_token.value == "import":
+                return self.import_statement()
+            elif self.current_token.value == "fn":
+                return self.function_decl()
+            elif self.current_token.value == "class":
+                return self.class_decl()
+            else:
+                self.error(
+                    f"Unexpected keyword '{self.current_token.value}' at top level"
+                )
+        else:
+            self.error("Invalid statement at top level")
     def class_decl(self) -> ClassDecl:
         self.eat(TokenType.KEYWORD, 'class')
         if self.current_token.type != TokenType.IDENTIFIER:
@@ -368,7 +442,7 @@ class Parser:
             ):
                 initializer = self.var_decl()
             else:
-                initializer = self.assignment()
+                initializer = self.expression()
         else:
             self.eat(TokenType.OPERATOR, ";")
 
@@ -393,7 +467,10 @@ class Parser:
         body = self.compound_statement()
         return ForStmt(initializer, condition, update, body)
     def parse_type(self) -> str:
-        """解析类型，包括泛型类型如 list<int>, tuple<int, str, float>"""
+        """解析类型，包括泛型类型如 list<int>, tuple<int, str, float>
+
+        拼出的泛型类型字符串经过 intern，相同类型的声明共用同一个字符串对象。
+        """
         if self.current_token.type != TokenType.KEYWORD and self.current_token.type != TokenType.IDENTIFIER:
             self.error("Expected type name")
 
@@ -418,10 +495,10 @@ class Parser:
             # 构建完整的类型字符串
             if base_type == 'tuple':
                 # 元组类型需要保留所有类型参数
-                return f"tuple<{', '.join(type_params)}>"
+                return intern(f"tuple<{', '.join(type_params)}>")
             else:
                 # 其他泛型类型（如list）只使用第一个类型参数
-                return f"{base_type}<{type_params[0]}>"
+                return intern(f"{base_type}<{type_params[0]}>")
         
         return base_type
     def parse_update_expression(self) -> Union[Assignment, UnaryOp, Expression]:
@@ -505,15 +582,6 @@ class Parser:
             # 期望表达式作为语句后跟分号
             self.optional_eat(TokenType.OPERATOR, ';')
             return ExpressionStmt(expr)
-    def assignment(self) -> Assignment:
-        expr = self.logical_or()
-        if isinstance(expr, Variable)  or isinstance(expr, IndexAccess):
-            if self.current_token.type == TokenType.OPERATOR and self.current_token.value in ['=', '+=', '-=', '*=', '/=']:
-                operator = self.current_token.value
-                self.eat(TokenType.OPERATOR, operator)
-                value = self.assignment()  # 允许链式赋值
-                return Assignment(expr, operator, value)
-        return expr
     def increment_statement(self) -> UnaryOp:
         """解析前缀自增/自减语句"""
         operator = self.current_token.value
@@ -522,107 +590,39 @@ class Parser:
         return UnaryOp(operator, operand, is_prefix=True)
 
     def expression(self) -> "Expression":
-        return self.assignment()
-
-    def logical_or(self) -> "Expression":
-        node = self.logical_and()
-        while (
-            self.current_token.type == TokenType.OPERATOR
-            and self.current_token.value == "||"
-        ):
-            op = self.current_token.value
-            self.eat(TokenType.OPERATOR, op)
-            right = self.logical_and()
-            node = BinaryOp(node, op, right)
-        return node
-
-    def logical_and(self) -> "Expression":
-        node = self.equality()
-        while (
-            self.current_token.type == TokenType.OPERATOR
-            and self.current_token.value == "&&"
-        ):
-            op = self.current_token.value
-            self.eat(TokenType.OPERATOR,op)
-            right = self.equality()
-            node = BinaryOp(node, op, right)
-        return node
-
-    def equality(self) -> "Expression":
-        node = self.relational()
-        while (
-            self.current_token.type == TokenType.OPERATOR
-            and self.current_token.value in ["==", "!="]
-        ):
-            op = self.current_token.value
-            self.eat(TokenType.OPERATOR, op)
-            right = self.relational()
-            node = BinaryOp(node, op, right)
-        return node
-
-    def relational(self) -> "Expression":
-        node = self.additive()
-        while (
-            self.current_token.type == TokenType.OPERATOR
-            and self.current_token.value in ["<", ">", "<=", ">="]
-        ):
-            op = self.current_token.value
-            self.eat(TokenType.OPERATOR, op)
-            right = self.additive()
-            node = BinaryOp(node, op, right)
-        return node
-    def comparison(self) -> Expression:
-        """解析比较表达式"""
-        expr = self.addition()
-        while self.current_token.type == TokenType.OPERATOR and self.current_token.value in ['<', '>', '<=', '>=']:
-            op = self.current_token.value
-            self.eat(TokenType.OPERATOR, op)
-            right = self.addition()
-            expr = BinaryOp(left=expr, operator=op, right=right)
-        return expr
-    def addition(self) -> Expression:
-        """解析加法和减法表达式"""
-        expr = self.multiplication()
-        while self.current_token.type == TokenType.OPERATOR and self.current_token.value in ['+', '-']:
-            op = self.current_token.value
-            self.eat(TokenType.OPERATOR, op)
-            right = self.multiplication()
-            expr = BinaryOp(left=expr, operator=op, right=right)
-        return expr
-
-    def multiplication(self) -> Expression:
-        """解析乘法和除法表达式"""
-        expr = self.unary()
-        while self.current_token.type == TokenType.OPERATOR and self.current_token.value in ['*', '/', '%']:
-            op = self.current_token.value
-            self.eat(TokenType.OPERATOR, op)
-            right = self.unary()
-            expr = BinaryOp(left=expr, operator=op, right=right)
+        """表达式：二元运算由 binary 按优先级解析，再检查是否是（可链式的）赋值"""
+        expr = self.binary()
+        if isinstance(expr, Variable) or isinstance(expr, IndexAccess):
+            if self.current_token.type == TokenType.OPERATOR and self.current_token.value in ASSIGNMENT_OPERATORS:
+                operator = self.current_token.value
+                self.eat(TokenType.OPERATOR, operator)
+                value = self.expression()  # 允许链式赋值
+                return Assignment(expr, operator, value)
         return expr
 
-    def additive(self) -> "Expression":
-        node = self.multiplicative()
-        while (
-            self.current_token.type == TokenType.OPERATOR
-            and self.current_token.value in ["+", "-"]
-        ):
-            op = self.current_token.value
-            self.eat(TokenType.OPERATOR, op)
-            right = self.multiplicative()
-            node = BinaryOp(node, op, right)
-        return node
+    def binary(self, min_precedence: int = 1) -> "Expression":
+        """优先级爬升：解析二元运算符优先级都不低于 min_precedence 的表达式
 
-    def multiplicative(self) -> "Expression":
-        node = self.unary()
-        while (
-            self.current_token.type == TokenType.OPERATOR
-            and self.current_token.value in ["*", "/", "%"]
-        ):
-            op = self.current_token.value
-            self.eat(TokenType.OPERATOR, op)
-            right = self.unary()
-            node = BinaryOp(node, op, right)
-        return node
+        运算符的优先级由 BINARY_PRECEDENCE 查表，全部左结合：右操作数只接受优先级更高的运算符。
+        字面量操作数直接在这里构造，不经过 unary / primary。运算符和变量名经过 intern，
+        逐个产生 token 的输入（不是 TokenArray）也不会为每个节点保留一份字符串。
+        """
+        token = self.current_token
+        literal = LITERAL_TYPES.get(token.type)
+        if literal is not None:
+            self.eat(token.type)
+            left = Literal(literal[0], literal[1](token.value))
+        else:
+            left = self.unary()
+        while True:
+            token = self.current_token
+            if token.type != TokenType.OPERATOR:
+                return left
+            precedence = BINARY_PRECEDENCE.get(token.value, 0)
+            if precedence < min_precedence:
+                return left
+            self.eat(TokenType.OPERATOR, token.value)
+            left = BinaryOp(left, intern(token.value), self.binary(precedence + 1))
 
     def unary(self) -> Expression:
         """解析一元表达式"""
@@ -638,18 +638,10 @@ class Parser:
         """解析基本表达式，包括变量、函数调用、字面量、列表和元组"""
         if self.current_token.type == TokenType.IDENTIFIER:
             return self.variable_or_function_call()
-        elif token.type == TokenType.INTEGER_LITERAL:
-            self.eat(TokenType.INTEGER_LITERAL)
-            return Literal("int", int(token.value))
-        elif token.type == TokenType.FLOAT_LITERAL:
-            self.eat(TokenType.FLOAT_LITERAL)
-            return Literal("float", float(token.value))
-        elif token.type == TokenType.BOOLEAN_LITERAL:
-            self.eat(TokenType.BOOLEAN_LITERAL)
-            return Literal("bool", token.value == "true")
-        elif token.type == TokenType.STRING_LITERAL:
-            self.eat(TokenType.STRING_LITERAL)
-            return Literal("str", token.value.strip('"').strip("'"))
+        elif token.type in LITERAL_TYPES:
+            literal_type, convert = LITERAL_TYPES[token.type]
+            self.eat(token.type)
+            return Literal(literal_type, convert(token.value))
         elif token.type == TokenType.IDENTIFIER:
             return self.variable_or_function_call()
         elif self.current_token.type == TokenType.OPERATOR and self.current_token.value == '(':
@@ -683,7 +675,7 @@ class Parser:
             self.error("Unexpected token in primary expression")
    
     def variable_or_function_call(self) -> Expression:
-        var_name = self.current_token.value
+        var_name = intern(self.current_token.value)
         self.eat(TokenType.IDENTIFIER)
         expr = Variable(name=var_name)
         while True:
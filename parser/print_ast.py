@@ -1,174 +1,218 @@
 from .ast_nodes import *
-def print_ast(node: ASTNode, indent: int = 0):
+from .visitor import NodeVisitor
+
+
+class ASTPrinter(NodeVisitor):
     """递归打印AST节点，使用缩进表示层级"""
-    prefix = '  ' * indent
-    if isinstance(node, Program):
-        print(f"{prefix}Program:")
+    def __init__(self, indent: int = 0):
+        self.indent = indent
+
+    def line(self, text: str):
+        print('  ' * self.indent + text)
+
+    def child(self, node: ASTNode, depth: int):
+        """比当前节点多缩进 depth 层打印子节点"""
+        self.indent += depth
+        self.visit(node)
+        self.indent -= depth
+
+    def generic_visit(self, node: ASTNode):
+        self.line(f"{type(node).__name__} not handled.")
+
+    def visit_Program(self, node: Program):
+        self.line("Program:")
         for decl in node.declarations:
-            print_ast(decl, indent + 1)
-    elif isinstance(node, ImportStatement):
-        print(f"{prefix}ImportStatement:")
-        print(f"{prefix}  modules: {node.modules}")
-    elif isinstance(node, ClassDecl):
+            self.child(decl, 1)
+
+    def visit_ImportStatement(self, node: ImportStatement):
+        self.line("ImportStatement:")
+        self.line(f"  modules: {node.modules}")
+
+    def visit_ClassDecl(self, node: ClassDecl):
         base = node.base_class if node.base_class else "None"
-        print(f"{prefix}ClassDecl:")
-        print(f"{prefix}  name: {node.name}")
-        print(f"{prefix}  base_class: {base}")
-        print(f"{prefix}  members:")
+        self.line("ClassDecl:")
+        self.line(f"  name: {node.name}")
+        self.line(f"  base_class: {base}")
+        self.line("  members:")
         for member in node.members:
-            print_ast(member, indent + 2)
-    elif isinstance(node, MemberVarDecl):
+            self.child(member, 2)
+
+    def visit_MemberVarDecl(self, node: MemberVarDecl):
         access = 'public' if node.is_public else 'private'
-        print(f"{prefix}MemberVarDecl (access: {access}):")
-        print(f"{prefix}  var_type: {node.var_type}")
-        print(f"{prefix}  name: {node.name}")
+        self.line(f"MemberVarDecl (access: {access}):")
+        self.line(f"  var_type: {node.var_type}")
+        self.line(f"  name: {node.name}")
         if node.init_value:
-            print(f"{prefix}  init_value:")
-            print_ast(node.init_value, indent + 2)
-    elif isinstance(node, MemberFunctionDecl):
+            self.line("  init_value:")
+            self.child(node.init_value, 2)
+
+    def visit_MemberFunctionDecl(self, node: MemberFunctionDecl):
         access = 'public' if node.is_public else 'private'
-        print(f"{prefix}MemberFunctionDecl (access: {access}):")
-        print(f"{prefix}  return_type: {node.return_type}")
-        print(f"{prefix}  name: {node.name}")
-        print(f"{prefix}  params:")
-        for param in node.params:
-            print_ast(param, indent + 2)
-        print(f"{prefix}  body:")
-        print_ast(node.body, indent + 2)
-    elif isinstance(node, FunctionDecl):
-        print(f"{prefix}FunctionDecl:")
-        print(f"{prefix}  return_type: {node.return_type}")
-        print(f"{prefix}  name: {node.name}")
-        print(f"{prefix}  params:")
+        self.line(f"MemberFunctionDecl (access: {access}):")
+        self.function_parts(node)
+
+    def visit_FunctionDecl(self, node: FunctionDecl):
+        self.line("FunctionDecl:")
+        self.function_parts(node)
+
+    def function_parts(self, node):
+        self.line(f"  return_type: {node.return_type}")
+        self.line(f"  name: {node.name}")
+        self.line("  params:")
         for param in node.params:
-            print_ast(param, indent + 2)
-        print(f"{prefix}  body:")
-        print_ast(node.body, indent + 2)
-    elif isinstance(node, Parameter):
-        print(f"{prefix}Parameter:")
-        print(f"{prefix}  type: {node.type}")
-        print(f"{prefix}  name: {node.name}")
-    elif isinstance(node, CompoundStmt):
-        print(f"{prefix}CompoundStmt:")
+            self.child(param, 2)
+        self.line("  body:")
+        self.child(node.body, 2)
+
+    def visit_Parameter(self, node: Parameter):
+        self.line("Parameter:")
+        self.line(f"  type: {node.type}")
+        self.line(f"  name: {node.name}")
+
+    def visit_CompoundStmt(self, node: CompoundStmt):
+        self.line("CompoundStmt:")
         for stmt in node.statements:
-            print_ast(stmt, indent + 1)
-    elif isinstance(node, VarDecl):
-        print(f"{prefix}VarDecl:")
-        print(f"{prefix}  var_type: {node.var_type}")
-        print(f"{prefix}  name: {node.name}")
+            self.child(stmt, 1)
+
+    def visit_VarDecl(self, node: VarDecl):
+        self.line("VarDecl:")
+        self.line(f"  var_type: {node.var_type}")
+        self.line(f"  name: {node.name}")
         if node.init_value:
-            print(f"{prefix}  init_value:")
-            print_ast(node.init_value, indent + 2)
-    elif isinstance(node, ArrayDecl):
-        print(f"{prefix}ArrayDecl:")
-        print(f"{prefix}  var_type: {node.var_type}")
-        print(f"{prefix}  name: {node.name}")
-        print(f"{prefix}  size:")
-        print_ast(node.size, indent + 2)
+            self.line("  init_value:")
+            self.child(node.init_value, 2)
+
+    def visit_ArrayDecl(self, node: ArrayDecl):
+        self.line("ArrayDecl:")
+        self.line(f"  var_type: {node.var_type}")
+        self.line(f"  name: {node.name}")
+        self.line("  size:")
+        self.child(node.size, 2)
         if node.init_values:
-            print(f"{prefix}  init_values:")
+            self.line("  init_values:")
             for val in node.init_values:
-                print_ast(val, indent + 2)
-    elif isinstance(node, ReturnStmt):
-        print(f"{prefix}ReturnStmt:")
-        print(f"{prefix}  expr:")
-        print_ast(node.expr, indent + 2)
-    elif isinstance(node, ExpressionStmt):
-        print(f"{prefix}ExpressionStmt:")
-        print_ast(node.expression, indent + 1)
-    elif isinstance(node, Comment):
-        print(f"{prefix}Comment:")
-        print(f"{prefix}  value: {node.value}")
-    elif isinstance(node, BinaryOp):
-        print(f"{prefix}BinaryOp:")
-        print(f"{prefix}  left:")
-        print_ast(node.left, indent + 2)
-        print(f"{prefix}  operator: {node.operator}")
-        print(f"{prefix}  right:")
-        print_ast(node.right, indent + 2)
-    elif isinstance(node, UnaryOp):
-        print(f"{prefix}UnaryOp:")
-        print(f"{prefix}  operator: {node.operator}")
-        print(f"{prefix}  operand:")
-        print_ast(node.operand, indent + 2)
-        print(f"{prefix}  is_prefix: {node.is_prefix}")
-    elif isinstance(node, Literal):
-        print(f"{prefix}Literal:")
-        print(f"{prefix}  type: {node.type}")
-        print(f"{prefix}  value: {node.value}")
-    elif isinstance(node, Variable):
-        print(f"{prefix}Variable:")
-        print(f"{prefix}  name: {node.name}")
-    elif isinstance(node, FunctionCall):
-        print(f"{prefix}FunctionCall:")
-        print(f"{prefix}  name: {node.name}")
-        print(f"{prefix}  arguments:")
+                self.child(val, 2)
+
+    def visit_ReturnStmt(self, node: ReturnStmt):
+        self.line("ReturnStmt:")
+        self.line("  expr:")
+        self.child(node.expr, 2)
+
+    def visit_ExpressionStmt(self, node: ExpressionStmt):
+        self.line("ExpressionStmt:")
+        self.child(node.expression, 1)
+
+    def visit_Comment(self, node: Comment):
+        self.line("Comment:")
+        self.line(f"  value: {node.value}")
+
+    def visit_BinaryOp(self, node: BinaryOp):
+        self.line("BinaryOp:")
+        self.line("  left:")
+        self.child(node.left, 2)
+        self.line(f"  operator: {node.operator}")
+        self.line("  right:")
+        self.child(node.right, 2)
+
+    def visit_UnaryOp(self, node: UnaryOp):
+        self.line("UnaryOp:")
+        self.line(f"  operator: {node.operator}")
+        self.line("  operand:")
+        self.child(node.operand, 2)
+        self.line(f"  is_prefix: {node.is_prefix}")
+
+    def visit_Literal(self, node: Literal):
+        self.line("Literal:")
+        self.line(f"  type: {node.type}")
+        self.line(f"  value: {node.value}")
+
+    def visit_Variable(self, node: Variable):
+        self.line("Variable:")
+        self.line(f"  name: {node.name}")
+
+    def visit_FunctionCall(self, node: FunctionCall):
+        self.line("FunctionCall:")
+        self.line(f"  name: {node.name}")
+        self.line("  arguments:")
         for arg in node.arguments:
-            print_ast(arg, indent + 2)
-    elif isinstance(node, Assignment):
-        print(f"{prefix}Assignment:")
-        print(f"{prefix}  target:")
-        print_ast(node.target, indent + 2)
-        print(f"{prefix}  operator: {node.operator}")
-        print(f"{prefix}  value:")
-        print_ast(node.value, indent + 2)
-    elif isinstance(node, IfStmt):
-        print(f"{prefix}IfStmt:")
-        print(f"{prefix}  condition:")
-        print_ast(node.condition, indent + 2)
-        print(f"{prefix}  then_branch:")
-        print_ast(node.then_branch, indent + 2)
+            self.child(arg, 2)
+
+    def visit_Assignment(self, node: Assignment):
+        self.line("Assignment:")
+        self.line("  target:")
+        self.child(node.target, 2)
+        self.line(f"  operator: {node.operator}")
+        self.line("  value:")
+        self.child(node.value, 2)
+
+    def visit_IfStmt(self, node: IfStmt):
+        self.line("IfStmt:")
+        self.line("  condition:")
+        self.child(node.condition, 2)
+        self.line("  then_branch:")
+        self.child(node.then_branch, 2)
         if node.elif_branches:
-            print(f"{prefix}  elif_branches:")
+            self.line("  elif_branches:")
             for elif_branch in node.elif_branches:
-                print_ast(elif_branch, indent + 2)
+                self.child(elif_branch, 2)
         if node.else_branch:
-            print(f"{prefix}  else_branch:")
-            print_ast(node.else_branch, indent + 2)
-    elif isinstance(node, ElifBranch):
-        print(f"{prefix}ElifBranch:")
-        print(f"{prefix}  condition:")
-        print_ast(node.condition, indent + 2)
-        print(f"{prefix}  body:")
-        print_ast(node.body, indent + 2)
-    elif isinstance(node, ForStmt):
-        print(f"{prefix}ForStmt:")
+            self.line("  else_branch:")
+            self.child(node.else_branch, 2)
+
+    def visit_ElifBranch(self, node: ElifBranch):
+        self.line("ElifBranch:")
+        self.line("  condition:")
+        self.child(node.condition, 2)
+        self.line("  body:")
+        self.child(node.body, 2)
+
+    def visit_ForStmt(self, node: ForStmt):
+        self.line("ForStmt:")
         if node.initializer:
-            print(f"{prefix}  initializer:")
-            print_ast(node.initializer, indent + 2)
+            self.line("  initializer:")
+            self.child(node.initializer, 2)
         if node.condition:
-            print(f"{prefix}  condition:")
-            print_ast(node.condition, indent + 2)
+            self.line("  condition:")
+            self.child(node.condition, 2)
         if node.update:
-            print(f"{prefix}  update:")
-            print_ast(node.update, indent + 2)
-        print(f"{prefix}  body:")
-        print_ast(node.body, indent + 2)
-    elif isinstance(node, BreakStmt):
-        print(f"{prefix}BreakStmt")
-    elif isinstance(node, ContinueStmt):
-        print(f"{prefix}ContinueStmt")
-    elif isinstance(node, ArrayAccess):
-        print(f"{prefix}ArrayAccess:")
-        print(f"{prefix}  array:")
-        print_ast(node.array, indent + 2)
-        print(f"{prefix}  index:")
-        print_ast(node.index, indent + 2)
-    elif isinstance(node, TupleLiteral):
-        print(f"{prefix}TupleLiteral:")
-        print(f"{prefix}  elements:")
+            self.line("  update:")
+            self.child(node.update, 2)
+        self.line("  body:")
+        self.child(node.body, 2)
+
+    def visit_BreakStmt(self, node: BreakStmt):
+        self.line("BreakStmt")
+
+    def visit_ContinueStmt(self, node: ContinueStmt):
+        self.line("ContinueStmt")
+
+    def visit_ArrayAccess(self, node: ArrayAccess):
+        self.line("ArrayAccess:")
+        self.line("  array:")
+        self.child(node.array, 2)
+        self.line("  index:")
+        self.child(node.index, 2)
+
+    def visit_TupleLiteral(self, node: TupleLiteral):
+        self.line("TupleLiteral:")
+        self.line("  elements:")
         for elem in node.elements:
-            print_ast(elem, indent + 2)
-    elif isinstance(node, ListLiteral):
-        print(f"{prefix}ListLiteral:")
-        print(f"{prefix}  elements:")
+            self.child(elem, 2)
+
+    def visit_ListLiteral(self, node: ListLiteral):
+        self.line("ListLiteral:")
+        self.line("  elements:")
         for elem in node.elements:
-            print_ast(elem, indent + 2)
-    elif isinstance(node, IndexAccess):
-        print(f"{prefix}IndexAccess:")
-        print(f"{prefix}  collection:")
-        print_ast(node.collection, indent + 2)
-        print(f"{prefix}  index:")
-        print_ast(node.index, indent + 2)
-    else:
-        print(f"{prefix}{type(node).__name__} not handled.")
+            self.child(elem, 2)
+
+    def visit_IndexAccess(self, node: IndexAccess):
+        self.line("IndexAccess:")
+        self.line("  collection:")
+        self.child(node.collection, 2)
+        self.line("  index:")
+        self.child(node.index, 2)
+
+
+def print_ast(node: ASTNode, indent: int = 0):
+    """递归打印AST节点，使用缩进表示层级"""
+    ASTPrinter(indent).visit(node)
@@ -0,0 +1,54 @@
+from dataclasses import fields
+from typing import Any, Callable, Dict, Iterator
+
+from .ast_nodes import ASTNode
+
+
+def child_nodes(node: ASTNode) -> Iterator[ASTNode]:
+    """按字段顺序给出节点的直接子节点"""
+    for field in fields(node):
+        value = getattr(node, field.name)
+        if isinstance(value, ASTNode):
+            yield value
+        elif isinstance(value, list):
+            yield from (item for item in value if isinstance(item, ASTNode))
+
+
+def walk(node: ASTNode) -> Iterator[ASTNode]:
+    """前序遍历子树（用显式栈，避免深层嵌套时递归过深）"""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(reversed(list(child_nodes(current))))
+
+
+class NodeVisitor:
+    """语法树访问者的基类：visit(node) 调用 visit_<节点类名>，没有对应方法时调用 generic_visit
+
+    每个访问者类有自己的分派表（节点类 -> 处理函数），某个节点类第一次出现时才按类名查找方法，
+    之后同类节点只需一次字典查找，不再拼接方法名和 getattr。
+    """
+    _dispatch: Dict[type, Callable[..., Any]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._dispatch = {}
+
+    def visit(self, node: ASTNode) -> Any:
+        handler = self._dispatch.get(node.__class__)
+        if handler is None:
+            handler = self.resolve(node.__class__)
+        return handler(self, node)
+
+    @classmethod
+    def resolve(cls, node_class: type) -> Callable[..., Any]:
+        """查找并缓存节点类的处理函数（未绑定的函数，调用时传入访问者）"""
+        handler = getattr(cls, f'visit_{node_class.__name__}', cls.generic_visit)
+        cls._dispatch[node_class] = handler
+        return handler
+
+    def generic_visit(self, node: ASTNode) -> Any:
+        """默认依次访问子节点"""
+        for child in child_nodes(node):
+            self.visit(child)
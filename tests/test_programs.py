@@ -0,0 +1,36 @@
+"""回归程序
+
+tests/programs 下的每个 .me 程序在各优化级别和并行编译下运行，输出须与同名的 .out 文件一致。
+用法（在仓库根目录）：python -m unittest discover tests
+"""
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PROGRAMS = Path(__file__).resolve().parent / 'programs'
+
+# 每个程序依次使用的编译选项
+FLAG_SETS = ([], ['-O1'], ['-O2'], ['-O3'], ['--jobs=2'], ['-O3', '--jobs=2'])
+
+
+def run(program: Path, flags) -> str:
+    result = subprocess.run([sys.executable, str(ROOT / 'main.py'), *flags, str(program)],
+                            cwd=ROOT, capture_output=True, text=True, timeout=120)
+    return result.stdout
+
+
+class ProgramTest(unittest.TestCase):
+    def test_programs(self):
+        programs = sorted(PROGRAMS.glob('*.me'))
+        self.assertTrue(programs)
+        for program in programs:
+            expected = program.with_suffix('.out').read_text(encoding='utf-8')
+            for flags in FLAG_SETS:
+                with self.subTest(program=program.name, flags=' '.join(flags)):
+                    self.assertEqual(run(program, flags), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
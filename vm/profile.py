@@ -0,0 +1,81 @@
+import json
+from typing import Dict, Optional, Set
+
+# 计数达到同类最大计数的该比例即视为热点
+HOT_FRACTION = 0.1
+
+
+class ExecutionProfile:
+    """SimpleVM 记录的执行剖析，以指令的站点标识 site 为键
+
+    branches: 条件跳转站点 -> {'true': 条件为真的次数, 'false': 条件为假的次数}
+    calls:    调用站点 -> 执行次数
+    loops:    回边 goto 站点 -> {'entries': 进入循环的次数, 'iterations': 回边执行次数}
+    """
+    def __init__(self):
+        self.branches: Dict[str, Dict[str, int]] = {}
+        self.calls: Dict[str, int] = {}
+        self.loops: Dict[str, Dict[str, int]] = {}
+
+    # ============== 记录 ==============
+    def record_branch(self, site: str, condition: bool):
+        counts = self.branches.setdefault(site, {'true': 0, 'false': 0})
+        counts['true' if condition else 'false'] += 1
+
+    def record_call(self, site: str):
+        self.calls[site] = self.calls.get(site, 0) + 1
+
+    def record_loop_header(self, site: str):
+        """执行到循环头标签：每次到达要么是进入循环，要么来自回边"""
+        counts = self.loops.setdefault(site, {'entries': 0, 'iterations': 0})
+        counts['entries'] += 1
+
+    def record_back_edge(self, site: str):
+        counts = self.loops.setdefault(site, {'entries': 0, 'iterations': 0})
+        counts['iterations'] += 1
+        counts['entries'] -= 1
+
+    # ============== 查询 ==============
+    def branch_bias(self, site: Optional[str]) -> Optional[float]:
+        """条件为真的比例，没有记录时返回 None"""
+        counts = self.branches.get(site)
+        if not counts or counts['true'] + counts['false'] == 0:
+            return None
+        return counts['true'] / (counts['true'] + counts['false'])
+
+    def trip_count(self, site: Optional[str]) -> Optional[float]:
+        """每次进入循环的平均迭代次数"""
+        counts = self.loops.get(site)
+        if not counts or counts['entries'] <= 0:
+            return None
+        return counts['iterations'] / counts['entries']
+
+    def hot_calls(self) -> Set[str]:
+        return self._hot({site: count for site, count in self.calls.items()})
+
+    def hot_loops(self) -> Set[str]:
+        return self._hot({site: counts['iterations'] for site, counts in self.loops.items()})
+
+    def _hot(self, counts: Dict[str, int]) -> Set[str]:
+        if not counts:
+            return set()
+        threshold = max(1, max(counts.values()) * HOT_FRACTION)
+        return {site for site, count in counts.items() if count >= threshold}
+
+    # ============== 读写 ==============
+    def to_dict(self) -> dict:
+        return {'branches': self.branches, 'calls': self.calls, 'loops': self.loops}
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2, sort_keys=True)
+
+    @classmethod
+    def load(cls, path: str) -> 'ExecutionProfile':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        profile = cls()
+        profile.branches = data.get('branches', {})
+        profile.calls = data.get('calls', {})
+        profile.loops = data.get('loops', {})
+        return profile
@@ -1,8 +1,10 @@
-from codegenerator.intermediate_code import TACInstruction, Label, IntermediateCode
+from codegenerator.intermediate_code import (BOOL_LITERALS, TYPED_OPERATIONS, TACInstruction, Label, IntermediateCode,
+                                             decode_switch_table)
 from typing import Dict, List, Any, Optional
+from vm.profile import ExecutionProfile
 
 class SimpleVM:
-    def __init__(self, debug=False):
+    def __init__(self, debug=False, profile: Optional[ExecutionProfile] = None):
         self.global_memory: Dict[str, Any] = {}
         self.frames: List[Dict[str, Any]] = [{}]  # 初始帧为全局帧
         self.pc: int = 0
@@ -18,6 +20,11 @@ class SimpleVM:
         self.debug = debug
         self.arrays = {}  # 用于存储数组数据
         self.tuples = {}  # 用于存储元组数据
+        self.constant_arrays: Dict[str, List[Any]] = {}  # 常量池中的列表
+        self.shared_arrays = set()  # 仍与常量池共用元素的数组，第一次写入时复制
+        self.profile = profile  # 非 None 时记录执行剖析
+        self.loop_headers: Dict[int, str] = {}  # 循环头标签位置 -> 回边站点
+        self.switch_tables: Dict[int, Dict[Any, int]] = {}  # switch 指令位置 -> {常量: 目标位置}
 
     def __str__(self):
         return (
@@ -39,12 +46,32 @@ class SimpleVM:
                     self.function_params[instr.name] = instr.params
         if "main" in self.label_map:
             self.pc = self.label_map["main"]
+        # 常量池只在装载时构造一次：元组不可修改，直接以常量标识共享
+        for const_id, (kind, values) in code.constants.items():
+            elements = [self.get_value(value) for value in values]
+            if kind == 'tuple':
+                self.tuples[const_id] = elements
+            else:
+                self.constant_arrays[const_id] = elements
+        # 装载时把 switch 的跳转表解析为 常量 -> 指令位置，执行时一次字典查找即可跳转
+        for index, instr in enumerate(self.instructions):
+            if isinstance(instr, TACInstruction) and instr.opcode == 'switch':
+                self.switch_tables[index] = {value: self.label_map[label]
+                                             for value, label in decode_switch_table(instr.arg2).items()}
+        if self.profile is not None:
+            for index, instr in enumerate(self.instructions):
+                if (isinstance(instr, TACInstruction) and instr.opcode == 'goto' and hasattr(instr, 'site')
+                        and self.label_map[instr.arg1] < index):
+                    self.loop_headers[self.label_map[instr.arg1]] = instr.site
 
     def get_value(self, operand: Optional[str]) -> Any:
         if operand is None:
             return None
         if operand.startswith('"') or operand.startswith("'"):
             return operand[1:-1]
+        # 布尔字面量由 CodeGenerator.visit_Literal 生成为 True / False
+        if operand in BOOL_LITERALS:
+            return BOOL_LITERALS[operand]
         try:
             return int(operand)
         except ValueError:
@@ -74,8 +101,12 @@ class SimpleVM:
             if self.debug:
                 print("执行指令:", instr, self.value_stack)
             if isinstance(instr, Label):
+                if self.profile is not None and self.pc in self.loop_headers:
+                    self.profile.record_loop_header(self.loop_headers[self.pc])
                 self.pc += 1
                 continue
+            if self.profile is not None:
+                self.record_profile(instr)
             result = self.execute_instruction(instr)
             if result is not None:
                 # 主函数返回时直接返回结果
@@ -83,7 +114,24 @@ class SimpleVM:
             if self.pc == old_pc:
                 self.pc += 1
 
+    def record_profile(self, instr: TACInstruction):
+        site = getattr(instr, 'site', None)
+        if site is None:
+            return
+        if instr.opcode in ('if_goto', 'if_false_goto'):
+            self.profile.record_branch(site, bool(self.get_value(instr.arg1)))
+        elif instr.opcode == 'call':
+            self.profile.record_call(site)
+        elif instr.opcode == 'goto' and self.label_map[instr.arg1] < self.pc:
+            self.profile.record_back_edge(site)
+
     def execute_instruction(self, instr: TACInstruction) -> Optional[Any]:
+        operation = TYPED_OPERATIONS.get(instr.opcode)
+        if operation is not None:
+            frame = self.frames[-1] if self.frames else self.global_memory
+            frame[instr.result] = operation(self.get_value(instr.arg1), self.get_value(instr.arg2))
+            return None
+
         if instr.opcode == 'param':
             value = self.get_value(instr.arg1)
             self.value_stack.append(value)
@@ -127,8 +175,12 @@ class SimpleVM:
             self.pc = self.label_map[func_name]
             return
 
-        elif instr.opcode == 'return':
-            return_value = self.get_value(instr.arg1)
+        elif instr.opcode in ('return', 'return_pack'):
+            if instr.opcode == 'return_pack':
+                # 标量替换后的元组返回值：多个值打包成一个 Python 元组，由调用方 unpack
+                return_value = tuple(self.get_value(value) for value in instr.arg1.split(','))
+            else:
+                return_value = self.get_value(instr.arg1)
             if self.debug:
                 print(f"DEBUG: return {return_value}, frames={self.frames}")
             if self.return_stack:
@@ -196,6 +248,15 @@ class SimpleVM:
                 self.pc = self.label_map[instr.arg2]
                 return
 
+        elif instr.opcode == 'if_false_goto':
+            if not self.get_value(instr.arg1):
+                self.pc = self.label_map[instr.arg2]
+                return
+
+        elif instr.opcode == 'switch':
+            self.pc = self.switch_tables[self.pc].get(self.get_value(instr.arg1), self.label_map[instr.arg3])
+            return
+
         elif instr.opcode == 'assign':
             value = self.get_value(instr.arg1)
             if self.debug:
@@ -205,11 +266,29 @@ class SimpleVM:
             else:
                 self.global_memory[instr.result] = value
 
+        elif instr.opcode == 'itof':
+            value = float(self.get_value(instr.arg1))
+            if self.frames:
+                self.frames[-1][instr.result] = value
+            else:
+                self.global_memory[instr.result] = value
+
+        elif instr.opcode == 'load_const':
+            frame = self.frames[-1] if self.frames else self.global_memory
+            if instr.arg1 in self.tuples:
+                frame[instr.result] = instr.arg1
+            else:
+                # 列表先与常量池共用元素（写时复制）
+                self.arrays[instr.result] = self.constant_arrays[instr.arg1]
+                self.shared_arrays.add(instr.result)
+                frame[instr.result] = instr.result
+
         # 处理数组分配
         elif instr.opcode == 'alloc_array':
             size = int(self.get_value(instr.arg1))
             array_id = instr.result
             self.arrays[array_id] = [None] * size
+            self.shared_arrays.discard(array_id)
             if self.frames:
                 self.frames[-1][array_id] = array_id
             else:
@@ -227,8 +306,28 @@ class SimpleVM:
                 raise ValueError(f"未定义的数组: {array_id}")
             if not 0 <= index < len(self.arrays[array_id]):
                 raise IndexError(f"数组索引越界: {index}")
+            self.copy_if_shared(array_id)
             self.arrays[array_id][index] = value
             
+        # 优化器已证明下标不越界的访问：不再检查集合是否存在及下标范围
+        elif instr.opcode == 'array_load_unchecked':
+            frame = self.frames[-1] if self.frames else self.global_memory
+            frame[instr.result] = self.arrays[self.get_value(instr.arg1)][self.get_value(instr.arg2)]
+
+        elif instr.opcode == 'array_store_unchecked':
+            array_id = self.get_value(instr.arg1)
+            index_str, value_str = instr.arg2.split(',')
+            self.copy_if_shared(array_id)
+            self.arrays[array_id][self.get_value(index_str)] = self.get_value(value_str)
+
+        elif instr.opcode == 'tuple_load_unchecked':
+            frame = self.frames[-1] if self.frames else self.global_memory
+            frame[instr.result] = self.tuples[self.get_value(instr.arg1)][self.get_value(instr.arg2)]
+
+        elif instr.opcode == 'unpack':
+            frame = self.frames[-1] if self.frames else self.global_memory
+            frame[instr.result] = self.get_value(instr.arg1)[int(instr.arg2)]
+
         # 处理数组/元组加载
         elif instr.opcode == 'array_load':
             array_id = self.get_value(instr.arg1)
@@ -296,6 +395,11 @@ class SimpleVM:
 
         return None
 
+    def copy_if_shared(self, array_id: str):
+        if array_id in self.shared_arrays:
+            self.arrays[array_id] = list(self.arrays[array_id])
+            self.shared_arrays.discard(array_id)
+
     def _lib_print(self, args):
         if args:
             format_string = args[0]
@@ -313,8 +417,13 @@ class SimpleVM:
         prompt = args[0] if args else ""
         return input(prompt)
 
-def run_tac_program(code: IntermediateCode, debug=False) -> Any:
-    vm = SimpleVM(debug=debug)
+def run_tac_program(code: IntermediateCode, debug=False, profile_path: Optional[str] = None) -> Any:
+    """执行三地址码程序；给出 profile_path 时把执行剖析写入该文件"""
+    profile = ExecutionProfile() if profile_path else None
+    vm = SimpleVM(debug=debug, profile=profile)
     vm.load_program(code)
-    return vm.execute()
+    result = vm.execute()
+    if profile is not None:
+        profile.save(profile_path)
+    return result
 